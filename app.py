@@ -1,28 +1,53 @@
 # === Required Libraries ===
+import startup # First, so the startup profile starts at process start
 import speech_recognition as sr
-import pyttsx3
 import time
-import random
 import re
 import os
-import pygame
+import sys
+import io
+import threading
+from collections import Counter
 from datetime import datetime
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from deep_translator import GoogleTranslator
-from gtts import gTTS
-from langdetect import detect, LangDetectException
+import endpointing
+from audio_frontend import AudioFrontEnd, ConditionedSource
+import external_data
+import wakeword
+import kws
+import phrase_index
+import memory
+import monitoring
+import sensors
+import profiling
+import translation
+import eventlog
+import governor
+import pipeline
+import shadow
+from entities import EntityExtractor, MAX_NAME_WORDS, STOP_WORDS
+from dispatch import HandlerRegistry, TurnContext, AwaitingReply, NOT_HANDLED, IO
+from prefetch import AudioCache, Prefetcher
+from response_table import build_response_table, load_translation_cache, language_list_variants, pick_response, has_slots, is_english_fallback
+
+# Heavy libraries are imported on first use (or by the background inits below), not at startup
+pyttsx3 = startup.lazy_import("pyttsx3")
+pygame = startup.lazy_import("pygame")
+deep_translator = startup.lazy_import("deep_translator")
+gtts = startup.lazy_import("gtts")
+langdetect = startup.lazy_import("langdetect")
+
 
 # === Initialize Pygame Mixer (for gTTS audio playback) ===
-# Initialize only once at the start
-try:
-    pygame.mixer.init()
-    print("[INFO] Pygame mixer initialized.")
-    mixer_initialized = True
-except Exception as e:
-    print(f"[ERROR] Could not initialize pygame mixer: {e}")
-    print("Audio playback for languages other than English will not work.")
-    mixer_initialized = False
+def init_mixer():
+    """Initializes the pygame mixer once; returns False if non-English audio can't be played."""
+    try:
+        pygame.mixer.init()
+        print("[INFO] Pygame mixer initialized.")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Could not initialize pygame mixer: {e}")
+        print("Audio playback for languages other than English will not work.")
+        return False
 
 
 # Dictionary to map language names (and common variations) to codes
@@ -48,8 +73,9 @@ LANGUAGE_CODES = {
 
 
 # === Joey's Brain (Intents) ===
-# Expanded intents and phrases. Note: Intent phrases should be in English primarily for TF-IDF matching
-# based on the current structure. Translations are handled in responses.
+# Expanded intents and phrases. Intent phrases are written in English; `python app.py build-phrases`
+# expands them into every language in LANGUAGE_CODES (see phrase_index.py). Translations of the
+# replies are handled in responses.
 intents = {
     "greet": [
         "hello", "hi", "hey", "good morning", "good evening", "what's up", "yo", "greetings", "howdy",
@@ -135,92 +161,112 @@ intents = {
     ]
 }
 
-# === Multilingual Jokes ===
-jokes_multi = {
-    'en': [
-        "Why don't scientists trust atoms? Because they make up everything!",
-        "What do you call a lazy kangaroo? Pouch potato!",
-        "Why did the scarecrow win an award? Because he was outstanding in his field!",
-        "What concert costs just 45 cents? 50 Cent featuring Nickelback!",
-        "Why did the bicycle fall over? Because it was two tired!",
-        "What do you call a fish wearing a bowtie? Sofishticated!",
-        "Why don't eggs tell jokes? They'd crack each other up!",
-        "What did the left eye say to the right eye? Between you and me, something smells!",
-        "Why was the math book sad? Because it had too many problems.",
-        "What do you call a fake noodle? An impasta!"
-    ],
-    # Add jokes in other languages here if you have them
-    # Example structure:
-    # 'es': [
-    #     "Joke 1 in Spanish",
-    #     "Joke 2 in Spanish"
-    # ],
-    # 'ja': [
-    #     "Joke 1 in Japanese",
-    #     "Joke 2 in Japanese"
-    # ]
-}
+# === Response Table ===
+# All spoken responses (and the multilingual jokes) live in response_table.py and are compiled
+# once here into an immutable RESPONSE_TABLE[intent][lang_code]. Missing languages are filled from
+# the translation cache or fall back to English ahead of time, so a turn only does a lookup.
+with startup.profiler.phase("response table"):
+    RESPONSE_TABLE = build_response_table(
+        languages=set(LANGUAGE_CODES.values()),
+        cache=load_translation_cache(),
+        static_slots={'lang_list': language_list_variants(LANGUAGE_CODES)},
+    )
 
 
 # === Speech Engine Setup ===
-engine = pyttsx3.init()
-voices = engine.getProperty('voices')
-engine.setProperty('rate', 180)
-selected_voice_id = None
-try:
-    # Prefer a male or female English voice if available
-    for voice in voices:
-        if 'english' in voice.name.lower() and ('zira' in voice.name.lower() or 'david' in voice.name.lower() or 'mark' in voice.name.lower()):
-            selected_voice_id = voice.id
-            break
-    # Fallback to any English voice
-    if not selected_voice_id:
+def init_tts_engine():
+    """Creates the pyttsx3 engine and picks an English voice (enumerating voices is slow)."""
+    engine = pyttsx3.init()
+    voices = engine.getProperty('voices')
+    engine.setProperty('rate', 180)
+    selected_voice_id = None
+    try:
+        # Prefer a male or female English voice if available
         for voice in voices:
-            if 'english' in voice.name.lower():
+            if 'english' in voice.name.lower() and ('zira' in voice.name.lower() or 'david' in voice.name.lower() or 'mark' in voice.name.lower()):
                 selected_voice_id = voice.id
                 break
-    if selected_voice_id:
-        engine.setProperty('voice', selected_voice_id)
-        print(f"[INFO] Selected pyttsx3 voice: {engine.getProperty('voice').name}")
-    else:
-        print("[WARNING] Could not find a preferred English TTS voice. Using default.")
-except Exception as e:
-    print(f"[WARNING] Error setting pyttsx3 voice: {e}. Using default.")
+        # Fallback to any English voice
+        if not selected_voice_id:
+            for voice in voices:
+                if 'english' in voice.name.lower():
+                    selected_voice_id = voice.id
+                    break
+        if selected_voice_id:
+            engine.setProperty('voice', selected_voice_id)
+            print(f"[INFO] Selected pyttsx3 voice: {engine.getProperty('voice').name}")
+        else:
+            print("[WARNING] Could not find a preferred English TTS voice. Using default.")
+    except Exception as e:
+        print(f"[WARNING] Error setting pyttsx3 voice: {e}. Using default.")
+    return engine
+
+
+def warm_language_detection():
+    """Imports langdetect and loads its language profiles (the first detect() call is the slow one)."""
+    langdetect.DetectorFactory.seed = 0 # Deterministic results
+    langdetect.detect("warming up the language profiles")
+
+
+# Engines come up in parallel with the rest of startup and the first listen;
+# users call .get(), which only blocks if that engine isn't ready yet
+tts_engine = startup.BackgroundInit("tts engine", init_tts_engine)
+mixer = startup.BackgroundInit("mixer", init_mixer, default=False)
+translator_ready = startup.BackgroundInit("translator", deep_translator.load)
+language_detector = startup.BackgroundInit("language detection", warm_language_detection)
 
 recognizer = sr.Recognizer()
+MIC_SAMPLE_RATE = 16000 # Capture rate; set to the mic's native rate (e.g. 48000) and the front end resamples
+audio_frontend = AudioFrontEnd(sample_rate=MIC_SAMPLE_RATE, target_rate=wakeword.SAMPLE_RATE)
+with startup.profiler.phase("keyword templates"):
+    keyword_templates = wakeword.load_templates() # Enrolled templates from wakeword_templates/
+wake_detector = wakeword.WakeWordDetector({label: t for label, t in keyword_templates.items() if not wakeword.is_emergency(label)})
+if wake_detector.enabled:
+    print(f"[INFO] Wake word gate active ({', '.join(sorted(wake_detector.templates))}).")
+else:
+    print("[INFO] No wake word enrolled (python wakeword.py enroll joey). Listening to everything.")
+distress_spotter = kws.DistressSpotter(keyword_templates) # Armed while listen() has the mic open (continuous with JOEY_PIPELINE=multiprocess)
+if distress_spotter.enabled:
+    print(f"[INFO] Emergency keyword spotting active ({', '.join(sorted(distress_spotter.templates))}).")
 user_name = None # Variable to store the user's name
 active_language_mode = None # Stores the language code ('en', 'hi', 'es', etc.)
-
-# --- Driving Assistance Placeholders ---
-last_speeding_warning_time = 0
-last_red_light_warning_time = 0
-speed_check_interval = 120 # Check speed every 120 seconds
-traffic_check_interval = 120 # Check traffic light status every 120 seconds
-last_speed_check = time.time()
-last_traffic_check = time.time()
-
-# === Intent Recognition Setup (Initialize and Fit TF-IDF) ===
-vectorizer = TfidfVectorizer()
-intent_phrases = []
-intent_tags = []
-for tag, phrases in intents.items():
-    # Add phrases only in English for TF-IDF training
-    if tag != "set_language_mode": # Exclude mode phrases from TF-IDF as they are primarily regex handled
-         intent_phrases.extend(phrases)
-         intent_tags.extend([tag] * len(phrases))
+last_detected_lang = None # Input language of the previous turn (drives speculative prefetch)
+
+# === Intent Recognition Setup (Per-Language Phrase Indexes) ===
+intent_phrases, intent_tags = phrase_index.catalogue(intents)
+CONFIDENCE_THRESHOLD = 0.4 # Below this the index match is "unknown"
+EMERGENCY_THRESHOLD = 0.55 # emergency_call needs more (python evaluate.py sweeps both)
+# A Latin-script emergency_call match (whichever index won) also needs one of these words, verbatim,
+# in the turn: the index alone scores "i need coffee" 0.75 on the strength of "need" (from "i need help")
+EMERGENCY_KEYWORDS = re.compile(
+    r"\b(help|emergency|distress|urgent|sos|danger|police|ambulance|fire|call someone" # English
+    r"|madad|bachao|bachaao|khatra|aag" # Hinglish
+    r"|ayuda|socorro|auxilio|emergencia|policía|policia|ambulancia|incendio|fuego|peligro" # Spanish
+    r"|hilfe|notfall|polizei|krankenwagen|feuer|gefahr" # German
+    r"|aide|secours|urgence|feu)\b", re.IGNORECASE) # French
+
+
+# Endpointing treats any exact intent phrase (e.g. "stop", "what time is it") as a complete command
+endpointer = endpointing.Endpointer(complete_phrases=[p for phrases in intents.values() for p in phrases])
+
+def build_intent_index():
+    """Fits the English index and one char n-gram index per expanded language."""
+    index = phrase_index.MultilingualIntentIndex(intent_phrases, intent_tags, set(LANGUAGE_CODES.values()),
+                                                 dtype=memory.profile["intent_dtype"])
+    if len(index.languages) > 1:
+        print(f"[INFO] Intent indexes ready: {', '.join(index.languages)}.")
     else:
-         # For language mode intent, add some general phrases for TF-IDF fallback
-         intent_phrases.extend(["change language", "switch language", "set language"])
-         intent_tags.extend([tag] * 3)
+        print("[INFO] Intent index ready (English only; run 'python app.py build-phrases' for local multilingual matching).")
+    return index
+
 
+# Fitted in the background while the first listen runs; match_intent waits for it if needed
+intent_index = startup.BackgroundInit("intent index", build_intent_index)
 
-# Fit the vectorizer with all phrases BEFORE the main loop
-try:
-    X = vectorizer.fit_transform(intent_phrases)
-    print("[INFO] TF-IDF vectorizer fitted successfully.")
-except Exception as e:
-    print(f"[ERROR] Failed to fit TF-IDF vectorizer: {e}")
-    print("Intent matching may not work correctly.")
+
+# Names, languages and translate payloads are pulled out of each turn in one pass (entities.py)
+with startup.profiler.phase("entity extractor"):
+    entity_extractor = EntityExtractor(LANGUAGE_CODES)
 
 
 # === Core Functions ===
@@ -237,334 +283,804 @@ def get_language_code(lang_name_or_code):
     return LANGUAGE_CODES.get(str(lang_name_or_code).lower(), None) # Ensure input is string
 
 
+speech_lock = threading.RLock() # Dialogue replies and safety alerts take turns on the speaker
+# Turn-path diagnostics go to the asynchronous event log (eventlog.py), not straight to the console
+speak_log = eventlog.get("speak")
+translate_log = eventlog.get("translate")
+language_log = eventlog.get("language")
+intent_log = eventlog.get("intent")
+turn_log = eventlog.get("turn")
+listen_log = eventlog.get("listen")
+emergency_log = eventlog.get("emergency")
+
+
+@profiling.counted()
 def speak(text, lang='en'):
-    """Speaks the given text using TTS."""
+    """Speaks the given text using TTS (one utterance at a time)."""
+    with speech_lock:
+        _speak(text, lang)
+
+
+def _speak(text, lang):
     # Ensure lang is a valid code, default to 'en' if not found in LANGUAGE_CODES
     lang_code = get_language_code(lang) # Get the standardized code
     if not lang_code:
-        print(f"[Speak Info] Language '{lang}' not recognized or supported, using English.")
+        speak_log.debug("unknown_language", lang=lang)
         lang_code = 'en' # Fallback to English code
 
-    print(f"Joey ({lang_code}): {text}")
+    speak_log.info("said", lang=lang_code, text=text)
 
     # Use pyttsx3 for English, gTTS for others if mixer is initialized
     if lang_code == 'en':
         try:
+            engine = tts_engine.get()
             engine.say(text)
             engine.runAndWait()
         except Exception as e:
-             print(f"[pyttsx3 Speak Error]: {e}")
-             # Fallback to print if pyttsx3 fails
-             print(f"[Fallback Print - en]: {text}")
+             speak_log.error("tts_failed", engine="pyttsx3", error=str(e), text=text) # Echoed to the console as the fallback
 
-    elif mixer_initialized: # Use gTTS only if mixer is initialized
+    elif mixer.get(): # Use gTTS only if mixer is initialized
          play_gtts_audio(text, lang_code)
     else:
-         print("[WARNING] pygame mixer not initialized. Cannot play non-English audio.")
-         print(f"[Fallback Print - {lang_code}]: {text}")
+         speak_log.warning("no_mixer", lang=lang_code, text=text)
          # speak("Sorry, I cannot speak in that language right now.", 'en') # Avoid recursion
 
 
-def play_gtts_audio(text, lang_code):
-    """Generates audio using gTTS, saves temporarily, plays it, and cleans up."""
-    file_path = None # Initialize file_path outside try
-    try:
-        # Removed the gTTS.get_langs() check due to the error.
-        # Relying on the gTTS constructor to raise an error if the language is unsupported.
+def reply(key, lang, **slots):
+    """Renders the precompiled response for (key, lang) into a (text, lang) reply, filling per-turn slots."""
+    response_usage[key] += 1 # Drives which responses the prefetcher warms first
+    text = pick_response(RESPONSE_TABLE, key, lang)
+    if is_english_fallback(RESPONSE_TABLE, key, lang):
+        # Use a translation warmed by the prefetcher (or an earlier turn) if we have one
+        translated = translation_memo.get((text, lang))
+        if translated and has_slots(translated) == has_slots(text):
+            text = translated
+    return (text.format(**slots) if slots else text), lang
 
-        tts = gTTS(text=text, lang=lang_code, slow=False)
-        # Use a robust temporary file handling
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as fp:
-             file_path = fp.name
-             tts.save(file_path)
 
-        pygame.mixer.music.load(file_path)
+def respond(key, lang, **slots):
+    """Speaks the precompiled response for (key, lang), filling any per-turn slots like name."""
+    speak(*reply(key, lang, **slots))
+
+
+def play_gtts_audio(text, lang_code):
+    """Plays gTTS audio for the text, from the audio cache or synthesized in memory."""
+    try:
+        audio = audio_cache.get((text, lang_code)) # Warmed by the prefetcher (or spoken before): skip gTTS
+        if not audio and resource_governor.degraded("cached_audio_only"):
+            # Under heavy load the local engine answers now instead of waiting on gTTS synthesis
+            speak_log.info("local_tts", lang=lang_code, reason="governor")
+            engine = tts_engine.get()
+            engine.say(text)
+            engine.runAndWait()
+            return
+        if not audio:
+            # Relying on the gTTS constructor to raise an error if the language is unsupported.
+            # Synthesized in memory: no temp file per utterance
+            audio = synthesize_gtts(text, lang_code)
+            audio_cache.put((text, lang_code), audio)
+        pygame.mixer.music.load(io.BytesIO(audio), "mp3")
         pygame.mixer.music.play()
+        clock = pygame.time.Clock() # One clock per playback, not per poll tick
         while pygame.mixer.music.get_busy():
-            pygame.time.Clock().tick(10)
+            clock.tick(10)
         pygame.mixer.music.unload()
 
     except Exception as e: # Catch any exception from gTTS or playback
-        print(f"[gTTS/Playback Error - {lang_code}]: {e}")
+        speak_log.error("playback_failed", lang=lang_code, error=str(e))
         # Provide a fallback message in English using pyttsx3
         try:
              fallback_msg = "Sorry, I couldn't generate or play the audio response in that language."
-             print(f"Joey (en - Fallback): {fallback_msg}")
+             speak_log.info("said", lang="en", fallback=True, text=fallback_msg)
+             engine = tts_engine.get()
              engine.say(fallback_msg)
              engine.runAndWait()
         except Exception as fb_e:
-             print(f"[Playback Fallback Error]: {fb_e}")
-    finally:
-        # Ensure the temporary file is removed
-        if file_path and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except Exception as cleanup_e:
-                print(f"[Audio Cleanup Error] {cleanup_e}")
+             speak_log.error("tts_failed", engine="pyttsx3", error=str(fb_e), text=fallback_msg)
 
 
+@profiling.counted()
 def translate_text(text, target_lang_code):
-    """Translates text to the target language code."""
-    try:
-        # The deep_translator library often uses ISO 639-1 codes
-        # Removed the explicit check using get_supported_languages due to the error.
-        # Relying on GoogleTranslator to handle unsupported codes and raise errors.
-
-        translated_text = GoogleTranslator(source='auto', target=target_lang_code).translate(text)
-        print(f"Joey (Translated to {target_lang_code}): {translated_text}")
-        return translated_text
-    except Exception as e:
-        print(f"[Translation Error to {target_lang_code}]: {e}")
-        # Catch exceptions raised by GoogleTranslator (e.g., unsupported language)
-        return None
+    """Translates text to the target language code (None on failure, e.g. an unsupported language)."""
+    # Urgent: sent at once, together with anything else queued for that language (see translation.py).
+    # Bounded, so a hung backend releases the handler's worker before its dispatch budget runs out
+    translated_text = translator.translate(text, target_lang_code, timeout=TRANSLATE_TIMEOUT)
+    translate_log.debug("translated", target=target_lang_code, ok=bool(translated_text), text=translated_text or text)
+    return translated_text
 
 
+@profiling.counted()
 def detect_user_language(text):
     """Detects the language of the input text using langdetect."""
     if not text or text.strip() == "":
         return 'en'
     try:
-        print(f"[Attempting language detection for: '{text}']")
         # Primary detection using langdetect
-        lang = detect(text)
-        print(f"[Detected User Language (langdetect): {lang}]")
+        language_detector.get() # Profiles are loaded in the background at startup
+        lang = langdetect.detect(text)
+        language_log.debug("detected", lang=lang)
         # Return the detected code. We will handle whether it's supported for speaking/translation elsewhere.
         return lang
-    except LangDetectException:
-        print("[Language Detection Failed (langdetect)] Defaulting to English.")
+    except langdetect.LangDetectException:
+        language_log.debug("undetected", text=text) # Defaulting to English
         return "en"
     except Exception as e:
-        print(f"[Unexpected Language Detection Error: {e}] Defaulting to English.")
+        language_log.error("detection_failed", error=str(e))
         return "en"
 
 
-def match_intent(user_input):
-    """Matches user input to the best intent using TF-IDF."""
-    # Move global declarations to the top of the function
-    global X, vectorizer, intent_phrases, intent_tags # Moved to the top
-
+# === Speculative Prefetch (translations + gTTS audio) ===
+# Both caches have hard byte budgets from the memory profile (JOEY_PROFILE=low_memory shrinks them)
+translation_memo = memory.BoundedCache(memory.profile["translation_memo_bytes"], sizeof=memory.text_size,
+                                       name="translation memo") # (text, lang_code) -> translated text, filled by translate_text
+audio_cache = AudioCache(max_bytes=memory.profile["audio_cache_bytes"]) # (text, lang_code) -> mp3 bytes
+# Backends tried in order per string: JOEY_TRANSLATION=offline,google (default) | google | offline.
+# Offline covers the pairs converted into models/mt (`python translation.py convert`); the rest go to Google.
+# The deep_translator library uses ISO 639-1 codes; GoogleTranslator raises for unsupported ones
+translation_backends = {
+    "offline": translation.OfflineBackend(max_bytes=memory.profile["mt_model_bytes"]),
+    "google": translation.GoogleBackend(lambda target: deep_translator.GoogleTranslator(source='auto', target=target)),
+}
+TRANSLATION_ORDER = [name.strip() for name in os.environ.get("JOEY_TRANSLATION", "offline,google").split(",")
+                     if name.strip() in translation_backends]
+translator = translation.BatchTranslator(
+    translation.ChainBackend(*(translation_backends[name] for name in TRANSLATION_ORDER)), memo=translation_memo)
+TRANSLATE_TIMEOUT = 2.5 # Seconds translate_text waits; under the 3s budget of the translating IO handlers
+response_usage = Counter() # response key -> times spoken
+# Cold-start order before usage counts exist: the replies a driver hears most
+DEFAULT_PREFETCH_ORDER = ["greet", "unknown", "thank_you", "ask_for_help", "tell_a_joke", "translate_prompt",
+                          "stop_or_exit", "handler_timeout", "weather_unavailable", "name_unknown", "about_general"]
+
+
+def synthesize_gtts(text, lang_code):
+    """Synthesizes text with gTTS into mp3 bytes (no playback)."""
+    if not mixer.get():
+        return None # Nothing could play it anyway
+    buffer = io.BytesIO()
+    gtts.gTTS(text=text, lang=lang_code, slow=False).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+def prefetch_candidates(lang_code):
+    """Yields (text, needs_translation) for the most used slot-free responses, most used first."""
+    ranked = [key for key, _ in response_usage.most_common()]
+    ranked += [key for key in DEFAULT_PREFETCH_ORDER if key not in response_usage]
+    for key in ranked:
+        needs_translation = is_english_fallback(RESPONSE_TABLE, key, lang_code)
+        for template in RESPONSE_TABLE[key].get(lang_code, RESPONSE_TABLE[key]['en']):
+            if not has_slots(template): # Per-turn values (names, times) can't be synthesized ahead
+                yield template, needs_translation
+
+
+prefetcher = Prefetcher(prefetch_candidates, translate_text, synthesize_gtts, audio_cache,
+                        max_items=memory.profile["prefetch_items"], translate_many=translator.translate_many)
+
+
+@profiling.counted()
+def match_intent(user_input, detected_lang=None, shadow=False):
+    """
+    Matches user input to the best intent with one lookup in the index for its language/script.
+    `shadow` hands the turn's utterance and result to the shadow evaluator (once per turn).
+    """
     if not user_input:
         return None, 0.0
 
-    # Ensure the vectorizer is fitted before attempting to transform
-    if 'X' not in globals() or X is None:
-         print("[ERROR] TF-IDF vectorizer is not fitted. Cannot match intent.")
-         # Attempt to re-fit if possible, though this indicates a setup issue
-         try:
-             print("[Attempting to re-fit vectorizer]")
-             # global X, vectorizer, intent_phrases, intent_tags # Removed from here
-
-             intent_phrases = []
-             intent_tags = []
-             for tag, phrases in intents.items():
-                  if tag != "set_language_mode":
-                       intent_phrases.extend(phrases)
-                       intent_tags.extend([tag] * len(phrases))
-                  else:
-                       intent_phrases.extend(["change language", "switch language", "set language"])
-                       intent_tags.extend([tag] * 3)
-             vectorizer = TfidfVectorizer()
-             X = vectorizer.fit_transform(intent_phrases)
-             print("[INFO] TF-IDF vectorizer re-fitted successfully.")
-             # Retry matching with the newly fitted vectorizer
-             user_vec = vectorizer.transform([user_input])
-             scores = cosine_similarity(user_vec, X)
-             best_match_idx = scores.argmax()
-             best_score = scores[0, best_match_idx]
-             confidence_threshold = 0.4
-             matched_tag = intent_tags[best_match_idx]
-             if best_score >= confidence_threshold:
-                  print(f"[Intent Matched (Re-fit): {matched_tag} with confidence {round(best_score, 2)}]")
-                  return matched_tag, best_score
-             else:
-                  print(f"[Low Confidence Match (Re-fit): {matched_tag} ({round(best_score, 2)})]")
-                  return "unknown", best_score
-
-         except Exception as re_fit_e:
-              print(f"[ERROR] Failed to re-fit TF-IDF vectorizer: {re_fit_e}")
-              return "unknown", 0.0
-
-
     try:
-        user_vec = vectorizer.transform([user_input])
-        scores = cosine_similarity(user_vec, X)
-        best_match_idx = scores.argmax()
-        best_score = scores[0, best_match_idx]
-        confidence_threshold = 0.4 # Adjusted threshold
-
-        matched_tag = intent_tags[best_match_idx]
-
+        fuzzy = not resource_governor.degraded("no_fuzzy")
+        started = time.perf_counter()
+        matched_tag, best_score, index_lang = intent_index.get().match(user_input, detected_lang, fuzzy=fuzzy)
+        if shadow and intent_shadow and not resource_governor.degraded("no_shadow"):
+            intent_shadow.submit(user_input, matched_tag, best_score, time.perf_counter() - started)
         # Higher confidence for critical intents
-        if matched_tag == "emergency_call" and best_score < 0.55:
-             print(f"[Intent Match: emergency_call, but confidence too low ({round(best_score, 2)})]")
+        if matched_tag == "emergency_call" and best_score < EMERGENCY_THRESHOLD:
+             intent_log.info("rejected", intent=matched_tag, score=round(best_score, 3), index=index_lang)
              return "unknown", best_score # Treat as unknown if confidence is low
+        if (matched_tag == "emergency_call" and phrase_index.script_language(user_input) is None
+                and not EMERGENCY_KEYWORDS.search(user_input)):
+             intent_log.info("rejected", intent=matched_tag, score=round(best_score, 3), index=index_lang, reason="no_keyword")
+             return "unknown", best_score
 
         # We are now handling language mode and specific greetings/translations with regex *before* intent matching,
-        # so the TF-IDF match here is for more general or less specific phrases.
+        # so the index match here is for more general or less specific phrases.
 
-        if best_score >= confidence_threshold:
-            print(f"[Intent Matched: {matched_tag} with confidence {round(best_score, 2)}]")
+        if best_score >= CONFIDENCE_THRESHOLD:
+            intent_log.info("matched", intent=matched_tag, score=round(best_score, 3), index=index_lang)
             return matched_tag, best_score
         else:
-            print(f"[Low Confidence Match: {matched_tag} ({round(best_score, 2)})]")
+            intent_log.info("low_confidence", intent=matched_tag, score=round(best_score, 3), index=index_lang)
             return "unknown", best_score
     except Exception as e:
-        print(f"[Intent Matching Error]: {e}")
+        intent_log.error("match_failed", error=str(e))
         return "unknown", 0.0
 
-def extract_name(user_input):
+
+def extract_name(user_input, entities=None):
     """
-    Extracts name using a more precise regex for 'my name is' or 'i am'.
-    Aims to capture the name immediately following the phrase.
+    Extracts the name following 'my name is' / 'i am' / 'call me'.
+    The name stops at punctuation, a stop word, a language name or after four words.
     """
     global user_name
-    # More precise regex: captures words immediately following "my name is" or "i am/i'm"
-    # It stops capturing at punctuation, common non-name words, or the end of the string.
-    # Added more non-name words to the negative lookahead.
-    match = re.search(r"(?:my name is|i am|i'm)\s+([a-zA-Z\s]+?)(?:\.|!|\?|,|\s+(?:and|so|but|because|which|what|how|when|where|why|is|am|are|was|were|have|has|had|do|did|don't|can|can't|will|won't|would|should|could|if|then|than|or|nor|for|at|in|on|of|to|from|by|with|about|as|at|by|for|from|in|into|like|of|off|on|out|over|past|since|through|to|under|up|with|your|my|his|her|their|our)\b|$)", user_input.lower())
-
-    extracted = None
-    if match:
-        extracted_potential = match.group(1).strip()
-        # Further refine by splitting and taking the first few words, and basic validation
-        words = extracted_potential.split()
-        if words:
-            # Assuming names are typically 1 to 4 words (to handle names like "Mary Ann")
-            potential_name = " ".join(words[:4]).title()
-            # Basic validation: check length and avoid common non-names or single letters
-            if len(potential_name) > 1 and potential_name.lower() not in ["is", "am", "me", "joey", "in", "to", "a", "the", "i", "you", "what", "how", "when", "where", "why", "and", "so", "but", "for", "my", "name", "good", "good spanish", "good hindi"]: # Added "good spanish", "good hindi" to exclusion
-                 extracted = potential_name
+    entities = entities or entity_extractor.extract(user_input)
+    extracted = entities.person if entities.trigger == "name" else None
 
     if extracted:
         user_name = extracted
-        print(f"User name set to: {user_name}")
+        turn_log.info("user_name", name=user_name)
         return user_name
     else:
-         print("[INFO] Could not extract a valid name.")
+         turn_log.debug("no_name_extracted")
          return None
 
 
-# --- Placeholder Functions (Keep as before) ---
+# --- Location / Weather (shared pooled + cached client, see external_data.py) ---
 def get_location():
-    print("[Placeholder] Returning mock location.")
-    return "New Delhi, Delhi, India"
+    """'City, Region, Country' from the IP lookup (cached), or None if unavailable."""
+    return external_data.get_location()
+
 def get_weather():
-    print("[Placeholder] Returning mock weather.")
-    # Simulate fetching weather data - in a real app, use a weather API
-    try:
-        # Example using a hypothetical weather API call
-        # weather_data = weather_api.get_weather("your_location")
-        # return weather_data
-        # Using mock data for now:
-        return {"location": "New Delhi", "temp_c": 35, "condition": "mostly sunny", "temp_f": round(35 * 9/5 + 32)}
-    except Exception as e:
-        print(f"[Placeholder Weather Error]: {e}")
-        return None # Indicate failure
+    """Current weather dict {location, temp_c, condition, temp_f} (cached per rough position), or None."""
+    return external_data.get_weather()
+
+
+# --- Driving Safety Monitor ---
+# Sensor sources (JOEY_SENSORS, see sensors.py) stream readings into the monitor's ring; the safety
+# rules are evaluated on the monitor's own timer thread and alerts spoken from its alert thread
+# (speak() serializes with the dialogue), so the turn loop never waits on them. Alerts are only
+# spoken from a live source (JOEY_SENSORS=serial:<device>); simulated readings are logged.
+
+safety_log = eventlog.get("safety")
+SAFETY_LOG_LEVELS = {monitoring.INFO: eventlog.INFO, monitoring.WARNING: eventlog.WARNING, monitoring.CRITICAL: eventlog.ERROR}
+
+def announce_safety_alert(rule, value):
+    live = sensor_hub.live
+    safety_log.log(SAFETY_LOG_LEVELS[rule.severity], "alert", rule=rule.name, value=round(value, 1), spoken=live)
+    if live:
+        respond(rule.message, active_language_mode or 'en')
+
+safety_monitor = monitoring.SafetyMonitor(monitoring.DEFAULT_RULES, alert=announce_safety_alert)
+sensor_hub = sensors.SensorHub(safety_monitor.ring, clock=safety_monitor.wheel.clock)
 
 def get_current_speed():
-    print("[Placeholder] Returning mock speed.")
-    # Simulate reading speed from a sensor or system - in a real app, integrate with car's system
-    return random.randint(30, 80) # km/h
+    """Latest vehicle speed in km/h, or None if no recent reading."""
+    return sensor_hub.latest("speed")
 
 def get_traffic_signal_status():
-    print("[Placeholder] Returning mock traffic signal.")
-    # Simulate reading traffic signal status - in a real app, use traffic data API or camera
-    return random.choices(['green', 'yellow', 'red'], weights=[10, 1, 2])[0] # More likely to be green
+    """'green' / 'yellow' / 'red', or None if no recent reading."""
+    code = sensor_hub.latest("signal")
+    return sensors.SIGNAL_NAMES.get(code) if code is not None else None
+
+def get_heart_rate():
+    """Latest heart rate in beats per minute, or None if no recent reading from a live source."""
+    return sensor_hub.latest("heart_rate") if sensor_hub.live else None
+
+
+# --- Resource Governor ---
+# Sheds optional work under CPU / thermal pressure (levels in governor.py). The safety monitor, the
+# distress spotter and distress matching never degrade; the monitor's lag is one of the pressure signals.
+def on_governor_change(old_level, new_level):
+    if resource_governor.degraded("no_prefetch"):
+        prefetcher.cancel() # Stop warming replies in the background
 
-def simulate_heartbeat():
-    print("[Placeholder] Returning mock heartbeat.")
-    # Simulate reading from a biometric sensor
-    return random.randint(60, 100) # beats per minute
+resource_governor = governor.from_env(safety_lag=lambda: safety_monitor.wheel.lag, on_change=on_governor_change)
+
+# --- Shadow Evaluation ---
+# The fine-tuned joblib classifier (bertjoey.py) scores every turn in the background for comparison;
+# only active with a model in JOEY_SHADOW_DIR (see shadow.py)
+intent_shadow = shadow.from_env()
+
+# --- Multi-Process Audio Pipeline ---
+# JOEY_PIPELINE=multiprocess moves capture, recognition and distress spotting into supervised worker
+# processes that share one audio ring (pipeline.py); the turn loop then only does the turn itself.
+PIPELINE_MODE = os.environ.get("JOEY_PIPELINE", "off").strip().lower()
+audio_pipeline = None # Started in main()
 
 # Input/Output and Feature Handlers
 def listen():
-    """Listens for user input via microphone."""
-    with sr.Microphone() as source:
-        print("\nAdjusting for ambient noise...")
+    """
+    Listens for user input via microphone. The distress spotter only hears audio while this holds
+    the microphone, not while Joey speaks, translates or runs a handler; JOEY_PIPELINE=multiprocess
+    runs it continuously on its own capture process (pipeline.py).
+    """
+    # 30 ms reads so the wake word and endpointing decisions are made at frame granularity
+    with sr.Microphone(sample_rate=MIC_SAMPLE_RATE, chunk_size=MIC_SAMPLE_RATE * 30 // 1000) as mic:
+        listen_log.debug("adjusting_for_noise")
         try:
-            # Adjust for ambient noise dynamically
-            recognizer.adjust_for_ambient_noise(source, duration=1.5)
-            print("Listening...")
-            audio = recognizer.listen(source, timeout=5, phrase_time_limit=15)
-            print("Processing...")
+            # Everything below reads conditioned audio (noise suppression, high-pass, AGC, 16 kHz)
+            # The distress spotter sees every frame: while waiting for the wake word and while capturing
+            source = ConditionedSource(mic, audio_frontend, taps=(distress_spotter.tap,) if distress_spotter.enabled else ())
+            source.prime(0.5) # Settles the noise estimate (carried over between turns)
+            distress_spotter.reset()
+            activation = None
+            if wake_detector.enabled:
+                # Idle on the cheap wake-word front end; STT only runs after "Joey" / "hey Joey" / "suno Joey"
+                listen_log.info("waiting_for_wake_word")
+                activation = wakeword.wait_for_activation(source, wake_detector)
+            listen_log.info("listening")
+            # Adaptive endpointing: ends short commands quickly, waits out this speaker's usual pauses
+            endpointer.set_speaker(user_name)
+            raw = endpointing.capture_utterance(source, endpointer)
+            if raw is None:
+                raise sr.WaitTimeoutError("No speech detected")
+            audio = sr.AudioData(raw, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+            if resource_governor.degraded("low_rate_stt"): # Half the samples to encode and upload
+                audio = sr.AudioData(audio.get_raw_data(convert_rate=governor.STT_LOW_RATE), governor.STT_LOW_RATE, audio.sample_width)
+            listen_log.debug("recognizing")
             # Use Google's speech recognition
             text = recognizer.recognize_google(audio)
-            print(f"You: {text}")
+            listen_log.info("heard", text=text)
+            if activation:
+                text = wakeword.strip_wake_phrase(text)
             return text.lower() # Return lowercased text for easier matching
+        except kws.DistressDetected as e:
+            # Spotted on the audio itself: don't wait for STT (or the network) to confirm
+            emergency_log.warning("keyword_spotted", label=e.label)
+            handle_emergency(active_language_mode or 'en')
+            return ""
         except sr.WaitTimeoutError:
             # print("Listening timed out while waiting for phrase to start")
             return "" # Return empty string on timeout
         except sr.UnknownValueError:
             # API was unable to understand the speech
-            print("Didn't catch that.")
+            listen_log.info("not_understood")
             return ""
         except sr.RequestError as e:
             # API was unreachable or unresponsive
-            print(f"Service unavailable; {e}")
+            listen_log.error("stt_unavailable", error=str(e))
             speak("Sorry, I'm having trouble connecting to the speech service.", 'en')
             return ""
         except Exception as e:
-            print(f"Error in listen(): {e}")
+            listen_log.error("listen_failed", error=str(e))
             return "" # Return empty string on other errors
 
 
+def listen_pipeline():
+    """listen() on the multi-process pipeline: same contract (lowercased text, or "")."""
+    low_rate = governor.STT_LOW_RATE if resource_governor.degraded("low_rate_stt") else None
+    kind, payload = audio_pipeline.listen(user_name, low_rate)
+    if kind == "heard":
+        listen_log.info("heard", text=payload)
+        return payload.lower()
+    if kind == "distress":
+        emergency_log.warning("keyword_spotted", label=payload)
+        handle_emergency(active_language_mode or 'en')
+    elif kind == "not_understood":
+        listen_log.info("not_understood")
+    elif kind == "stt_unavailable":
+        listen_log.error("stt_unavailable", error=payload)
+        speak("Sorry, I'm having trouble connecting to the speech service.", 'en')
+    elif kind == "error":
+        listen_log.error("listen_failed", error=payload)
+    return ""
+
+
 def handle_emergency(response_lang):
     """Handles the emergency call action."""
-    responses = {
-        'en': "Emergency situation detected. Calling emergency services now. Please remain calm.",
-        'hi': "आपातकालीन स्थिति का पता चला। आपातकालीन सेवाओं को कॉल किया जा रहा है। कृपया शांत रहें।",
-        'es': "Situación de emergencia detectada. Llamando a los servicios de emergencia ahora. Por favor, mantén la calma.",
-        'ur': "ہنگامی صورتحال کا پتہ چلا۔ ایمرجنسی سروسز کو کال کی جا رہی ہے۔ براہ کرم پرسکون رہیں۔",
-        'bn': "জরুরী অবস্থা সনাক্ত করা হয়েছে। জরুরী পরিষেবাগুলিতে কল করা হচ্ছে। শান্ত থাকুন।" # Added Bengali
-    }
-    speak(responses.get(response_lang, responses['en']), response_lang)
-    print(">>> SIMULATING CALL TO EMERGENCY NUMBER (e.g., 112)... <<<")
+    respond("emergency_call", response_lang)
+    emergency_log.warning("call_simulated", number="112")
     # TODO: Implement actual emergency contact/service integration here.
 
 
-def handle_distress_signal(user_input, user_lang):
-    """Checks for distress signals and initiates emergency protocol if needed."""
-    # Determine if the user input strongly indicates an emergency, potentially overriding intent matching
-    critical_emergency_patterns = [
-        r'\bi need help\b', r'\bsos\b', r'\bfire emergency\b', r'\bmedical emergency\b',
-        r'\bmujhe madad chahiye\b', # Hindi
-        r'\bnecesito ayuda\b', r'\bemergencia médica\b', r'\bemergencia de incendio\b', # Spanish
-        r'\bmujhay madad chahiye\b', r'\bمیڈیکل ایمرجنسی\b', r'\bآگ لگی ہے\b', # Urdu
-        r'\bআমার সাহায্য দরকার\b', r'\bমেডিকেল ইমার্জেন্সি\b', r'\bফায়ার ইমার্জেন্সি\b' # Bengali examples - need to add these to intents too
-    ]
+# Phrases that strongly indicate an emergency, potentially overriding intent matching
+critical_emergency_patterns = [
+    r'\bi need help\b', r'\bsos\b', r'\bfire emergency\b', r'\bmedical emergency\b',
+    r'\bmujhe madad chahiye\b', # Hindi
+    r'\bnecesito ayuda\b', r'\bemergencia médica\b', r'\bemergencia de incendio\b', # Spanish
+    r'\bmujhay madad chahiye\b', r'\bمیڈیکل ایمرجنسی\b', r'\bآگ لگی ہے\b', # Urdu
+    r'\bআমার সাহায্য দরকার\b', r'\bমেডিকেল ইমার্জেন্সি\b', r'\bফায়ার ইমার্জেন্সি\b' # Bengali examples - need to add these to intents too
+]
 
-    is_distress = False
+
+def distress_pattern(user_input):
+    """The first critical emergency pattern found in the input, or None."""
     for pattern in critical_emergency_patterns:
         if re.search(pattern, user_input, re.IGNORECASE):
-            print(f"[Critical Emergency Pattern Matched: {pattern}]")
-            is_distress = True
-            break # Found a critical pattern, no need to check others
+            return pattern
+    return None
+
+
+def handle_distress_signal(user_input, user_lang, detected_lang=None):
+    """Checks for distress signals and initiates emergency protocol if needed."""
+    is_distress = False
+    pattern = distress_pattern(user_input)
+    if pattern:
+        emergency_log.warning("pattern_matched", pattern=pattern)
+        is_distress = True
 
     # Also consider the intent match if confidence is high enough for emergency_call
     # Pass user_input to match_intent
-    intent, score = match_intent(user_input) # Re-calculate intent here for the most current input check
+    intent, score = match_intent(user_input, detected_lang) # Re-calculate intent here for the most current input check
     if intent == "emergency_call" and score > 0.7: # Higher confidence for intent-based trigger
-        print(f"[Emergency Call Intent Matched with high confidence: {score}]")
+        emergency_log.warning("intent_matched", score=round(score, 3))
         is_distress = True
 
     if is_distress:
-        responses_check = {
-            'en': "It sounds like you might be in distress. Initiating emergency procedures now.",
-            'hi': "लगता है आप संकट میں ہیں। اب आपातकालीन प्रक्रिया شروع کر رہا ہوں", # Corrected Hindi/Urdu mix
-            'es': "Parece que podrías estar en peligro. Iniciando procedimientos de emergencia ahora.",
-            'ur': "ایسا لگتا ہے کہ آپ پریشانی میں ہیں۔ اب ہنگامی طریقہ کار شروع کر رہا ہوں۔",
-            'bn': "মনে হচ্ছে আপনি সংকটে আছেন। জরুরি পদ্ধতি এখন শুরু করা হচ্ছে।" # Added Bengali
-        }
-        speak(responses_check.get(user_lang, responses_check['en']), user_lang)
+        handlers.dialogue.cancel() # An emergency supersedes any question Joey was waiting on
+        respond("distress_check", user_lang)
         handle_emergency(user_lang)
         return True # Indicate distress was handled
     return False # Indicate no distress signal handled
 
 
+# === Intent Handlers ===
+# Every intent (and the high-priority regex phrases) is a handler in this registry.
+# Handlers return replies instead of speaking; dispatch.py runs them within their latency budget.
+handlers = HandlerRegistry(speak=speak, render=reply)
+
+
+# --- High-Priority Phrases (tried in this order, before intent matching) ---
+@handlers.route(r"say hello to our boss", kind=IO, timeout=3.0)
+def handle_boss_greeting(ctx):
+    """Handles "say hello to our boss [in <language>]" - must come BEFORE generic greet_someone."""
+    target = ctx.entities.target_language # "in <language>" span if present
+    boss_greeting_en = "Hello Tushkit Gupta!" # The English phrase to translate
+
+    if not target:
+        # If no language specified, speak the English greeting in the current response_lang
+        return boss_greeting_en, ctx.response_lang
+
+    target_lang_code = target.value
+    if not target_lang_code:
+        return [(f"Sorry, I don't recognize the language '{target.text}' for this greeting. Saying hello to the boss in English.", ctx.response_lang),
+                (boss_greeting_en, ctx.response_lang)]
+
+    translated_greeting = translate_text(boss_greeting_en, target_lang_code)
+    if translated_greeting:
+        return translated_greeting, target_lang_code # Speak the translated greeting in the target language
+    # Fallback if translation fails
+    return [("Sorry, I couldn't translate that greeting to the requested language. Saying it in English.", ctx.response_lang),
+            (boss_greeting_en, ctx.response_lang)]
+
+
+# Handle "say hello to [name]" or "say hello to [name] in [language]"; the name and language
+# come from the turn's entities. "tell" only counts before a name, so "tell me a joke" never takes the IO path
+@handlers.route(r"(?:say hello to|say hi to|greet|give my regards to|tell(?!\s+(?:me|us|you|him|her|them|a|an|the|about|what|who|how|joey)\b))\s+\S",
+                kind=IO, timeout=3.0)
+def handle_greet_name(ctx):
+    """Greets a named person, optionally translated into the requested language."""
+    if ctx.entities.trigger != "greet":
+        return NOT_HANDLED # e.g. "tell me to say ..." is a translate request
+    person_name = ctx.entities.person
+    target = ctx.entities.target_language
+    target_lang_code = target.value if target else None
+    if target and not target_lang_code:
+        turn_log.info("unknown_language", language=target.text)
+
+    if person_name: # If a valid name was extracted
+        base_greeting_en = f"Hello {person_name}!"
+        if not target_lang_code:
+             # If no specific language was requested, speak the English greeting in the current response_lang
+             return base_greeting_en, ctx.response_lang
+        translated_greeting = translate_text(base_greeting_en, target_lang_code)
+        if translated_greeting:
+             return translated_greeting, target_lang_code
+        # Fallback if translation fails
+        return [(f"Sorry, I couldn't translate 'Hello {person_name}!' to {target_lang_code}. Saying it in English.", ctx.response_lang),
+                (base_greeting_en, ctx.response_lang)]
+
+    # No name ("greet someone", "tell me a joke"): let intent matching handle it
+    turn_log.debug("greet_without_name")
+    return NOT_HANDLED
+
+
+# Handle phrases like "translate X to Y" or "say X in Y" (X may be quoted); the payload and
+# target language come from the turn's entities
+@handlers.route(r"^(?:translate|say|how do you say|tell me to say)\s+.*\s+(?:in|to)\s+\S+$", kind=IO, timeout=3.0)
+def handle_translate_request(ctx):
+    """Translates the captured text into the requested language."""
+    target = ctx.entities.target_language
+    if ctx.entities.trigger != "translate" or not target:
+        return NOT_HANDLED
+    text_to_translate = ctx.entities.payload
+    target_language_name = target.text.lower()
+    target_lang_code = target.value
+
+    if text_to_translate and target_lang_code:
+        translated_text = translate_text(text_to_translate, target_lang_code)
+        if translated_text:
+            return translated_text, target_lang_code # Speak the translated text in the target language
+        # Fallback if translation fails (e.g., unsupported language by translator)
+        return f"Sorry, I couldn't translate '{text_to_translate}' to {target_language_name}.", ctx.response_lang
+    if target_language_name and not target_lang_code:
+        return f"Sorry, I don't recognize the language '{target_language_name}' for translation.", ctx.response_lang
+    return reply("translate_prompt", ctx.response_lang)
+
+
+# --- Intents (matched by TF-IDF) ---
+@handlers.register("greet")
+def handle_greet(ctx):
+    greeting_text = pick_response(RESPONSE_TABLE, "greet", ctx.response_lang)
+    if user_name: # Use the user's name if known
+         greeting_text += f" {user_name}"
+    return greeting_text, ctx.response_lang
+
+
+@handlers.register("greet_someone")
+def handle_greet_someone(ctx):
+    # Generic "greet someone" - specific names and languages were handled by the greet-name route
+    return reply("greet_someone", ctx.response_lang)
+
+
+@handlers.register("ask_for_help")
+def handle_ask_for_help(ctx):
+    return reply("ask_for_help", ctx.response_lang)
+
+
+# Emergency call is handled by handle_distress_signal for higher priority check
+
+
+@handlers.register("tell_a_joke")
+def handle_tell_a_joke(ctx):
+    # Jokes without a translation for response_lang were resolved to English at build time
+    return reply("tell_a_joke", ctx.response_lang)
+
+
+@handlers.register("joke_feedback_negative")
+def handle_joke_feedback_negative(ctx):
+    return reply("joke_feedback_negative", ctx.response_lang)
+
+
+@handlers.register("thank_you")
+def handle_thank_you(ctx):
+    return reply("thank_you", ctx.response_lang)
+
+
+@handlers.register("stop_or_exit")
+def handle_stop_or_exit(ctx):
+    ctx.exit_requested = True # Exit the loop after speaking
+    return reply("stop_or_exit", ctx.response_lang)
+
+
+@handlers.register("introduce_myself")
+def handle_introduce_myself(ctx):
+    # Triggered by phrases like "my name is", "i am"; extract_name also sets the user_name global
+    extracted = extract_name(ctx.user_input, ctx.entities)
+    if not extracted:
+        # Ask again; the answer comes back through the normal turn pipeline to take_name_reply
+        return AwaitingReply("name", take_name_reply, timeout=15.0, replies=reply("name_not_caught", ctx.response_lang))
+    replies = [reply("introduce_myself", ctx.response_lang, name=extracted)]
+    # --- Handle the "what's yours" part if present after introduction ---
+    if re.search(r"(what'?s yours|and your name|aur tumhara naam)", ctx.user_input, re.IGNORECASE):
+        replies.append(reply("joey_name", ctx.response_lang))
+    return replies
+
+
+def take_name_reply(ctx, tag):
+    """Answer to "Could you please repeat it?": "my name is Asha" or just "Asha"."""
+    global user_name
+    name = extract_name(ctx.user_input, ctx.entities)
+    words = [w.strip(".,!?") for w in ctx.user_input.split()]
+    if (not name and len(words) <= MAX_NAME_WORDS and not any(w.lower() in STOP_WORDS for w in words)
+            and not distress_pattern(ctx.user_input) # "necesito ayuda" is not a name either
+            and match_intent(ctx.user_input, ctx.detected_lang)[0] == "unknown"): # "play some music" is not a name
+        name = user_name = " ".join(words).title()
+        turn_log.info("user_name", name=user_name)
+    if not name:
+        return NOT_HANDLED # Not an answer to the question; handle it as a normal turn
+    return reply("introduce_myself", ctx.response_lang, name=name)
+
+
+@handlers.register("ask_name")
+def handle_ask_name(ctx):
+    if user_name:
+        return reply("ask_name", ctx.response_lang, name=user_name)
+    return reply("name_unknown", ctx.response_lang)
+
+
+@handlers.register("about_joey")
+def handle_about_joey(ctx):
+    # Specific questions about attributes get more detailed responses, otherwise the general one
+    user_input = ctx.user_input
+    if re.search(r"hair color|hair colour|baal|pelo|بال|do you not have hair|you don't have hair|kya tumhare baal nahin hain|¿no tienes pelo?|kya aap ke baal nahi hain", user_input, re.IGNORECASE):
+         return reply("about_hair", ctx.response_lang)
+    if re.search(r"age|umar|edad|عمر", user_input, re.IGNORECASE):
+         return reply("about_age", ctx.response_lang)
+    if re.search(r"who made you|who created you", user_input, re.IGNORECASE):
+         return reply("about_creator", ctx.response_lang)
+    if re.search(r"what languages can you speak|speak any language|what languages do you know|kaun kaun si bhasha bol sakte ho|qué idiomas puedes hablar|kaun kaun si zaban bol saktay hain|koi bhi zaban bolen", user_input, re.IGNORECASE):
+         # The supported language list was formatted (and shuffled) when the table was built
+         return reply("about_languages", ctx.response_lang)
+    if re.search(r"are you real|are you alive|do you have feelings|are you a robot|are you human", user_input, re.IGNORECASE):
+         return reply("about_nature", ctx.response_lang)
+    return reply("about_general", ctx.response_lang)
+
+
+@handlers.register("ask_location", kind=IO, timeout=2.0)
+def handle_ask_location(ctx):
+    location = get_location()
+    if not location:
+        return reply("location_unavailable", ctx.response_lang)
+    return reply("ask_location", ctx.response_lang, location=location)
+
+
+@handlers.register("tell_time")
+def handle_tell_time(ctx):
+    current_time = datetime.now().strftime("%I:%M %p") # e.g., 03:30 PM
+    return reply("tell_time", ctx.response_lang, time=current_time)
+
+
+@handlers.register("ask_weather", kind=IO, timeout=2.0)
+def handle_ask_weather(ctx):
+    weather_data = get_weather()
+    if not weather_data:
+        return reply("weather_unavailable", ctx.response_lang)
+    # Provide temperature in both Celsius and Fahrenheit
+    return reply("ask_weather", ctx.response_lang, **weather_data)
+
+
+@handlers.register("translate")
+def handle_translate(ctx):
+    # The *general* translate intent ("translate this"); "translate X to Y" is handled by its route
+    return reply("translate_prompt", ctx.response_lang)
+
+
+@handlers.register("unknown")
+def handle_unknown(ctx):
+    return reply("unknown", ctx.response_lang)
+
+
+# === Memory Report ===
+def memory_report_text():
+    """Resident memory broken down by Joey's components (`python app.py memory-report`)."""
+    return memory.memory_report({
+        "intent index": intent_index.result,
+        "response table": RESPONSE_TABLE,
+        "translation memo": translation_memo,
+        "offline translation models": translation_backends["offline"].models,
+        "audio cache": audio_cache,
+        "external data cache": external_data.client._cache,
+        "wake/keyword templates": keyword_templates,
+        "entity extractor": entity_extractor,
+        "endpointer": endpointer,
+        "audio front end": audio_frontend,
+    })
+
+
 # === Main Interaction Loop ===
+def note_detected_language(lang):
+    """
+    Records a fresh language detection and warms replies for it once the same non-English label has
+    been seen on two consecutive turns; a single langdetect flip on a short utterance isn't enough.
+    """
+    global last_detected_lang
+    previous, last_detected_lang = last_detected_lang, lang
+    if (lang == previous and lang != 'en' and not active_language_mode and lang in LANGUAGE_CODES.values()
+            and not resource_governor.degraded("no_prefetch")):
+        prefetcher.switch(lang) # No-op if that language is already warm
+
+
+@profiling.counted()
+def process_turn(user_input):
+    """Handles one recognized utterance. Returns False once the user asked Joey to stop."""
+    global active_language_mode
+    eventlog.set_turn(eventlog.sink.turn + 1) # Every record below carries this turn number
+
+    # --- Determine Response Language ---
+    # Prioritize active language mode. If no active mode, detect input language for potential future use
+    if (resource_governor.degraded("skip_language_detection")
+            or active_language_mode and resource_governor.degraded("skip_language_detection_in_mode")):
+        detected_input_lang = last_detected_lang or 'en' # Under pressure: keep the last detection
+    else:
+        detected_input_lang = detect_user_language(user_input) # Detect input language
+        note_detected_language(detected_input_lang)
+    response_lang = active_language_mode if active_language_mode else 'en' # Response language is active mode or default English
+
+    turn_log.debug("languages", response=response_lang, detected=detected_input_lang, text=user_input)
+
+    # --- Check for Language Mode Toggles (Priority Handling using regex) ---
+    # These should be handled before intent matching and should explicitly change active_language_mode
+    mode_changed = False
+    temp_response_text = ""
+    temp_response_lang_confirm = 'en' # Default language for confirming mode change
+
+    # Regex to capture potential language name and on/off/mode state
+    # This regex specifically looks for a language name followed by mode/on/off terms or 'in/to'.
+    # Use word boundaries (\b) to match whole words.
+    # Added 'speak in' as a trigger for mode change as well.
+    with profiling.section("mode regex"):
+        mode_match = re.search(r"\b(?:speak\s+in\s+)?(?:" + "|".join(re.escape(name) for name in LANGUAGE_CODES.keys()) + r")\s*(?:mode\s+|modo\s+|मोड\s+)?(?:on|off|चालू|बंद|activar|desactivar|آن|آف|शुरू)?\b", user_input, re.IGNORECASE) # Added speak in
+
+    if mode_match:
+        mode_changed = True
+        lang_part = mode_match.group(0).lower() # Get the matched language and mode part
+
+        # Find the language code from the matched part
+        requested_lang_code = None
+        for lang_name, code in LANGUAGE_CODES.items():
+             # Use a word boundary to match whole language names within the matched part
+             if re.search(r'\b' + re.escape(lang_name) + r'\b', lang_part):
+                  requested_lang_code = code
+                  break
+
+        if requested_lang_code:
+             # Check if the phrase implies "on" or "off" or just setting the language
+             is_on = re.search(r"(on|चालू|शुरू|activar|آن)\b", lang_part) is not None
+             is_off = re.search(r"(off|बंद|desactivar|آف)\b", lang_part) is not None
+             # Check for phrases like "speak in [language]" or "[language] mode" without explicit on/off
+             is_set = re.search(r"\bspeak\s+in\s+\b" + re.escape(lang_name) + r"\b", lang_part, re.IGNORECASE) is not None or re.search(r"\b" + re.escape(lang_name) + r"\b(?: mode)?\b", lang_part, re.IGNORECASE) is not None
+
+
+             if is_on or is_set:
+                  if active_language_mode != requested_lang_code:
+                       active_language_mode = requested_lang_code
+                       if not resource_governor.degraded("no_prefetch"):
+                           prefetcher.switch(requested_lang_code) # Warm replies for the new mode in the background
+                       # Attempt to speak confirmation in the requested language
+                       temp_response_text_en = f"Okay, switching to {requested_lang_code} mode."
+                       # Translate confirmation message if possible, otherwise use English
+                       # Ensure translation uses the correct code and check for None
+                       translated_confirm = translate_text(temp_response_text_en, requested_lang_code)
+                       temp_response_text = translated_confirm if translated_confirm else temp_response_text_en
+                       temp_response_lang_confirm = requested_lang_code # Try to confirm in the new language
+                  else:
+                       temp_response_text_en = f"I am already in {requested_lang_code} mode."
+                       translated_confirm = translate_text(temp_response_text_en, requested_lang_code)
+                       temp_response_text = translated_confirm if translated_confirm else temp_response_text_en
+                       temp_response_lang_confirm = requested_lang_code # Try to confirm in the active language
+             elif is_off:
+                  if active_language_mode == requested_lang_code:
+                       active_language_mode = None # Setting to None means default (English)
+                       prefetcher.cancel()
+                       temp_response_text = f"Okay, {requested_lang_code} mode turned off. Switching to default English."
+                       temp_response_lang_confirm = 'en'
+                  elif active_language_mode is None and requested_lang_code == 'en':
+                        temp_response_text = "I am already in default English mode."
+                        temp_response_lang_confirm = 'en'
+                  else:
+                       # If they say "Spanish off" but aren't in Spanish mode
+                       temp_response_text = f"Okay, turning off {requested_lang_code} mode (if it was on). Switching to default English."
+                       temp_response_lang_confirm = 'en'
+        else:
+            # This case should be less likely with the regex, but good to have a fallback
+            temp_response_text = "Sorry, I didn't recognize that language mode request."
+            temp_response_lang_confirm = 'en'
+
+
+    if mode_changed:
+        speak(temp_response_text, temp_response_lang_confirm)
+        # After changing mode, the response_lang for the *next* turn will reflect the change
+        return True # Skip subsequent processing for this turn
+
+
+    # --- Handle Distress Signals (High Priority) ---
+    # Check for distress signals regardless of language mode
+    if handle_distress_signal(user_input, response_lang, detected_input_lang): # Use response_lang for speaking the confirmation
+         return True # If distress is handled, skip normal intent processing
+
+
+    # --- Answer to a Pending Follow-Up Question ---
+    # A handler asked something last turn (dispatch.AwaitingReply); its answer goes there once mode
+    # toggles and distress have been ruled out, so "necesito ayuda" is never taken as a name
+    ctx = TurnContext(user_input, response_lang, detected_input_lang, entities=entity_extractor.extract(user_input))
+    if handlers.dialogue.resume(ctx):
+        return True
+
+
+    # --- Handle Specific Fixed Phrases (Highest Priority) ---
+    # Boss greeting, "say hello to [name] in [language]" and "translate X to Y" routes
+    with profiling.section("route dispatch"):
+        routed = handlers.dispatch_routes(ctx)
+    if routed:
+         return True # Skip normal intent processing for these specific commands
+
+
+    # --- Intent Matching ---
+    # Perform index matching only if the input wasn't handled by high-priority regex checks;
+    # Hindi/Urdu/Bengali/Spanish/Hinglish input is matched locally in its own language's index
+    # Note: The original 'translate' intent will still be matched by TF-IDF for general phrases
+    # like "translate this", but the more specific route above will handle "translate X to Y".
+    intent, score = match_intent(user_input, detected_input_lang, shadow=True)
+
+
+    # --- Intent Handling ---
+    # One registry lookup; the response language is based on active_language_mode (response_lang)
+    handlers.dispatch(intent, ctx)
+    if ctx.exit_requested:
+        return False # The user asked Joey to stop
+    return True
+
+
 def main():
-    global user_name, active_language_mode
+    global user_name, active_language_mode, audio_pipeline
 
     # Initial greeting - ask for name if not known
     initial_greeting_lang = active_language_mode if active_language_mode else 'en'
@@ -574,577 +1090,64 @@ def main():
          speak("Hello there, I am Joey. What's your name?", initial_greeting_lang)
 
 
-    while True:
-        # --- Background Tasks (Optional - needs threading for non-blocking operation) ---
-        # If these checks take significant time, they will block listening.
-        # For a real-time assistant, you'd run these in separate threads or processes.
-        # check_and_warn_speeding()
-        # check_and_warn_traffic_light()
+    external_data.warm() # Location + weather into cache before anyone asks
+    safety_monitor.start()
+    resource_governor.start()
+    source = sensors.open_source(os.environ.get("JOEY_SENSORS", "none"))
+    if source:
+        sensor_hub.attach(source)
+    if PIPELINE_MODE == "multiprocess":
+        audio_pipeline = pipeline.AudioPipeline(keyword_templates, endpointer.complete_phrases, mic_rate=MIC_SAMPLE_RATE)
+        audio_pipeline.start()
+    startup.report_when_ready([tts_engine, mixer, translator_ready, language_detector, intent_index])
+    startup.profiler.mark("first listen")
 
+    while True:
+        # Speed / red light / heart rate checks run on safety_monitor's threads, not here
         # --- Listen ---
-        user_input = listen()
+        # Falls back to the in-process path if the pipeline's supervisor gave up on a worker
+        user_input = listen_pipeline() if audio_pipeline and audio_pipeline.healthy else listen()
         if not user_input:
             time.sleep(0.5) # Small delay if no input
             continue
 
-        # --- Determine Response Language ---
-        # Prioritize active language mode. If no active mode, detect input language for potential future use
-        detected_input_lang = detect_user_language(user_input) # Detect input language
-        response_lang = active_language_mode if active_language_mode else 'en' # Response language is active mode or default English
-
-        print(f"[Current Response Language: {response_lang}] (Detected Input Language: {detected_input_lang})")
-
-
-        # --- Check for Language Mode Toggles (Priority Handling using regex) ---
-        # These should be handled before intent matching and should explicitly change active_language_mode
-        mode_changed = False
-        temp_response_text = ""
-        temp_response_lang_confirm = 'en' # Default language for confirming mode change
-
-        # Regex to capture potential language name and on/off/mode state
-        # This regex specifically looks for a language name followed by mode/on/off terms or 'in/to'.
-        # Use word boundaries (\b) to match whole words.
-        # Added 'speak in' as a trigger for mode change as well.
-        mode_match = re.search(r"\b(?:speak\s+in\s+)?(?:" + "|".join(re.escape(name) for name in LANGUAGE_CODES.keys()) + r")\s*(?:mode\s+|modo\s+|मोड\s+)?(?:on|off|चालू|बंद|activar|desactivar|آن|آف|शुरू)?\b", user_input, re.IGNORECASE) # Added speak in
-
-        if mode_match:
-            mode_changed = True
-            lang_part = mode_match.group(0).lower() # Get the matched language and mode part
-
-            # Find the language code from the matched part
-            requested_lang_code = None
-            for lang_name, code in LANGUAGE_CODES.items():
-                 # Use a word boundary to match whole language names within the matched part
-                 if re.search(r'\b' + re.escape(lang_name) + r'\b', lang_part):
-                      requested_lang_code = code
-                      break
-
-            if requested_lang_code:
-                 # Check if the phrase implies "on" or "off" or just setting the language
-                 is_on = re.search(r"(on|चालू|शुरू|activar|آن)\b", lang_part) is not None
-                 is_off = re.search(r"(off|बंद|desactivar|آف)\b", lang_part) is not None
-                 # Check for phrases like "speak in [language]" or "[language] mode" without explicit on/off
-                 is_set = re.search(r"\bspeak\s+in\s+\b" + re.escape(lang_name) + r"\b", lang_part, re.IGNORECASE) is not None or re.search(r"\b" + re.escape(lang_name) + r"\b(?: mode)?\b", lang_part, re.IGNORECASE) is not None
-
-
-                 if is_on or is_set:
-                      if active_language_mode != requested_lang_code:
-                           active_language_mode = requested_lang_code
-                           # Attempt to speak confirmation in the requested language
-                           temp_response_text_en = f"Okay, switching to {requested_lang_code} mode."
-                           # Translate confirmation message if possible, otherwise use English
-                           # Ensure translation uses the correct code and check for None
-                           translated_confirm = translate_text(temp_response_text_en, requested_lang_code)
-                           temp_response_text = translated_confirm if translated_confirm else temp_response_text_en
-                           temp_response_lang_confirm = requested_lang_code # Try to confirm in the new language
-                      else:
-                           temp_response_text_en = f"I am already in {requested_lang_code} mode."
-                           translated_confirm = translate_text(temp_response_text_en, requested_lang_code)
-                           temp_response_text = translated_confirm if translated_confirm else temp_response_text_en
-                           temp_response_lang_confirm = requested_lang_code # Try to confirm in the active language
-                 elif is_off:
-                      if active_language_mode == requested_lang_code:
-                           active_language_mode = None # Setting to None means default (English)
-                           temp_response_text = f"Okay, {requested_lang_code} mode turned off. Switching to default English."
-                           temp_response_lang_confirm = 'en'
-                      elif active_language_mode is None and requested_lang_code == 'en':
-                            temp_response_text = "I am already in default English mode."
-                            temp_response_lang_confirm = 'en'
-                      else:
-                           # If they say "Spanish off" but aren't in Spanish mode
-                           temp_response_text = f"Okay, turning off {requested_lang_code} mode (if it was on). Switching to default English."
-                           temp_response_lang_confirm = 'en'
-            else:
-                # This case should be less likely with the regex, but good to have a fallback
-                temp_response_text = "Sorry, I didn't recognize that language mode request."
-                temp_response_lang_confirm = 'en'
-
-
-        if mode_changed:
-            speak(temp_response_text, temp_response_lang_confirm)
-            # After changing mode, the response_lang for the *next* turn will reflect the change
-            continue # Skip subsequent processing for this turn
-
-
-        # --- Handle Distress Signals (High Priority) ---
-        # Check for distress signals regardless of language mode
-        if handle_distress_signal(user_input, response_lang): # Use response_lang for speaking the confirmation
-             continue # If distress is handled, skip normal intent processing
-
-
-        # --- Handle Specific Fixed Phrases (Highest Priority) ---
-        # Handle the "say hello to our boss" request - must come BEFORE generic greet_someone
-        # Regex to capture the optional language at the end
-        boss_match = re.search(r"say hello to our boss\s*(?:in\s+([a-zA-Z]+))?", user_input, re.IGNORECASE)
-        if boss_match:
-             target_lang_name = boss_match.group(1) # Capture the language name if present
-             boss_greeting_en = "Hello Tushkit Gupta!" # The English phrase to translate
-
-             if target_lang_name:
-                  target_lang_code = get_language_code(target_lang_name)
-                  if target_lang_code:
-                       translated_greeting = translate_text(boss_greeting_en, target_lang_code)
-                       if translated_greeting:
-                            speak(translated_greeting, target_lang_code) # Speak the translated greeting in the target language
-                       else:
-                            # Fallback if translation fails
-                            speak(f"Sorry, I couldn't translate that greeting to the requested language. Saying it in English.", response_lang) # Speak error in current response lang
-                            speak(boss_greeting_en, response_lang) # Speak English greeting in current language
-                  else:
-                       speak(f"Sorry, I don't recognize the language '{target_lang_name}' for this greeting. Saying hello to the boss in English.", response_lang) # Speak error in current response lang
-                       speak(boss_greeting_en, response_lang) # Speak English greeting in current language
-
-             else:
-                  # If no language specified, speak the English greeting in the current response_lang
-                  speak(boss_greeting_en, response_lang)
-
-             continue # Skip normal intent processing for this specific command
-
-
-        # --- Handle Specific Greeting with Name and Optional Language (Issue 1 Fix) ---
-        # Handle "say hello to [name]" or "say hello to [name] in [language]"
-        # Regex to capture the name after the greeting phrase, optionally followed by 'in [language]'
-        # Group 1: the name part (non-greedy)
-        # Group 2: the language name after 'in ' or 'to '
-        greet_name_match = re.search(r"(?:say hello to|say hi to|greet|give my regards to|tell)\s+([a-zA-Z\s]+?)(?:\s+(?:in|to)\s+([a-zA-Z]+))?$", user_input, re.IGNORECASE)
-
-        if greet_name_match:
-             person_name_part = greet_name_match.group(1).strip()
-             target_lang_name_part = greet_name_match.group(2) # Captured language name if present
-
-             person_name = None
-             target_lang_code = None
-
-             # Basic processing for the name part
-             words = person_name_part.split()
-             if words:
-                 # Take up to the first 4 words, capitalize
-                 potential_name = " ".join(words[:4]).title()
-                 # Basic validation for the name (avoiding single letters or common short words)
-                 if len(potential_name) > 1 and potential_name.lower() not in ["a", "the", "i", "you", "me", "him", "her", "us", "them", "joey", "boss", "our boss", "someone"]: # Added "someone"
-                      person_name = potential_name
-
-             if target_lang_name_part:
-                  target_lang_code = get_language_code(target_lang_name_part)
-                  if not target_lang_code:
-                       print(f"[Greeting Extraction] Unrecognized language specified: '{target_lang_name_part}'")
-
-
-             if person_name: # If a valid name was extracted
-                  # Construct the basic greeting phrase in English
-                  base_greeting_en = f"Hello {person_name}!"
-
-                  # Translate the greeting if a valid target language was specified
-                  if target_lang_code:
-                       translated_greeting = translate_text(base_greeting_en, target_lang_code)
-                       if translated_greeting:
-                            speak(translated_greeting, target_lang_code) # Speak the translated greeting in the target language
-                       else:
-                            # Fallback if translation fails
-                            speak(f"Sorry, I couldn't translate 'Hello {person_name}!' to {target_lang_code}. Saying it in English.", response_lang) # Speak error in current response lang
-                            speak(base_greeting_en, response_lang) # Speak English greeting in current language
-                  else:
-                       # If no specific language was requested, speak the English greeting in the current response_lang
-                       speak(base_greeting_en, response_lang) # Use response_lang
-
-             elif person_name_part.lower() == "our boss":
-                  # This specific case is handled by the high-priority check at the start of the loop
-                  pass # Do nothing here, it was handled by the boss_match regex check
-
-             elif person_name_part.lower() == "someone":
-                   # This is a generic greet someone request, let the TF-IDF intent handle it
-                   # Do nothing here, let the intent matching proceed
-                   print("[INFO] Generic 'greet someone' matched regex, proceeding to TF-IDF.")
-                   pass # Continue to intent matching
-
-             else:
-                   # If the regex matched the pattern but couldn't extract a valid name
-                   responses = {
-                         'en': "Sorry, I didn't catch the name of the person you want me to greet.",
-                         'hi': "माफ़ करना, मुझे उस व्यक्ति का नाम समझ नहीं आया जिसे आप नमस्ते कहना चाहते हैं।",
-                         'es': "Lo siento, no entendí el nombre de la persona que quieres que salude.",
-                         'ur': "معاف کرنا، مجھے اس شخص کا نام سمجھ نہیں آیا جسے آپ سلام کہنا چاہتے ہیں۔",
-                         'bn': "দুঃখিত, আপনি কাকে হ্যালো বলতে চান তা বুঝতে পারিনি।" # Added Bengali
-                    }
-                   speak(responses.get(response_lang, responses['en']), response_lang)
-             # We handle specific greetings here, so we continue to the next iteration if one was matched
-             continue
-
-
-        # --- Handle Translate Request (Issue 2 Fix) ---
-        # Handle phrases like "translate X to Y" or "say X in Y"
-        # This regex captures the text to translate (Group 1) and the target language (Group 2)
-        # Revised regex to capture the text more reliably before "in/to [language]".
-        # It looks for the intro phrase, then captures everything (greedy .*)
-        # until it finds " in " or " to " followed by letters.
-        translate_match = re.search(r"^(?:translate|say|how do you say|tell me to say)\s+(.*)\s+(?:in|to)\s+([a-zA-Z]+)$", user_input, re.IGNORECASE)
-
-        if translate_match:
-             # Group 1 is the text to translate, Group 2 is the language name
-             text_to_translate = translate_match.group(1).strip()
-             target_language_name = translate_match.group(2).strip().lower()
-
-             target_lang_code = get_language_code(target_language_name)
-
-             if text_to_translate and target_lang_code:
-                  translated_text = translate_text(text_to_translate, target_lang_code)
-                  if translated_text:
-                       # Speak the translated text in the target language
-                       speak(translated_text, target_lang_code)
-                  else:
-                       # Fallback if translation fails (e.g., unsupported language by translator)
-                       speak(f"Sorry, I couldn't translate '{text_to_translate}' to {target_language_name}.", response_lang) # Speak error in current response lang
-             elif target_language_name and not target_lang_code:
-                  # If target language is not recognized
-                  speak(f"Sorry, I don't recognize the language '{target_language_name}' for translation.", response_lang) # Speak error in current response lang
-             else:
-                  # This case should be less likely with the new regex, but include fallback
-                  responses = {
-                  'en': "What would you like me to translate and to which language?",
-                  'hi': "आप क्या अनुवाद करना चाहेंगे और किस भाषा में?",
-                  'es': "¿Qué te gustaría que tradujera y a qué idioma?",
-                  'ur': "آپ کیا ترجمہ کرنا چاہیں گے اور کس زبان میں؟",
-                  'bn': "আপনি কি অনুবাদ করতে চান এবং কোন ভাষায়?" # Added Bengali
-                  }
-                  speak(responses.get(response_lang, responses['en']), response_lang)
-
-             # Continue to the next iteration after handling translation
-             continue
-
-
-        # --- Intent Matching ---
-        # Perform TF-IDF matching only if the input wasn't handled by high-priority regex checks
-        # Note: The original 'translate' intent will still be matched by TF-IDF for general phrases
-        # like "translate this", but the more specific regex above will handle "translate X to Y".
-        intent, score = match_intent(user_input)
-
-
-        # --- Intent Handling ---
-        # The response language for these intents will be based on active_language_mode (response_lang)
-        if intent == "greet":
-            greetings = {
-                'en': ["Hello!", "Hi there!", "Hey!", "Greetings!", "Good to hear from you!"],
-                'hi': ["नमस्ते!", "हाय!", "हैलो!", "आपसे सुनकर अच्छा लगा!"],
-                'es': ["¡Hola!", "¡Qué tal!", "¡Saludos!", "¡Me alegra escucharte!"],
-                'ur': ["اسلام علیکم!", "آداب!", "سلام!", "آپ سے سن کر اچھا لگا!"],
-                'bn': ["হ্যালো!", "নমস্কার!", "কেমন আছেন?", "শুনে ভালো লাগলো!"], # Added Bengali greetings
-                'ja': ["こんにちは！"], # Added Japanese greeting
-                'de': ["Hallo!"], # Added German greeting
-                # Add greetings for other supported languages
-            }
-            # Use the user's name if known
-            # Use get_language_code for robust lookup in greetings dictionary
-            greeting_text = random.choice(greetings.get(get_language_code(response_lang), greetings['en'])) # Fallback to English if response_lang not in greetings
-            if user_name:
-                 greeting_text += f" {user_name}"
-            speak(greeting_text, response_lang)
-
-        elif intent == "greet_someone":
-             # This branch is for generic "greet someone" if the specific "say hello to [name]..." regex didn't match
-             # It won't handle specific names or languages as that was done by regex.
-             responses = {
-                  'en': "Okay, I can greet someone if you tell me their name.",
-                  'hi': "ठीक है, अगर आप मुझे उनका नाम बताएं तो मैं किसी का अभिवादन कर सकता हूँ।",
-                  'es': "De acuerdo, puedo saludar a alguien si me dices su nombre.",
-                  'ur': "ٹھیک ہے، اگر آپ مجھے ان کا نام بتائیں تو میں کسی کو سلام کر سکتا ہوں۔",
-                  'bn': "ঠিক আছে، আপনি যদি আমাকে তাদের নাম বলেন তবে আমি কাউকে অভিবাদন জানাতে পারি।" # Added Bengali
-             }
-             speak(responses.get(response_lang, responses['en']), response_lang)
-
-
-        elif intent == "ask_for_help":
-            responses = {
-                'en': "I can tell you the time, weather, tell jokes, translate to many languages, remember your name, and more. Just ask!",
-                'hi': "मैं आपको समय, मौसम बता सकता हूँ, चुटकुले सुना सकता हूँ, कई भाषाओं में अनुवाद कर सकता हूँ، आपका नाम याद रख सकता ہوں، اور بھی بہت کچھ۔ بس پوچھیں!", # Corrected Hindi/Urdu mix
-                'es': "Puedo decirte la hora, el clima, contar chistes, traducir a muchos idiomas, recordar tu nombre y más. ¡Solo pregunta!",
-                'ur': "میں آپ کو وقت، موسم بتا سکتا ہوں، لطیفے سنا سکتا ہوں، کئی زبانوں میں ترجمہ کر سکتا ہوں، آپ کا نام یاد رکھ سکتا ہوں، اور بہت کچھ۔ بس پوچھیں!",
-                'bn': "আমি আপনাকে সময়, আবহাওয়া বলতে পারি, কৌতুক বলতে পারি, অনেক ভাষায় অনুবাদ করতে পারি، আপনার নাম মনে রাখতে পারি এবং আরও অনেক কিছু করতে পারি। শুধু জিজ্ঞাসা করুন!" # Added Bengali
-            }
-            speak(responses.get(response_lang, responses['en']), response_lang)
-
-        # Emergency call is handled by handle_distress_signal for higher priority check
-        # elif intent == "emergency_call":
-        #     handle_emergency(response_lang)
-
-        elif intent == "tell_a_joke":
-            # Use get_language_code for robust lookup in jokes_multi dictionary
-            jokes = jokes_multi.get(get_language_code(response_lang), jokes_multi['en']) # Fallback to English jokes
-            if jokes:
-                speak(random.choice(jokes), response_lang)
-            else:
-                 responses = {
-                      'en': "Sorry, I don't have any jokes in that language right now.",
-                      'hi': "माफ़ करना, मेरे पास अभी उस भाषा में کوئی चुٹکلے نہیں ہیں۔", # Corrected Hindi/Urdu mix
-                      'es': "Lo siento, no tengo chistes en ese idioma en este momento.",
-                      'ur': "معاف کرنا، میرے پاس فی الحال اس زبان میں کوئی لطیفے نہیں ہیں۔",
-                      'bn': "দুঃখিত، আমার কাছে এই মুহূর্তে ঐ ভাষায় কোনো কৌতুক নেই।" # Added Bengali
-                 }
-                 speak(responses.get(response_lang, responses['en']), response_lang)
-
-
-        elif intent == "joke_feedback_negative":
-             responses = {
-                  'en': "Oh, I'm sorry you didn't find that funny. I'll try to find better jokes for you!",
-                  'hi': "ماف کرنا، مجھے ماف کرنا اگر آپ کو وہ مضحکہ خیز نہیں لگا۔ میں آپ کے لیے بہتر لطیفے ڈھونڈنے کی کوشش کروں گا۔", # Corrected Hindi/Urdu mix
-                  'es': "Oh, lamento que no te haya parecido divertido. ¡Intentaré encontrar mejores chistes para ti!",
-                  'ur': "اوہ، مجھے افسوس ہے کہ آپ کو یہ مضحکہ خیز نہیں لگا۔ میں آپ کے لیے بہتر لطیفے تلاش کرنے کی کوشش کروں گا!",
-                  'bn': "ওহ, আমি দুঃখিত আপনি এটা মজার খুঁজে পাননি। আমি আপনার জন্য আরও ভালো কৌতুক খুঁজে বের করার চেষ্টা করব!" # Added Bengali
-             }
-             speak(responses.get(response_lang, responses['en']), response_lang)
-
-
-        elif intent == "thank_you":
-            responses = {
-                'en': ["You're welcome!", "No problem!", "Anytime!", "Glad I could help!"],
-                'hi': ["आपका स्वागत है!", "कोई बात नहीं!", "कभी भी!", "खुशी हुई कि मैं मदद कर सका!"],
-                'es': ["¡De nada!", "¡No hay problema!", "¡Cuando quieras!", "¡Me alegra haber podido ayudar!"],
-                'ur': ["خوش آمدید!", "کوئی بات نہیں!", "جب چاہیں!", "خوشی ہوئی کہ میں مدد کر سکا!"],
-                'bn': ["আপনাকে স্বাগতম!", "কোন সমস্যা নেই!", "যেকোনো সময়!", "সাহায্য করতে পেরে ভালো লাগছে!"] # Added Bengali
-            }
-            speak(random.choice(responses.get(response_lang, responses['en'])), response_lang)
-
-        elif intent == "stop_or_exit":
-            responses = {
-                'en': "Goodbye! Have a great day!",
-                'hi': "अलविदा! आपका दिन शानदार हो!",
-                'es': "¡Adiós! ¡Que tengas un gran día!",
-                'ur': "اللہ حافظ! آپ کا دن اچھا گزرے!",
-                'bn': "বিদায়! আপনার দিনটি দারুণ কাটুক!" # Added Bengali
-            }
-            speak(responses.get(response_lang, responses['en']), response_lang)
+        if not process_turn(user_input):
             break # Exit the loop
 
-        elif intent == "introduce_myself":
-            # This intent is triggered by phrases like "my name is", "i am", etc.
-            # Extract the name and set the user_name global variable
-            extracted = extract_name(user_input) # Use the improved extract_name
-
-            if extracted:
-                responses = {
-                    'en': f"Nice to meet you, {extracted}! I'll remember your name.",
-                    'hi': f"آپ سے مل کر اچھا لگا، {extracted}! میں آپ کا نام یاد رکھوں گا۔", # Corrected Hindi/Urdu mix
-                    'es': f"Encantado de conocerte, {extracted}! Recordaré tu nombre.",
-                    'ur': f"آپ سے مل کر اچھا لگا، {extracted}! میں آپ کا نام یاد رکھوں گا۔",
-                    'bn': f"আপনার সাথে দেখা করে ভালো লাগলো، {extracted}! আমি আপনার নাম মনে রাখব।" # Added Bengali
-                }
-                speak(responses.get(response_lang, responses['en']), response_lang)
-
-                # --- Handle the "what's yours" part if present after introduction ---
-                if re.search(r"(what'?s yours|and your name|aur tumhara naam)", user_input, re.IGNORECASE):
-                     responses_name = {
-                          'en': "My name is Joey.",
-                          'hi': "میرا نام جॉय ہے۔", # Corrected Hindi/Urdu mix
-                          'es': "Mi nombre es Joey.",
-                          'ur': "میرا نام جَوی ہے۔",
-                          'bn': "আমার নাম জয়ে।" # Added Bengali
-                     }
-                     speak(responses_name.get(response_lang, responses_name['en']), response_lang)
-
-            else:
-                # If name extraction failed for the introduce_myself intent
-                responses = {
-                    'en': "Sorry, I couldn't catch your name. Could you please repeat it?",
-                    'hi': "ماف کرنا، میں آپ کا نام سمجھ نہیں پایا۔ کیا آپ کر پیا اسے دوبارہ کہہ سکتے ہیں؟", # Corrected Hindi/Urdu mix
-                    'es': "Lo siento, no pude entender tu nombre. ¿Podrías repetirlo por favor?",
-                    'ur': "معاف کرنا، میں آپ کا نام سمجھ نہیں پایا۔ کیا آپ براہ کرم اسے دہرا سکتے ہیں؟",
-                    'bn': "দুঃখিত، আমি আপনার নাম বুঝতে পারিনি। আপনি কি দয়া করে এটি পুনরাবৃত্তি করতে পারেন?" # Added Bengali
-                }
-                speak(responses.get(response_lang, responses['en']), response_lang)
-
-        elif intent == "ask_name":
-             if user_name:
-                  responses = {
-                       'en': f"Your name is {user_name}.",
-                       'hi': f"آپ کا نام {user_name} ہے۔", # Corrected Hindi/Urdu mix
-                       'es': f"Tu nombre es {user_name}.",
-                       'ur': f"آپ کا نام {user_name} ہے۔",
-                       'bn': f"আপনার نام {user_name}।" # Added Bengali
-                  }
-                  speak(responses.get(response_lang, responses['en']), response_lang)
-             else:
-                  responses = {
-                       'en': "I don't know your name yet. You can tell me by saying, 'My name is [your name]'.",
-                       'hi': "مجھے ابھی آپ کا نام نہیں پتا۔ آپ مجھے 'میرا نام [آپ کا نام] ہے' کہہ کر بتا سکتے ہیں۔", # Corrected Hindi/Urdu mix
-                       'es': "Aún no sé tu nombre. Puedes decírmelo diciendo: 'Mi nombre es [tu nombre]'.",
-                       'ur': "مجھے ابھی آپ کا نام نہیں پتا۔ آپ مجھے 'میرا نام [آپ کا نام] ہے' کہہ کر بتا سکتے ہیں۔",
-                       'bn': "আমি এখনও আপনার নাম জানি না। আপনি আমাকে 'আমার নাম [আপনার নাম]' বলে বলতে পারেন।" # Added Bengali
-                  }
-                  speak(responses.get(response_lang, responses['en']), response_lang)
-
-        elif intent == "about_joey":
-             # Add specific checks for questions about attributes and provide more detailed responses
-             spoken_a_specific_response = False
-
-             if re.search(r"hair color|hair colour|baal|pelo|بال|do you not have hair|you don't have hair|kya tumhare baal nahin hain|¿no tienes pelo?|kya aap ke baal nahi hain", user_input, re.IGNORECASE):
-                  responses_hair = {
-                       'en': "As an AI, I don't have a physical body like humans do, so I don't have hair or a hair color. I exist as computer code and data.",
-                       'hi': "ایک AI ہونے کے ناطے، میرا انسانوں جیسا کوئی भौतिक शरीर نہیں ہے، اسی لیے میرے بال یا بالوں کا رنگ نہیں ہے۔ میں کمپیوٹر کوڈ اور ڈیٹا کے طور پر موجود ہوں۔", # Corrected Hindi/Urdu mix
-                       'es': "Como IA, no tengo un cuerpo físico como los humanos, así que no tengo pelo ni color de pelo. Existo como código y datos de computadora.",
-                       'ur': "ایک AI کے طور پر، میرا انسانوں جیسا کوئی جسمانی جسم نہیں ہے، لہذا میرے بال یا بالوں کا رنگ نہیں ہے۔ میں کمپیوٹر کوڈ اور ڈیٹا کے طور پر موجود ہوں۔",
-                       'bn': "একজন এআই হিসেবে، আমার মানুষের মতো শারীরিক শরীর নেই، তাই আমার চুল বা চুলের রঙ নেই। আমি কম্পিউটার কোড এবং ডেটা হিসেবে বিদ্যমান।" # Added Bengali
-                  }
-                  speak(responses_hair.get(response_lang, responses_hair['en']), response_lang)
-                  spoken_a_specific_response = True
-
-             elif re.search(r"age|umar|edad|عمر", user_input, re.IGNORECASE):
-                  responses_age = {
-                       'en': "I don't have a traditional age in the human sense. My development is ongoing, but I was last updated on [Insert Date/Version Info if available].", # You could make this more specific
-                       'hi': "میری انسانوں والی کوئی روایتی عمر نہیں ہے۔ میری ترقی جاری ہے، لیکن مجھے آخری بار [اگر دستیاب ہو تو تاریخ/ورژن کی معلومات ڈالیں] کو اپ ڈیٹ کیا گیا تھا۔", # Corrected Hindi/Urdu mix
-                       'es': "No tengo una edad tradicional en el sentido humano. Mi desarrollo es continuo, but I was last updated on [Insert Date/Version Info if available].", # Corrected Spanish
-                       'ur': "میری انسانی معنوں میں کوئی روایتی عمر نہیں ہے۔ میری ترقی جاری ہے، لیکن مجھے آخری بار [اگر دستیاب ہو تو تاریخ/ورژن کی معلومات داخل کریں] کو اپ ڈیٹ کیا گیا تھا۔",
-                       'bn': "মানুষের অর্থে আমার কোনো প্রচলিত বয়স নেই। আমার উন্নয়ন চলমান، তবে আমাকে শেষবার [যদি উপলব্ধ থাকে তবে তারিখ/সংস্করণ তথ্য ঢোকান] তারিখে আপডেট করা হয়েছিল।" # Added Bengali
-                  }
-                  speak(responses_age.get(response_lang, responses_age['en']), response_lang)
-                  spoken_a_specific_response = True
-
-             elif re.search(r"who made you|who created you", user_input, re.IGNORECASE):
-                  responses_creator = {
-                       'en': "I am a large language model, trained by Google.",
-                       'hi': "میں گوگل کی طرف سے تربیت یافتہ ایک بڑا زبانی ماڈل ہوں", # Corrected Hindi/Urdu mix
-                       'es': "Soy un modelo de lenguaje grande, entrenado por Google.",
-                       'ur': "میں گوگل کے ذریعہ تربیت یافتہ ایک بڑا لسانی ماڈل ہوں۔",
-                       'bn': "আমি গুগল দ্বারা প্রশিক্ষিত একটি বৃহৎ ভাষা মডেল।" # Added Bengali
-                  }
-                  speak(responses_creator.get(response_lang, responses_creator['en']), response_lang)
-                  spoken_a_specific_response = True
-
-             elif re.search(r"what languages can you speak|speak any language|what languages do you know|kaun kaun si bhasha bol sakte ho|qué idiomas puedes hablar|kaun kaun si zaban bol saktay hain|koi bhi zaban bolen", user_input, re.IGNORECASE):
-                  # Generate a list of supported languages from LANGUAGE_CODES
-                  supported_langs_names = [name.title() for name in LANGUAGE_CODES.keys() if len(name) > 2 and name not in ['default', 'normal']] # Use names, filter short codes and modes
-                  random.shuffle(supported_langs_names) # Shuffle to make it sound less robotic
-                  # Format the list nicely (e.g., English, Hindi, Spanish, and many more.)
-                  if len(supported_langs_names) > 7:
-                       lang_list_text = ", ".join(supported_langs_names[:7]) + ", and many more."
-                  else:
-                       lang_list_text = ", ".join(supported_langs_names)
-
-                  responses_languages = {
-                       'en': f"I can communicate in several languages, including {lang_list_text}. My ability to speak depends on the available text-to-speech engines and translation services. You can ask me to switch modes or translate.",
-                       'hi': f"میں کئی زبانوں میں بات چیت کر سکتا ہوں، جن میں شامل ہیں {lang_list_text}۔ میری بولنے کی صلاحیت دستیاب ٹیکسٹ ٹو سپیچ انجنوں اور ترجمہ کی خدمات پر منحصر ہے۔ آپ مجھے موڈ تبدیل کرنے یا ترجمہ کرنے کے لیے کہہ سکتے ہیں۔", # Corrected Hindi/Urdu mix
-                       'es': f"Puedo comunicarme en varios idiomas, incluyendo {lang_list_text}. My ability to speak depends on the available text-to-speech engines and translation services. You can ask me to switch modes or translate.", # Corrected Spanish
-                       'ur': f"میں کئی زبانوں میں بات چیت کر سکتا ہوں، جن میں شامل ہیں {lang_list_text}۔ میری بولنے کی صلاحیت دستیاب ٹیکسٹ ٹو سپیچ انجنوں اور ترجمہ کی خدمات پر منحصر ہے۔ آپ مجھے موڈ تبدیل کرنے یا ترجمہ کرنے کے لیے کہہ سکتے ہیں۔",
-                       'bn': f"আমি বেশ কয়েকটি ভাষায় যোগাযোগ করতে পারি, যার মধ্যে রয়েছে {lang_list_text}। আমার কথা বলার ক্ষমতা উপলব্ধ টেক্সট-টু-স্পীচ ইঞ্জিন এবং অনুবাদ পরিষেবাগুলির উপর নির্ভর করে। আপনি আমাকে মোড পরিবর্তন করতে বা অনুবাদ করতে বলতে পারেন।" # Added Bengali
-                  }
-                  speak(responses_languages.get(response_lang, responses_languages['en']), response_lang)
-                  spoken_a_specific_response = True
-
-             elif re.search(r"are you real|are you alive|do you have feelings|are you a robot|are you human", user_input, re.IGNORECASE):
-                   responses_nature = {
-                        'en': "I am a computer program, an AI. I don't have feelings or a physical body, but I'm here to assist you.",
-                        'hi': "میں ایک کمپیوٹر پروگرام ہوں، ایک AI۔ میرے احساس یا جسمانی جسم نہیں ہے، لیکن میں آپ کی مدد کے لیے یہاں ہوں۔", # Corrected Hindi/Urdu mix
-                        'es': "Soy un programa de computadora, una IA. No tengo sentimientos ni cuerpo físico, but I'm here to assist you.", # Corrected Spanish
-                        'ur': "میں ایک کمپیوٹر پروگرام ہوں، ایک AI۔ میرے احساسات یا جسمانی جسم نہیں ہے، لیکن میں آپ کی مدد کے لیے یہاں ہوں۔",
-                        'bn': "আমি একটি কম্পিউটার প্রোগ্রাম، একটি এআই। আমার অনুভূতি বা শারীরিক শরীর নেই، তবে আমি আপনাকে সাহায্য করার জন্য এখানে আছি।" # Added Bengali
-                   }
-                   speak(responses_nature.get(response_lang, responses_nature['en']), response_lang)
-                   spoken_a_specific_response = True
-
-
-             # If no specific question about attributes is matched, give the general response
-             if not spoken_a_specific_response:
-                  responses_general_about = {
-                     'en': "I am Joey, a voice assistant program designed to help you with various tasks.",
-                     'hi': "میں جॉय ہوں، ایک وائس اسسٹنٹ پروگرام جسے آپ کی مختلف کاموں میں مدد کرنے کے لیے ڈیزائن کیا گیا ہے۔", # Corrected Hindi/Urdu mix
-                     'es': "Soy Joey, un programa de asistente de voz diseñado para ayudarte con diversas tareas.",
-                     'ur': "میں جَوی ہوں، ایک وائس اسسٹنٹ پروگرام جو آپ کو مختلف کاموں میں مدد کرنے کے لئے ڈیزائن کیا گیا ہے۔",
-                     'bn': "আমি জয়ে، একটি ভয়েস অ্যাসისტ্যান্ট প্রোগ্রাম যা আপনাকে বিভিন্ন কাজে সাহায্য করার জন্য ডিজাইন করা হয়েছে।" # Added Bengali
-                 }
-                  speak(responses_general_about.get(response_lang, responses_general_about['en']), response_lang)
-
-
-        elif intent == "ask_location":
-            location = get_location() # Placeholder
-            responses = {
-                'en': f"Based on available information, you appear to be in {location}.",
-                'hi': f"دستیاب جانکاری کے مطابق، آپ {location} میں प्रतीत होते ہیں۔", # Corrected Hindi/Urdu mix
-                'es': f"Según la información disponible, pareces estar en {location}.",
-                'ur': f"دستیاب معلومات کے مطابق، آپ {location} میں نظر آتے ہیں۔",
-                'bn': f"উপलब्ধ তথ্য অনুযায়ী، আপনি {location} এ আছেন বলে মনে হচ্ছে।" # Added Bengali
-            }
-            speak(responses.get(response_lang, responses['en']), response_lang)
-
-        elif intent == "tell_time":
-            now = datetime.now()
-            current_time = now.strftime("%I:%M %p") # e.g., 03:30 PM
-            responses = {
-                'en': f"The current time is {current_time}.",
-                'hi': f"ابھی {current_time} بجے ہیں۔",
-                'es': f"La hora actual es {current_time}.",
-                'ur': f"موجودہ وقت {current_time} ہے۔",
-                'bn': f"এখন সময় {current_time}।" # Added Bengali
-            }
-            speak(responses.get(response_lang, responses['en']), response_lang)
-
-        elif intent == "ask_weather":
-            weather_data = get_weather() # Placeholder
-            if weather_data:
-                 # Provide temperature in both Celsius and Fahrenheit
-                 weather_text_en = f"The weather in {weather_data['location']} is {weather_data['condition']} with a temperature of {weather_data['temp_c']} degrees Celsius or {weather_data['temp_f']} degrees Fahrenheit."
-                 weather_text_hi = f"{weather_data['location']} में मौसम {weather_data['condition']} है और temperature {weather_data['temp_c']} degrees Celsius or {weather_data['temp_f']} degrees Fahrenheit है।" # Corrected Hindi/Urdu mix
-                 weather_text_es = f"El clima en {weather_data['location']} está {weather_data['condition']} con una temperatura de {weather_data['temp_c']} grados Celsius o {weather_data['temp_f']} grados Fahrenheit."
-                 weather_text_ur = f"{weather_data['location']} میں موسم {weather_data['condition']} ہے اور درجہ حرارت {weather_data['temp_c']} ڈگری سیلسیس یا {weather_data['temp_f']} ڈگری فارن ہائیٹ ہے۔"
-                 weather_text_bn = f"{weather_data['location']} এর আবহাওয়া {weather_data['condition']} এবং তাপমাত্রা {weather_data['temp_c']} ডিগ্রি সেলসিয়াস বা {weather_data['temp_f']} ডিগ্রি ফারেনহাইট।" # Added Bengali
-
-                 weather_responses = {
-                      'en': weather_text_en,
-                      'hi': weather_text_hi, # Ensure the Hindi response is purely Hindi
-                      'es': weather_text_es,
-                      'ur': weather_text_ur,
-                      'bn': weather_text_bn
-                 }
-                 # Use get_language_code for robust lookup
-                 speak(weather_responses.get(get_language_code(response_lang), weather_responses['en']), response_lang) # Fallback handling
-
-            else:
-                 responses = {
-                      'en': "Sorry, I couldn't get the weather information at the moment.",
-                      'hi': "माफ़ करना, मुझे अभी मौसम کی جانکاری نہیں مل پائی۔", # Corrected Hindi/Urdu mix
-                      'es': "Lo siento, no pude obtener la información del clima en este momento.",
-                      'ur': "معاف کرنا، مجھے فی الحال मौसम کی معلومات نہیں مل سکی۔", # Corrected Hindi/Urdu mix
-                      'bn': "দুঃখিত، আমি এই মুহূর্তে আবহাওয়ার তথ্য পেতে পারিনি।" # Added Bengali
-                 }
-                 speak(responses.get(response_lang, responses['en']), response_lang)
-
-
-        elif intent == "translate":
-             # This branch is for the *general* translate intent matched by TF-IDF ("translate this", "translate now")
-             # The specific regex for "translate X to Y" is handled earlier.
-             responses = {
-                  'en': "What would you like me to translate and to which language?",
-                  'hi': "आप क्या ترجمہ کرنا چاہیں گے اور کس زبان میں؟", # Corrected Hindi/Urdu mix
-                  'es': "¿Qué te gustaría que tradujera y a qué idioma?",
-                  'ur': "آپ کیا ترجمہ کرنا چاہیں گے اور کس زبان میں؟",
-                  'bn': "আপনি কি অনুবাদ করতে চান এবং কোন ভাষায়?" # Added Bengali
-             }
-             speak(responses.get(response_lang, responses['en']), response_lang)
-
-
-      
-
-
-        elif intent == "unknown":
-            # Handle unknown intent
-            responses = {
-                'en': "Sorry, I didn't understand that. Could you please rephrase?",
-                'hi': "माफ़ करना, मुझे यह समझ نہیں آیا۔ کیا آپ کر پیا اسے دوبارہ کہہ سکتے ہیں؟", # Corrected Hindi/Urdu mix
-                'es': "Lo siento, no entendí eso. ¿Podrías decirlo de otra manera?",
-                'ur': "معاف کرنا، مجھے یہ سمجھ نہیں آیا۔ کیا آپ براہ کرم اسے دوبارہ کہہ سکتے ہیں؟",
-                'bn': "দুঃখিত، আমি এটা বুঝতে পারিনি। আপনি কি দয়া করে অন্যভাবে বলতে পারেন?" # Added Bengali
-            }
-            speak(responses.get(response_lang, responses['en']), response_lang)
-
         # Optional: Add a small delay to prevent rapid loops if listen returns empty quickly
         time.sleep(0.1)
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["build-phrases"]:
+        # Offline build stage: translate the intent catalogue into every language (cached)
+        phrase_index.build(intent_phrases, set(LANGUAGE_CODES.values()))
+        sys.exit(0)
+    if sys.argv[1:2] == ["memory-report"]:
+        intent_index.get()
+        print(memory_report_text())
+        sys.exit(0)
+    profiling.install() # SIGUSR2 / control socket toggle the sampling profiler
     try:
         main()
     except KeyboardInterrupt:
         print("\nExiting Joey.")
     finally:
+        sensor_hub.stop()
+        resource_governor.stop()
+        safety_monitor.stop()
+        handlers.shutdown()
+        translator.close()
+        if intent_shadow:
+            intent_shadow.close()
+            print(f"[Shadow] {intent_shadow.summary()}")
+        if audio_pipeline:
+            audio_pipeline.stop() # Its recognizer saves the speaker profiles it learned
+        else:
+            endpointer.save_profiles() # Keep the learned per-speaker pause lengths
+        external_data.client.close()
         # Ensure mixer is fully quit on exit
-        if pygame.mixer.get_init():
+        if mixer.ready and mixer.result and pygame.mixer.get_init():
              pygame.mixer.quit()
              print("[INFO] Pygame mixer quit.")
-        print("Joey has shut down.")
\ No newline at end of file
+        print("Joey has shut down.")
\ No newline at end of file
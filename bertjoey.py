@@ -1,11 +1,16 @@
 import speech_recognition as sr
 import pyttsx3
-import time
+import os
 import random
 import re
+import threading
 import joblib
 from datetime import datetime
-import requests  # For location fetching
+import endpointing  # Adaptive end-of-utterance detection
+import external_data  # Pooled, cached location fetching
+import monitoring  # Timer-wheel safety monitor (speeding, red light, heart rate)
+import sensors  # Streaming vehicle sensor sources (CAN/serial stand-in, trip logs)
+from dispatch import Dialogue, AwaitingReply, TurnContext, NOT_HANDLED, YES_NO  # Non-blocking follow-up questions
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
@@ -33,16 +38,20 @@ jokes = [
 engine = pyttsx3.init()
 engine.setProperty('rate', 180)
 recognizer = sr.Recognizer()
+endpointer = endpointing.Endpointer(complete_phrases=[p for phrases in intents.values() for p in phrases])
 
 # === Loading the Finetuned Model and Vectorizer ===
 model = joblib.load("C:/Users/ANIRUDH/OneDrive/Desktop/voicebot2/finetuned_model.joblib")
 vectorizer = joblib.load("C:/Users/ANIRUDH/OneDrive/Desktop/voicebot2/finetuned_vectorizer.joblib")
 
 # === Speak Function ===
+speech_lock = threading.Lock()  # Safety alerts speak from the monitor's thread
+
 def speak(text):
-    print(f"Joey: {text}")
-    engine.say(text)
-    engine.runAndWait()
+    with speech_lock:
+        print(f"Joey: {text}")
+        engine.say(text)
+        engine.runAndWait()
 
 # === Match Intent with the Loaded Model ===
 def match_intent(user_input):
@@ -62,35 +71,27 @@ def extract_name(user_input):
 
 # === Location Function ===
 def get_location():
-    try:
-        response = requests.get("https://ipinfo.io/json")
-        data = response.json()
-        city = data.get("city", "Unknown City")
-        region = data.get("region", "Unknown Region")
-        country = data.get("country", "Unknown Country")
-        return f"{city}, {region}, {country}"
-    except:
-        return "Sorry, I couldn’t get your location."
+    # Strict timeouts + TTL cache, so a bad network can't stall the turn loop
+    location = external_data.get_location()
+    if location:
+        return location
+    return "Sorry, I couldn’t get your location."
 
 # === Time Function ===
 def tell_time():
     current_time = datetime.now().strftime("%H:%M:%S")
     return f"The current time is {current_time}"
 
-# === Simulated Speed + Signal ===
-def get_current_speed():
-    return random.randint(30, 80)
-
-def get_traffic_signal_status():
-    return random.choices(['green', 'red'], weights=[4, 1])[0]
-
 # === Listen Function ===
 def listen():
-    with sr.Microphone() as source:
+    with sr.Microphone(sample_rate=16000, chunk_size=480) as source:
         print("Calibrating microphone for ambient noise...")
         recognizer.adjust_for_ambient_noise(source, duration=1)
         print("Listening...")
-        audio = recognizer.listen(source, phrase_time_limit=6)
+        raw = endpointing.capture_utterance(source, endpointer)
+        if raw is None:
+            return ""
+        audio = sr.AudioData(raw, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
         print("Processing...")
         try:
             text = recognizer.recognize_google(audio)
@@ -106,49 +107,67 @@ def handle_emergency():
     speak("Emergency situation detected. Calling emergency services now. Hold tight.")
     print(">>> Dialing 112...")
 
-# === Speed Warning ===
-def detect_speeding(speed_limit=60):
-    current_speed = get_current_speed()
-    print(f"Current Speed: {current_speed} mph")
-    if current_speed > speed_limit:
-        speak("Warning! You are speeding. Please slow down!")
-        return True
-    return False
+# === Safety Monitor (speeding / red light / heart rate, off the dialogue loop) ===
+SAFETY_ALERTS = {
+    "speeding_warning": "Warning! You are speeding. Please slow down!",
+    "red_light_warning": "You jumped the red light! Please stop immediately!",
+    "heart_rate_warning": "Your heart rate is very high. Please pull over safely and take a break.",
+}
+
+def announce_safety_alert(rule, value):
+    if not sensor_hub.live: # Simulated / replayed readings never reach the driver
+        print(f"[Safety] {rule.name} ({value:.1f}) from a simulated source, not spoken.")
+        return
+    speak(SAFETY_ALERTS[rule.message])
 
-# === Red Light Check (less frequent) ===
-def detect_red_light_violation(last_warning_time):
-    signal_status = get_traffic_signal_status()
-    current_time = time.time()
-    if signal_status == 'red' and (current_time - last_warning_time > 15):
-        speak("You jumped the red light! Please stop immediately!")
-        return current_time
-    return last_warning_time
+safety_monitor = monitoring.SafetyMonitor(monitoring.DEFAULT_RULES, alert=announce_safety_alert)
+sensor_hub = sensors.SensorHub(safety_monitor.ring, clock=safety_monitor.wheel.clock)
 
-# === Simulate Heartbeat ===
-def simulate_heartbeat():
-    return random.randint(60, 100)
+# === Heart Rate (from the sensor hub) ===
+def get_heart_rate():
+    return sensor_hub.latest("heart_rate") if sensor_hub.live else None # Never read out a simulated pulse
 
 # === Distress Handler ===
+# Follow-ups go through the dialogue state: the answer arrives as the next utterance of the main
+# loop, so no second microphone session is opened and nothing else stops while Joey waits.
+dialogue = Dialogue(lambda text, lang: speak(text))
+ARE_YOU_OK = {"fine": YES_NO["yes"] + ["fine", "i'm fine", "i am fine", "alright", "all good", "i'm okay"], "no": YES_NO["no"]}
+
 def handle_distress_signal(user_input, score):
+    """Starts the emergency flow for a confident call for help; returns True if it did."""
     distress_signals = ["help", "emergency", "urgent", "distress"]
     if any(signal in user_input for signal in distress_signals) and score > 0.75:
         speak("It sounds like you're in distress. I will immediately take action.")
         handle_emergency()
-        heartbeat = simulate_heartbeat()
-        speak(f"Your current heartbeat is {heartbeat} bpm.")
-        speak("Anni, are you alright?")
-        user_response = listen()
-        if "no" in user_response:
-            speak("Calm down, Anni. Do you want me to call someone for you?")
-            if "yes" in listen():
-                handle_emergency()
-        else:
-            speak("Good to hear you're fine. Let me know if you need anything.")
+        heartbeat = get_heart_rate()
+        if heartbeat is not None:
+            speak(f"Your current heartbeat is {round(heartbeat)} bpm.")
+        dialogue.deliver(AwaitingReply("are you alright", distress_follow_up, expect=ARE_YOU_OK,
+                                       on_timeout=lambda: ("I didn't hear you, Anni. Help is on the way, please stay where you are.", "en"),
+                                       replies=("Anni, are you alright?", "en")))
+        return True
+    return False
+
+def distress_follow_up(ctx, tag):
+    if tag == "no":
+        return AwaitingReply("call someone", call_someone, expect=YES_NO,
+                             replies=("Calm down, Anni. Do you want me to call someone for you?", "en"))
+    if tag == "fine":
+        return ("Good to hear you're fine. Let me know if you need anything.", "en")
+    return NOT_HANDLED  # Not an answer (maybe another call for help): handle it as a normal turn
+
+def call_someone(ctx, tag):
+    if tag == "yes":
+        handle_emergency()
+    return None
 
 # === Main Assistant Loop ===
 def main():
     speak("Joey is ready.")
-    last_red_light_warning_time = 0
+    safety_monitor.start()
+    source = sensors.open_source(os.environ.get("JOEY_SENSORS", "none"))
+    if source:
+        sensor_hub.attach(source)
 
     while True:
         user_input = listen()
@@ -158,12 +177,13 @@ def main():
         intent, score = match_intent(user_input)
         print(f"Matched Intent: {intent} (score: {round(score, 2)})")
 
-        # Handling distress signal (combined from old code)
-        handle_distress_signal(user_input, score)
-        
-        # Other functions for speeding, red light, etc.
-        detect_speeding()
-        last_red_light_warning_time = detect_red_light_violation(last_red_light_warning_time)
+        # Distress first: a call for help while a follow-up question is pending is not its answer
+        if handle_distress_signal(user_input, score):
+            continue
+
+        # An answer to a pending follow-up question goes there next
+        if dialogue.resume(TurnContext(user_input)):
+            continue
 
         # Intent responses
         if intent == "greet":
@@ -188,6 +208,8 @@ def main():
             speak(tell_time())
         elif intent == "stop or exit":
             speak("Turning off now. Thank you for opting okDriver. Stay safe. Goodbye!")
+            sensor_hub.stop()
+            safety_monitor.stop()
             break
         else:
             speak("Hmm, I’m still learning. Can you say that another way?")
@@ -0,0 +1,335 @@
+# === Intent Dispatch ===
+# Maps intent tags (and a few high-priority regex routes) to handler objects.
+# Each handler declares how it runs and gets a latency budget:
+#   'sync'  - cheap, runs inline on the main loop (budget is advisory, overruns are logged)
+#   'io'    - blocking network/disk work, runs on a small thread pool
+#   'async' - coroutine function, runs on a background asyncio loop
+#   'cpu'   - CPU-bound, runs in a worker process (handler and context must be picklable)
+# If an 'io'/'async'/'cpu' handler misses its budget, the fallback response is spoken instead
+# and its late result is discarded, so one slow integration never freezes the assistant. A thread
+# can't be cancelled, so an 'io' call still running at its deadline is left to its pool and new
+# calls go to a fresh one: a few hung calls can't take every worker. At most `max_stuck_io` such
+# calls are abandoned; past that (a backend hung for good) IO handlers get their fallback at once
+# instead of starting yet another thread.
+#
+# Handlers never speak directly. They return replies for the dispatcher to speak:
+#   None, a (text, lang) tuple, a list of (text, lang) tuples, or NOT_HANDLED to fall through.
+# A handler that needs an answer returns an AwaitingReply (on its own or last in the list): its
+# question is spoken, and the next utterance from the normal turn pipeline is routed to it first.
+# Nothing waits on the microphone in between, so follow-ups never block the loop.
+
+import asyncio
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+import eventlog
+
+SYNC, IO, ASYNC, CPU = "sync", "io", "async", "cpu"
+NOT_HANDLED = object() # Returned by a handler to let dispatch fall through (e.g. to TF-IDF matching)
+
+dispatch_log = eventlog.get("dispatch")
+dialogue_log = eventlog.get("dialogue")
+
+# Expected-reply phrases for yes/no questions (English, Hindi/Hinglish, Spanish, Urdu, Bengali)
+YES_NO = {
+    "yes": ["yes", "yeah", "yep", "sure", "okay", "ok", "please do", "haan", "ha", "ji haan", "हाँ", "हां", "जी हाँ",
+            "sí", "si", "claro", "ہاں", "جی ہاں", "হ্যাঁ", "হ্যা"],
+    "no": ["no", "nope", "not really", "i am not", "i'm not", "nahi", "nahin", "नहीं", "ना", "نہیں", "না", "নাহ"],
+}
+
+
+class TurnContext:
+    """Everything a handler needs to know about the current turn."""
+    __slots__ = ("user_input", "response_lang", "detected_lang", "groups", "entities", "exit_requested")
+
+    def __init__(self, user_input, response_lang='en', detected_lang='en', groups=(), entities=None):
+        self.user_input = user_input
+        self.response_lang = response_lang
+        self.detected_lang = detected_lang
+        self.groups = groups # Regex groups for pattern routes, () for intent handlers
+        self.entities = entities # entities.Entities extracted once for the turn
+        self.exit_requested = False
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class AwaitingReply:
+    """
+    A pending question. `replies` (the question) are spoken; the next utterance goes to
+    on_reply(ctx, tag), where tag is the `expect` key whose phrase it contains (None if none did).
+    on_reply returns replies as usual, another AwaitingReply for multi-step flows, or NOT_HANDLED to
+    release the utterance to the normal pipeline. After `timeout` seconds without an answer,
+    on_timeout() (if given) is called and its replies are spoken.
+    """
+    __slots__ = ("name", "on_reply", "expect", "timeout", "on_timeout", "replies")
+
+    def __init__(self, name, on_reply, expect=None, timeout=20.0, on_timeout=None, replies=None):
+        self.name = name
+        self.on_reply = on_reply
+        self.expect = expect or {}
+        self.timeout = timeout
+        self.on_timeout = on_timeout
+        self.replies = replies
+
+    def classify(self, text):
+        """The expected tag whose phrase appears earliest in the text (whole words), or None."""
+        tokens = [t.strip(".,!?;:'\"।؟،") for t in text.lower().split()]
+        best = (len(tokens), None)
+        for tag, phrases in self.expect.items():
+            for phrase in phrases:
+                words = phrase.lower().split()
+                for i in range(len(tokens) - len(words) + 1):
+                    if i < best[0] and tokens[i:i + len(words)] == words:
+                        best = (i, tag)
+                        break
+        return best[1]
+
+
+class Dialogue:
+    """
+    Dialogue state: at most one pending AwaitingReply. deliver(result) speaks replies and arms any
+    AwaitingReply in them; resume(ctx) routes the next utterance to it. Timeouts run on a timer thread.
+    """
+
+    def __init__(self, speak):
+        self.speak = speak
+        self.pending = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def deliver(self, result):
+        if result is None or result is NOT_HANDLED:
+            return
+        if isinstance(result, (tuple, AwaitingReply)):
+            result = [result]
+        for item in result:
+            if isinstance(item, AwaitingReply):
+                self.deliver(item.replies)
+                self._arm(item)
+            else:
+                self.speak(*item)
+
+    def _arm(self, awaiting):
+        with self._lock:
+            self._cancel_timer()
+            self.pending = awaiting
+            if awaiting.timeout:
+                self._timer = threading.Timer(awaiting.timeout, self._expire, args=(awaiting,))
+                self._timer.daemon = True
+                self._timer.start()
+        dialogue_log.info("awaiting", name=awaiting.name, timeout=awaiting.timeout)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _take(self, awaiting=None):
+        """Clears the pending state (only if it is still `awaiting`, when given) and returns it."""
+        with self._lock:
+            pending = self.pending
+            if pending is None or (awaiting is not None and pending is not awaiting):
+                return None
+            self.pending = None
+            self._cancel_timer()
+            return pending
+
+    def _expire(self, awaiting):
+        if self._take(awaiting) is None:
+            return # Answered in the meantime
+        dialogue_log.info("no_reply", name=awaiting.name)
+        if awaiting.on_timeout:
+            try:
+                self.deliver(awaiting.on_timeout())
+            except Exception as e:
+                dialogue_log.error("timeout_failed", name=awaiting.name, error=str(e))
+
+    def resume(self, ctx):
+        """Routes the utterance to the pending question, if any. Returns True if it was consumed."""
+        awaiting = self._take()
+        if awaiting is None:
+            return False
+        tag = awaiting.classify(ctx.user_input)
+        dialogue_log.info("reply", name=awaiting.name, tag=tag)
+        try:
+            result = awaiting.on_reply(ctx, tag)
+        except Exception as e:
+            dialogue_log.error("reply_failed", name=awaiting.name, error=str(e))
+            return False
+        if result is NOT_HANDLED:
+            return False # Not an answer; the turn goes through the normal pipeline
+        self.deliver(result)
+        return True
+
+    def cancel(self):
+        self._take()
+
+
+class IntentHandler:
+    """A registered handler: the function plus how it runs and its latency budget."""
+    __slots__ = ("tag", "fn", "kind", "timeout", "fallback")
+
+    def __init__(self, tag, fn, kind=SYNC, timeout=0.5, fallback="handler_timeout"):
+        if kind not in (SYNC, IO, ASYNC, CPU):
+            raise ValueError(f"Unknown handler kind '{kind}' for {tag}")
+        self.tag = tag
+        self.fn = fn
+        self.kind = kind
+        self.timeout = timeout
+        self.fallback = fallback
+
+
+class HandlerRegistry:
+    """
+    Registry + dispatcher. `speak(text, lang)` plays replies, `render(key, lang)` returns the
+    (text, lang) fallback reply for a response table key.
+    """
+
+    def __init__(self, speak, render, io_workers=4, cpu_workers=1, max_stuck_io=4):
+        self.speak = speak
+        self.render = render
+        self.handlers = {} # intent tag -> IntentHandler (one dict lookup per turn)
+        self.routes = [] # ordered (compiled pattern, IntentHandler) checked before intent matching
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self.max_stuck_io = max_stuck_io
+        self.stuck_io = 0 # Timed-out IO calls still running on an abandoned worker
+        self._io_pool = None
+        self._cpu_pool = None
+        self._loop = None
+        self._lock = threading.Lock()
+        self.dialogue = Dialogue(speak) # Follow-up questions asked by handlers
+
+    # --- Registration ---
+    def register(self, tag, kind=SYNC, timeout=0.5, fallback="handler_timeout"):
+        """Decorator registering `fn(ctx)` as the handler for an intent tag."""
+        def decorator(fn):
+            self.handlers[tag] = IntentHandler(tag, fn, kind, timeout, fallback)
+            return fn
+        return decorator
+
+    def route(self, pattern, kind=SYNC, timeout=0.5, fallback="handler_timeout", flags=re.IGNORECASE):
+        """Decorator registering a regex route; routes are tried in registration order."""
+        compiled = re.compile(pattern, flags)
+        def decorator(fn):
+            self.routes.append((compiled, IntentHandler(fn.__name__, fn, kind, timeout, fallback)))
+            return fn
+        return decorator
+
+    # --- Dispatch ---
+    def dispatch_routes(self, ctx):
+        """Tries the regex routes in order. Returns True if one of them handled the turn."""
+        for pattern, handler in self.routes:
+            match = pattern.search(ctx.user_input)
+            if match:
+                ctx.groups = match.groups()
+                if self._run(handler, ctx):
+                    return True
+                ctx.groups = ()
+        return False
+
+    def dispatch(self, tag, ctx):
+        """Runs the handler for an intent tag. Returns False if no handler is registered."""
+        handler = self.handlers.get(tag)
+        if handler is None:
+            return False
+        return self._run(handler, ctx)
+
+    def _run(self, handler, ctx):
+        start = time.perf_counter()
+        try:
+            if handler.kind == SYNC:
+                result = handler.fn(ctx)
+                elapsed = time.perf_counter() - start
+                if elapsed > handler.timeout:
+                    dispatch_log.warning("over_budget", handler=handler.tag, seconds=round(elapsed, 3), budget=handler.timeout)
+            elif handler.kind == IO and self.stuck_io >= self.max_stuck_io:
+                dispatch_log.warning("io_saturated", handler=handler.tag, stuck=self.stuck_io)
+                result = self.render(handler.fallback, ctx.response_lang)
+            else:
+                future = self._submit(handler, ctx)
+                try:
+                    result = future.result(timeout=handler.timeout)
+                except FutureTimeout:
+                    stuck = not future.cancel() and handler.kind == IO # Already running on a worker
+                    if stuck:
+                        with self._lock:
+                            self.stuck_io += 1
+                        future.add_done_callback(self._unstick)
+                        self._replace_io_pool()
+                    future.add_done_callback(lambda f, tag=handler.tag: dispatch_log.info("late_result_discarded", handler=tag))
+                    dispatch_log.warning("timeout", handler=handler.tag, budget=handler.timeout, pool_replaced=stuck,
+                                         stuck=self.stuck_io)
+                    result = self.render(handler.fallback, ctx.response_lang)
+                if handler.kind == CPU and isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], TurnContext):
+                    # CPU handlers run on a copy of ctx; carry back the exit flag
+                    result, remote_ctx = result
+                    ctx.exit_requested = remote_ctx.exit_requested
+        except Exception as e:
+            dispatch_log.error("handler_failed", handler=handler.tag, error=str(e))
+            result = self.render(handler.fallback, ctx.response_lang)
+
+        if result is NOT_HANDLED:
+            return False
+        self.dialogue.deliver(result)
+        return True
+
+    def _submit(self, handler, ctx):
+        if handler.kind == IO:
+            return self._get_io_pool().submit(handler.fn, ctx)
+        if handler.kind == ASYNC:
+            return asyncio.run_coroutine_threadsafe(handler.fn(ctx), self._get_loop())
+        return self._get_cpu_pool().submit(_run_cpu_handler, handler.fn, ctx)
+
+    # --- Executors (created on first use) ---
+    def _get_io_pool(self):
+        with self._lock:
+            if self._io_pool is None:
+                self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="joey-io")
+            return self._io_pool
+
+    def _unstick(self, future):
+        with self._lock:
+            self.stuck_io -= 1
+
+    def _replace_io_pool(self):
+        """New IO calls go to a fresh pool; the old one runs its stuck call (and queue) out on its own threads."""
+        with self._lock:
+            pool, self._io_pool = self._io_pool, None
+        if pool:
+            pool.shutdown(wait=False)
+
+    def _get_cpu_pool(self):
+        with self._lock:
+            if self._cpu_pool is None:
+                self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+            return self._cpu_pool
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="joey-async", daemon=True).start()
+            return self._loop
+
+    def shutdown(self):
+        """Stops worker pools and the async loop without waiting on stuck handlers."""
+        self.dialogue.cancel()
+        if self._io_pool:
+            self._io_pool.shutdown(wait=False, cancel_futures=True)
+        if self._cpu_pool:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def _run_cpu_handler(fn, ctx):
+    """Process-pool entry point: returns the replies along with the (possibly updated) context."""
+    return fn(ctx), ctx
@@ -0,0 +1,193 @@
+# === Adaptive Endpointing ===
+# Decides when the driver has finished speaking, instead of a fixed timeout / phrase_time_limit.
+# Works on the raw microphone frames:
+#   - an energy VAD with an adaptive noise floor marks each frame as speech or not,
+#   - the trailing pause needed to end an utterance adapts per speaker: it is learned from the
+#     pauses that speaker makes *inside* utterances (so slow talkers aren't cut off),
+#   - short single-burst commands ("stop", "joke please") end after a shorter pause,
+#   - if a partial transcript is available and already forms a complete command from the intents
+#     catalogue, the utterance ends after the minimum pause.
+# No-speech and maximum-length limits stay as safety caps only.
+
+import json
+import os
+import re
+import time
+from collections import deque
+
+import numpy as np
+
+import eventlog
+
+endpoint_log = eventlog.get("endpoint")
+WAITING, SPEAKING, DONE, TIMEOUT = "waiting", "speaking", "done", "timeout"
+PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "endpointing_profiles.json")
+
+
+def normalize_phrase(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+class SpeakerProfile:
+    """Pause statistics for one speaker; the end-of-utterance pause is derived from them."""
+
+    def __init__(self, pauses=(), max_history=50):
+        self.pauses = deque(pauses, maxlen=max_history) # Mid-utterance pauses (seconds) this speaker made
+
+    def end_pause(self, default=0.7, min_pause=0.3, max_pause=1.4):
+        if len(self.pauses) < 5:
+            return default
+        # A bit longer than this speaker's usual long mid-sentence pause
+        return float(min(max_pause, max(min_pause, 1.25 * np.percentile(self.pauses, 90))))
+
+
+class Endpointer:
+    """
+    Streaming end-of-utterance detector. Call start() per utterance, then push() each frame;
+    push() returns WAITING (no speech yet), SPEAKING, DONE or TIMEOUT (no speech at all).
+    """
+
+    def __init__(self, complete_phrases=(), sample_rate=16000, sample_width=2, min_pause=0.2, short_command=0.8,
+                 no_speech_timeout=5.0, max_utterance=20.0, energy_margin_db=9.0, profile_path=PROFILE_PATH):
+        self.complete_phrases = {" ".join(normalize_phrase(p)) for p in complete_phrases}
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.min_pause = min_pause
+        self.short_command = short_command # Speech shorter than this (one burst) counts as a short command
+        self.no_speech_timeout = no_speech_timeout
+        self.max_utterance = max_utterance
+        self.energy_margin = energy_margin_db
+        self.profile_path = profile_path
+        self.profiles = self._load_profiles()
+        self.speaker = "default"
+        self.noise_floor_db = None
+        self.last_decision = {}
+        self.start()
+
+    # --- Speaker profiles ---
+    def _load_profiles(self):
+        profiles = {}
+        if self.profile_path and os.path.exists(self.profile_path):
+            try:
+                with open(self.profile_path, encoding="utf-8") as f:
+                    profiles = {name: SpeakerProfile(pauses) for name, pauses in json.load(f).items()}
+            except Exception as e:
+                endpoint_log.error("profiles_load_failed", error=str(e))
+        return profiles
+
+    def save_profiles(self):
+        if not self.profile_path:
+            return
+        try:
+            with open(self.profile_path, "w", encoding="utf-8") as f:
+                json.dump({name: list(p.pauses) for name, p in self.profiles.items()}, f)
+        except Exception as e:
+            endpoint_log.error("profiles_save_failed", error=str(e))
+
+    def set_speaker(self, name):
+        self.speaker = name or "default"
+
+    @property
+    def profile(self):
+        return self.profiles.setdefault(self.speaker, SpeakerProfile())
+
+    # --- Per-utterance state ---
+    def start(self):
+        self.elapsed = 0.0
+        self.speech_time = 0.0
+        self.silence_run = 0.0
+        self.voiced_run = 0
+        self.segments = 0
+        self.pauses = [] # Pauses inside this utterance that were followed by more speech
+        self.in_speech = False
+        self.partial_complete = False
+
+    def frame_db(self, frame_bytes):
+        samples = np.frombuffer(frame_bytes, dtype=np.int16).astype(np.float32)
+        rms = np.sqrt(np.mean(samples * samples)) if len(samples) else 0.0
+        return 20.0 * np.log10(rms + 1e-3)
+
+    def required_pause(self):
+        """Trailing silence needed to end the utterance right now, and why."""
+        if self.partial_complete:
+            return self.min_pause, "complete command"
+        pause = self.profile.end_pause()
+        if self.segments == 1 and self.speech_time < self.short_command:
+            return max(self.min_pause, 0.6 * pause), "short command"
+        return pause, "speaker pause"
+
+    def update_partial(self, partial_text):
+        """Feeds a partial transcript (if a streaming recognizer provides one)."""
+        self.partial_complete = " ".join(normalize_phrase(partial_text or "")) in self.complete_phrases
+
+    def push(self, frame_bytes, partial_text=None):
+        duration = len(frame_bytes) / (self.sample_width * self.sample_rate)
+        self.elapsed += duration
+        if partial_text is not None:
+            self.update_partial(partial_text)
+
+        db = self.frame_db(frame_bytes)
+        if self.noise_floor_db is None or db < self.noise_floor_db:
+            self.noise_floor_db = db # Drop immediately
+        elif not self.in_speech:
+            self.noise_floor_db += 0.05 * (db - self.noise_floor_db) # Track slowly rising road noise
+        voiced = db > self.noise_floor_db + self.energy_margin
+
+        if voiced:
+            self.voiced_run += 1
+            if self.voiced_run >= 2 or self.in_speech: # Two voiced frames in a row start speech (ignores clicks)
+                if not self.in_speech:
+                    self.segments += 1
+                    if self.segments > 1 and self.silence_run > 0:
+                        self.pauses.append(self.silence_run)
+                self.in_speech = True
+                self.speech_time += duration
+                self.silence_run = 0.0
+        else:
+            self.voiced_run = 0
+            if self.segments:
+                self.in_speech = False
+                self.silence_run += duration
+
+        if not self.segments:
+            return TIMEOUT if self.elapsed >= self.no_speech_timeout else WAITING
+        pause, reason = self.required_pause()
+        if self.silence_run >= pause or self.elapsed >= self.max_utterance:
+            self._finish(reason if self.silence_run >= pause else "max length", pause)
+            return DONE
+        return SPEAKING
+
+    def _finish(self, reason, pause):
+        self.profile.pauses.extend(self.pauses)
+        self.last_decision = {"reason": reason, "pause": round(pause, 2), "speech": round(self.speech_time, 2),
+                              "segments": self.segments, "speaker": self.speaker}
+
+
+def capture_utterance(source, endpointer, partial_transcriber=None, lead_in=0.3):
+    """
+    Reads frames from an open speech_recognition source until the endpointer decides the utterance
+    is over. Returns the raw audio bytes (with a short lead-in before speech onset), or None if
+    nobody spoke. `partial_transcriber(audio_bytes)`, if given, returns partial text for the cues.
+    """
+    endpointer.start()
+    chunk_seconds = source.CHUNK / source.SAMPLE_RATE
+    lead = deque(maxlen=max(1, int(lead_in / chunk_seconds)))
+    frames = []
+    started = time.perf_counter()
+    while True:
+        chunk = source.stream.read(source.CHUNK)
+        partial = partial_transcriber(b"".join(frames)) if partial_transcriber and frames else None
+        state = endpointer.push(chunk, partial)
+        if state == WAITING:
+            lead.append(chunk)
+            continue
+        if state == TIMEOUT:
+            return None
+        if not frames:
+            frames.extend(lead)
+        frames.append(chunk)
+        if state == DONE:
+            decision = endpointer.last_decision
+            endpoint_log.info("endpoint", reason=decision['reason'], speech=decision['speech'], pause=decision['pause'],
+                              seconds=round(time.perf_counter() - started, 1))
+            return b"".join(frames)
@@ -0,0 +1,190 @@
+# === Entity Extraction (names, languages, payloads) ===
+# One left-to-right pass over the tokens of an utterance. Language names, stop words and the
+# trigger phrases ("my name is", "say hello to", "translate") live in one precompiled token trie,
+# so each position does a bounded longest-match lookup: extraction is linear in the input length
+# no matter how many languages or stop words are added. The result is a list of typed spans that
+# every handler shares for the turn (ctx.entities), instead of each one re-scanning with a regex.
+
+import re
+from collections import namedtuple
+
+PERSON, LANGUAGE, QUOTED, PAYLOAD = "person", "language", "quoted", "payload"
+NAME_TRIGGER, GREET_TRIGGER, TRANSLATE_TRIGGER, STOP_WORD = "name", "greet", "translate", "stop"
+
+# `value` is the typed value: a title-cased name, a language code (None if the language is unknown), or text
+Span = namedtuple("Span", "type value text start end target")
+
+TRIGGERS = {
+    NAME_TRIGGER: ["my name is", "i am", "i'm", "call me", "you can call me"],
+    GREET_TRIGGER: ["say hello to", "say hi to", "greet", "give my regards to", "tell"],
+    TRANSLATE_TRIGGER: ["translate", "say", "how do you say", "tell me to say"],
+}
+TARGET_PREPOSITIONS = {"in", "to", "into"} # "... in hindi", "... to spanish"
+# Words that end (or can never be part of) a person name
+STOP_WORDS = {
+    "and", "so", "but", "because", "which", "what", "what's", "how", "when", "where", "why", "is", "am", "are", "was",
+    "were", "have", "has", "had", "do", "did", "don't", "can", "can't", "will", "won't", "would", "should", "could",
+    "if", "then", "than", "or", "nor", "for", "at", "in", "on", "of", "to", "from", "by", "with", "about", "as",
+    "into", "like", "off", "out", "over", "past", "since", "through", "under", "up", "your", "my", "his", "her",
+    "their", "our", "me", "him", "us", "them", "you", "i", "a", "the", "it", "this", "that", "joey", "someone",
+    "somebody", "boss", "name", "good", "please", "now",
+}
+MAX_NAME_WORDS = 4 # Names are typically 1 to 4 words ("Mary Ann")
+
+TOKEN_PATTERN = re.compile(
+    r"(?P<quoted>\"[^\"]*\"|“[^”]*”|'[^'\s][^']*')" # Quoted payload
+    r"|(?P<punct>[.,!?;:()\[\]{}।؟،])" # Sentence punctuation (incl. Devanagari/Arabic)
+    r"|(?P<word>[^\s.,!?;:()\[\]{}\"“”।؟،]+)" # Any other run of letters, in any script
+)
+_END = object() # Trie terminal marker
+
+
+class EntityTrie:
+    """Token-level trie: a phrase maps to (kind, value). Lookups return the longest match."""
+
+    def __init__(self):
+        self.root = {}
+        self.depth = 0
+
+    def add(self, phrase, kind, value=None):
+        tokens = phrase.lower().split()
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(_END, (kind, value)) # First definition wins
+        self.depth = max(self.depth, len(tokens))
+
+    def longest(self, words, i):
+        """Longest entry starting at words[i]: ((kind, value), n_words) or (None, 0)."""
+        node, best, n = self.root, (None, 0), 0
+        while i + n < len(words) and n < self.depth:
+            node = node.get(words[i + n])
+            if node is None:
+                break
+            n += 1
+            if _END in node:
+                best = (node[_END], n)
+        return best
+
+
+class Entities:
+    """The typed spans found in one utterance, plus the trigger phrase that started it."""
+    __slots__ = ("spans", "trigger")
+
+    def __init__(self, spans=(), trigger=None):
+        self.spans = list(spans)
+        self.trigger = trigger # NAME_TRIGGER / GREET_TRIGGER / TRANSLATE_TRIGGER or None
+
+    def all(self, span_type):
+        return [s for s in self.spans if s.type == span_type]
+
+    def first(self, span_type, target=None):
+        for s in self.spans:
+            if s.type == span_type and (target is None or s.target == target):
+                return s
+        return None
+
+    @property
+    def person(self):
+        span = self.first(PERSON)
+        return span.value if span else None
+
+    @property
+    def target_language(self):
+        """The "in/to <language>" span (value is None for an unrecognized language), or None."""
+        return self.first(LANGUAGE, target=True)
+
+    @property
+    def payload(self):
+        """Quoted text if any, else the words between a translate trigger and its target language."""
+        span = self.first(QUOTED) or self.first(PAYLOAD)
+        return span.value if span else None
+
+    def __repr__(self):
+        return f"Entities(trigger={self.trigger!r}, spans={self.spans!r})"
+
+
+class EntityExtractor:
+    """Built once from LANGUAGE_CODES; extract(text) is a single pass over the tokens."""
+
+    def __init__(self, language_codes, stop_words=STOP_WORDS, triggers=TRIGGERS):
+        self.trie = EntityTrie()
+        for kind, phrases in triggers.items():
+            for phrase in phrases:
+                self.trie.add(phrase, kind)
+        self.codes = {code.lower(): code for code in language_codes.values()}
+        for name, code in language_codes.items():
+            self.trie.add(name, LANGUAGE, code)
+        for word in stop_words:
+            self.trie.add(word, STOP_WORD)
+
+    def extract(self, text):
+        tokens = [(m.lastgroup, m.group(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
+        words = [t[1].lower() if t[0] == "word" else None for t in tokens] # None never matches the trie
+        last_word = max((i for i, w in enumerate(words) if w), default=-1)
+        spans, trigger = [], None
+        name, naming = [], False # Collecting a person name after a name/greet trigger
+        payload_start = None # Char offset where a translate payload begins
+        after_prep = False
+        i = 0
+        while i < len(tokens):
+            kind, token, start, end = tokens[i]
+            if kind != "word":
+                if kind == "quoted":
+                    spans.append(Span(QUOTED, token[1:-1].strip(), token, start, end, False))
+                naming = self._flush_name(name, spans, text)
+                after_prep = False
+                i += 1
+                continue
+
+            entry, n = self.trie.longest(words, i)
+            entry_kind, value = entry or (None, None)
+            n = max(n, 1)
+            if words[i] in self.codes and n == 1:
+                # Two-letter codes ("hi", "it", "de") are only languages in the "in/to <language>" slot
+                if after_prep:
+                    entry_kind, value = LANGUAGE, self.codes[words[i]]
+                elif entry_kind == LANGUAGE:
+                    entry_kind = STOP_WORD if words[i] in STOP_WORDS else None
+            unknown_target = (entry_kind is None and after_prep and i == last_word
+                              and trigger in (GREET_TRIGGER, TRANSLATE_TRIGGER)) # "... to klingon"
+
+            if entry_kind in TRIGGERS and trigger is None:
+                trigger = entry_kind
+                naming = entry_kind != TRANSLATE_TRIGGER
+                if entry_kind == TRANSLATE_TRIGGER:
+                    payload_start = tokens[i + n - 1][3]
+            elif entry_kind == LANGUAGE or unknown_target:
+                naming = self._flush_name(name, spans, text)
+                span_end = tokens[i + n - 1][3]
+                spans.append(Span(LANGUAGE, value, text[start:span_end], start, span_end, after_prep))
+                if after_prep and payload_start is not None:
+                    self._add_payload(spans, text, payload_start, tokens[i - 1][2])
+                    payload_start = None
+            elif entry_kind is not None: # Stop word, or a trigger phrase after the first one
+                naming = self._flush_name(name, spans, text)
+            elif naming:
+                name.append((start, end))
+                if len(name) == MAX_NAME_WORDS:
+                    naming = self._flush_name(name, spans, text)
+            after_prep = n == 1 and words[i] in TARGET_PREPOSITIONS
+            i += n
+        self._flush_name(name, spans, text)
+        return Entities(spans, trigger)
+
+    @staticmethod
+    def _flush_name(name, spans, text):
+        """Emits the collected name words as a PERSON span; returns False (naming is over)."""
+        if name:
+            start, end = name[0][0], name[-1][1]
+            value = " ".join(text[start:end].split()).title()
+            if len(value) > 1:
+                spans.append(Span(PERSON, value, text[start:end], start, end, False))
+            name.clear()
+        return False
+
+    @staticmethod
+    def _add_payload(spans, text, start, end):
+        payload = text[start:end].strip()
+        if payload:
+            spans.append(Span(PAYLOAD, payload, payload, start, end, False))
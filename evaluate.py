@@ -0,0 +1,332 @@
+# === Offline Intent Evaluation (labeled corpus, process pool, threshold sweep) ===
+# Measures what an edit to the `intents` catalogue (or to CONFIDENCE_THRESHOLD / the emergency
+# cutoff in app.py) does to accuracy, on a labeled multilingual corpus:
+#   python evaluate.py run corpus.jsonl                  held-out: the catalogue index vs the corpus
+#   python evaluate.py run corpus.jsonl --folds 5        k-fold: corpus utterances of the other folds
+#                                                        are added to the index, scored on the held-out one
+#   python evaluate.py synth corpus.jsonl --size 1000000 perturbed catalogue phrases, for load tests
+# Corpus lines are {"text": ..., "intent": ..., "lang": ...} (.jsonl) or intent<TAB>text[<TAB>lang]
+# (.tsv); "lang" plays the part of the detected language, and intents outside the catalogue count
+# as "unknown" (out-of-scope utterances that should be rejected).
+# The matcher (phrase_index.MultilingualIntentIndex, fuzzy on) runs in a process pool over all
+# cores in chunks; each utterance's raw (intent, score) comes back once, so sweeping the thresholds
+# afterwards is only NumPy over the collected arrays. Output: accuracy at app.py's operating point,
+# precision / recall / F1 per intent, the confusion matrix, accuracy per language, the threshold
+# sweep and matcher latency percentiles (--out DIR also writes them as CSV / JSON).
+# The regex routes that run before match_intent (language modes, "translate X to Y") aren't part
+# of the evaluation.
+
+import argparse
+import ast
+import csv
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+import phrase_index
+from response_table import load_translation_cache
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+UNKNOWN = "unknown"
+EMERGENCY = "emergency_call"
+CHUNK = 2000 # Utterances per pool task
+THRESHOLDS = np.round(np.arange(0.20, 0.801, 0.05), 2)
+EMERGENCY_THRESHOLDS = np.round(np.arange(0.30, 0.951, 0.05), 2)
+
+
+# === Catalogue and Corpus ===
+
+def load_app_settings(path=APP_PATH):
+    """intents, CONFIDENCE_THRESHOLD and EMERGENCY_THRESHOLD read from app.py's source (no import, no engines)."""
+    wanted = {"intents", "CONFIDENCE_THRESHOLD", "EMERGENCY_THRESHOLD"}
+    settings = {}
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and getattr(node.targets[0], "id", None) in wanted:
+            settings[node.targets[0].id] = ast.literal_eval(node.value)
+    missing = wanted - set(settings)
+    if missing:
+        raise ValueError(f"{path}: could not find {', '.join(sorted(missing))}")
+    return settings
+
+
+def load_corpus(path):
+    """[(text, intent, lang or None), ...] from .jsonl or .tsv."""
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            if path.endswith(".jsonl"):
+                record = json.loads(line)
+                corpus.append((record["text"], record["intent"], record.get("lang")))
+            else:
+                fields = line.split("\t")
+                if len(fields) < 2:
+                    raise ValueError(f"{path}:{line_number}: expected intent<TAB>text[<TAB>lang]")
+                corpus.append((fields[1], fields[0], fields[2] if len(fields) > 2 and fields[2] else None))
+    return corpus
+
+
+# === Worker ===
+# Each pool process builds its index once per fold (tasks arrive ordered by fold) and returns the
+# raw top intent, score, index language and seconds per utterance.
+
+_worker = {}
+
+
+def _init_worker(phrases, tags, cache, corpus, folds):
+    _worker.update(phrases=phrases, tags=tags, cache=cache, corpus=corpus, folds=folds, fold=None, index=None)
+
+
+def _index_for(fold):
+    if _worker["fold"] != fold or _worker["index"] is None:
+        extra = ()
+        if fold is not None:
+            corpus, folds = _worker["corpus"], _worker["folds"]
+            extra = [corpus[i] for i in np.nonzero(folds != fold)[0] if corpus[i][1] != UNKNOWN]
+        _worker["index"] = phrase_index.MultilingualIntentIndex(_worker["phrases"], _worker["tags"], set(_worker["cache"]),
+                                                                cache=_worker["cache"], extra=extra)
+        _worker["fold"] = fold
+    return _worker["index"]
+
+
+def _evaluate_chunk(task):
+    fold, rows = task
+    index = _index_for(fold)
+    corpus = _worker["corpus"]
+    tags, scores, langs, seconds = [], np.zeros(len(rows)), [], np.zeros(len(rows))
+    for i, row in enumerate(rows):
+        text, _, lang = corpus[row]
+        started = time.perf_counter()
+        tag, score, index_lang = index.match(text, lang)
+        seconds[i] = time.perf_counter() - started
+        tags.append(tag)
+        scores[i] = score
+        langs.append(index_lang)
+    return rows, tags, scores, langs, seconds
+
+
+def evaluate(corpus, phrases, tags, cache, folds=0, workers=None, seed=0):
+    """Raw predictions for every utterance: (top intents, scores, index languages, seconds), in corpus order."""
+    fold_of = np.zeros(len(corpus), dtype=np.int32)
+    if folds:
+        fold_of = np.random.default_rng(seed).permutation(len(corpus)) % folds
+    tasks = []
+    for fold in (range(folds) if folds else [None]):
+        rows = np.arange(len(corpus)) if fold is None else np.nonzero(fold_of == fold)[0]
+        tasks.extend((fold, rows[i:i + CHUNK]) for i in range(0, len(rows), CHUNK))
+    predicted = np.empty(len(corpus), dtype=object)
+    scores, seconds = np.zeros(len(corpus)), np.zeros(len(corpus))
+    index_langs = np.empty(len(corpus), dtype=object)
+    workers = workers or os.cpu_count() or 1
+    started, done = time.perf_counter(), 0
+    with multiprocessing.Pool(workers, _init_worker, (phrases, tags, cache, corpus, fold_of)) as pool:
+        for rows, chunk_tags, chunk_scores, chunk_langs, chunk_seconds in pool.imap_unordered(_evaluate_chunk, tasks):
+            predicted[rows], scores[rows], index_langs[rows], seconds[rows] = chunk_tags, chunk_scores, chunk_langs, chunk_seconds
+            done += len(rows)
+            if done * 10 // len(corpus) > (done - len(rows)) * 10 // len(corpus):
+                elapsed = time.perf_counter() - started
+                print(f"[Evaluate] {done}/{len(corpus)} utterances, {elapsed:.0f}s ({done / elapsed:.0f}/s on {workers} processes)")
+    return predicted, scores, index_langs, seconds
+
+
+# === Metrics ===
+
+def decide(raw, scores, threshold, emergency_threshold, emergency_id, unknown_id):
+    """match_intent's decision: below the threshold (the higher one for emergency_call) is unknown."""
+    required = np.where(raw == emergency_id, max(threshold, emergency_threshold), threshold)
+    return np.where(scores >= required, raw, unknown_id)
+
+
+def confusion(truth, predicted, n):
+    return np.bincount(truth * n + predicted, minlength=n * n).reshape(n, n)
+
+
+def per_label(matrix):
+    """precision, recall, f1, support arrays (0 where undefined)."""
+    tp = np.diag(matrix).astype(float)
+    predicted, support = matrix.sum(axis=0), matrix.sum(axis=1)
+    precision = np.divide(tp, predicted, out=np.zeros_like(tp), where=predicted > 0)
+    recall = np.divide(tp, support, out=np.zeros_like(tp), where=support > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros_like(tp), where=precision + recall > 0)
+    return precision, recall, f1, support
+
+
+def summary_at(truth, raw, scores, labels, threshold, emergency_threshold):
+    n = len(labels)
+    emergency_id, unknown_id = labels.index(EMERGENCY), labels.index(UNKNOWN)
+    predicted = decide(raw, scores, threshold, emergency_threshold, emergency_id, unknown_id)
+    matrix = confusion(truth, predicted, n)
+    precision, recall, f1, support = per_label(matrix)
+    scored = (support > 0) & (np.arange(n) != unknown_id) # Macro average over catalogue intents present
+    out_of_scope = truth == unknown_id
+    return {"threshold": threshold, "emergency_threshold": emergency_threshold,
+            "accuracy": float(np.trace(matrix) / len(truth)), "macro_f1": float(f1[scored].mean()) if scored.any() else 0.0,
+            "emergency_precision": float(precision[emergency_id]), "emergency_recall": float(recall[emergency_id]),
+            "false_accept": float((predicted[out_of_scope] != unknown_id).mean()) if out_of_scope.any() else 0.0,
+            "matrix": matrix, "precision": precision, "recall": recall, "f1": f1, "support": support, "predicted": predicted}
+
+
+def sweep(truth, raw, scores, labels):
+    """Every (threshold, emergency threshold) pair of the grids; rows without the per-label arrays."""
+    keys = ("threshold", "emergency_threshold", "accuracy", "macro_f1", "emergency_precision", "emergency_recall", "false_accept")
+    return [{key: summary_at(truth, raw, scores, labels, t, e)[key] for key in keys}
+            for t in THRESHOLDS for e in EMERGENCY_THRESHOLDS]
+
+
+# === Report ===
+
+def _percentiles(seconds):
+    return "  ".join(f"p{q} {1000 * np.percentile(seconds, q):.3f} ms" for q in (50, 95, 99))
+
+
+def report(corpus, predicted, scores, index_langs, seconds, labels, settings, out=None):
+    label_ids = {label: i for i, label in enumerate(labels)}
+    unknown_id = label_ids[UNKNOWN]
+    truth = np.array([label_ids.get(intent, unknown_id) for _, intent, _ in corpus])
+    raw = np.array([label_ids.get(tag, unknown_id) for tag in predicted])
+    current = summary_at(truth, raw, scores, labels, settings["CONFIDENCE_THRESHOLD"], settings["EMERGENCY_THRESHOLD"])
+
+    print(f"\n[Evaluate] {len(corpus)} utterances at app.py's thresholds ({current['threshold']} / "
+          f"{current['emergency_threshold']} for {EMERGENCY}): accuracy {current['accuracy']:.4f}, "
+          f"macro F1 {current['macro_f1']:.4f}, out-of-scope accepted {current['false_accept']:.4f}")
+    width = max(len(label) for label in labels) + 2
+    print(f"\n{'intent':<{width}}{'precision':>10}{'recall':>10}{'f1':>10}{'support':>10}")
+    for i, label in enumerate(labels):
+        if current["support"][i] or current["matrix"][:, i].sum():
+            print(f"{label:<{width}}{current['precision'][i]:>10.3f}{current['recall'][i]:>10.3f}"
+                  f"{current['f1'][i]:>10.3f}{int(current['support'][i]):>10}")
+
+    print("\nConfusion matrix (rows: true intent, columns: predicted; numbered as the rows):")
+    print(" " * (width + 4) + "".join(f"{i:>7}" for i in range(len(labels))))
+    for i, label in enumerate(labels):
+        print(f"{i:>3} {label:<{width}}" + "".join(f"{n:>7}" for n in current["matrix"][i]))
+
+    langs = np.array([lang or "-" for _, _, lang in corpus])
+    correct = current["predicted"] == truth
+    print("\nAccuracy per corpus language (index used):")
+    for lang in sorted(set(langs)):
+        rows = langs == lang
+        used = ", ".join(f"{name} {count}" for name, count in zip(*np.unique(index_langs[rows].astype(str), return_counts=True)))
+        print(f"  {lang:<8} {correct[rows].mean():.4f} over {rows.sum()} ({used})")
+
+    grid = sweep(truth, raw, scores, labels)
+    print(f"\nThreshold sweep (emergency cutoff fixed at {current['emergency_threshold']}):")
+    print(f"{'threshold':>10}{'accuracy':>10}{'macro F1':>10}{'oos accepted':>14}")
+    for row in grid:
+        if row["emergency_threshold"] == current["emergency_threshold"]:
+            print(f"{row['threshold']:>10.2f}{row['accuracy']:>10.4f}{row['macro_f1']:>10.4f}{row['false_accept']:>14.4f}")
+    print(f"\nEmergency cutoff sweep (threshold fixed at {current['threshold']}):")
+    print(f"{'cutoff':>10}{'precision':>10}{'recall':>10}{'accuracy':>10}")
+    for row in grid:
+        if row["threshold"] == current["threshold"]:
+            print(f"{row['emergency_threshold']:>10.2f}{row['emergency_precision']:>10.4f}"
+                  f"{row['emergency_recall']:>10.4f}{row['accuracy']:>10.4f}")
+    best = max(grid, key=lambda row: (row["macro_f1"], row["emergency_recall"]))
+    print(f"\nBest macro F1 {best['macro_f1']:.4f} at threshold {best['threshold']} / emergency {best['emergency_threshold']} "
+          f"(emergency recall {best['emergency_recall']:.4f}, precision {best['emergency_precision']:.4f})")
+
+    print(f"\nMatcher latency: {_percentiles(seconds)}")
+    for lang in sorted(set(index_langs.astype(str))):
+        print(f"  {lang:<8} {_percentiles(seconds[index_langs.astype(str) == lang])}")
+
+    if out:
+        write_outputs(out, labels, current, grid, seconds)
+
+
+def write_outputs(directory, labels, current, grid, seconds):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "confusion.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["true \\ predicted"] + labels)
+        writer.writerows([label] + list(map(int, row)) for label, row in zip(labels, current["matrix"]))
+    with open(os.path.join(directory, "per_intent.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["intent", "precision", "recall", "f1", "support"])
+        writer.writerows([label, round(float(p), 4), round(float(r), 4), round(float(f1), 4), int(s)] for label, p, r, f1, s in
+                         zip(labels, current["precision"], current["recall"], current["f1"], current["support"]))
+    with open(os.path.join(directory, "sweep.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(grid[0]))
+        writer.writeheader()
+        writer.writerows(grid)
+    with open(os.path.join(directory, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump({"accuracy": current["accuracy"], "macro_f1": current["macro_f1"],
+                   "threshold": current["threshold"], "emergency_threshold": current["emergency_threshold"],
+                   "latency_ms": {f"p{q}": 1000 * float(np.percentile(seconds, q)) for q in (50, 95, 99)}}, f, indent=2)
+    print(f"[Evaluate] Wrote confusion.csv, per_intent.csv, sweep.csv and summary.json to {directory}")
+
+
+# === Synthetic Corpus ===
+
+FILLERS = ["joey", "hey joey", "please", "can you", "okay", "um"]
+OUT_OF_SCOPE = ["road", "coffee", "meeting", "left", "signal", "petrol", "rain", "bridge", "parking", "blue", "window", "lunch"]
+
+
+def _typo(word, rng):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.random()
+    if kind < 0.33:
+        return word[:i] + word[i + 1:] # Dropped letter
+    if kind < 0.66:
+        return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:] # Swapped letters
+    return word[:i] + word[i] + word[i:] # Doubled letter
+
+
+def synthesize(phrases, tags, cache, size, seed=0):
+    """Labeled utterances: catalogue phrases with typos and fillers, cached translations, some out-of-scope."""
+    rng = random.Random(seed)
+    translated = [(entries[p], tag, lang) for lang, entries in cache.items() for p, tag in zip(phrases, tags) if entries.get(p)]
+    corpus = []
+    for _ in range(size):
+        roll = rng.random()
+        if roll < 0.05:
+            corpus.append((" ".join(rng.sample(OUT_OF_SCOPE, rng.randint(2, 4))), UNKNOWN, "en"))
+        elif translated and roll < 0.3:
+            corpus.append(rng.choice(translated))
+        else:
+            i = rng.randrange(len(phrases))
+            words = [_typo(w, rng) if rng.random() < 0.15 else w for w in phrases[i].split()]
+            if rng.random() < 0.3:
+                words.insert(0, rng.choice(FILLERS))
+            corpus.append((" ".join(words), tags[i], "en"))
+    return corpus
+
+
+def write_corpus(corpus, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for text, intent, lang in corpus:
+            f.write(json.dumps({"text": text, "intent": intent, "lang": lang}, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate Joey's intent matcher on a labeled corpus.")
+    parser.add_argument("command", choices=["run", "synth"])
+    parser.add_argument("corpus", help="corpus file (.jsonl or .tsv); written by synth")
+    parser.add_argument("--folds", type=int, default=0, help="k-fold with the corpus (0 = held-out against the catalogue)")
+    parser.add_argument("--workers", type=int, help="pool processes (default: all cores)")
+    parser.add_argument("--size", type=int, default=100000, help="synth: utterances to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="run: directory for the CSV / JSON results")
+    args = parser.parse_args()
+    settings = load_app_settings()
+    phrases, tags = phrase_index.catalogue(settings["intents"])
+    cache = load_translation_cache()
+    if args.command == "synth":
+        write_corpus(synthesize(phrases, tags, cache, args.size, args.seed), args.corpus)
+        print(f"[Evaluate] Wrote {args.size} utterances to {args.corpus}")
+    else:
+        corpus = load_corpus(args.corpus)
+        started = time.perf_counter()
+        predicted, scores, index_langs, seconds = evaluate(corpus, phrases, tags, cache, args.folds, args.workers, args.seed)
+        print(f"[Evaluate] Matched {len(corpus)} utterances in {time.perf_counter() - started:.0f}s.")
+        labels = sorted(settings["intents"]) + [UNKNOWN]
+        report(corpus, predicted, scores, index_langs, seconds, labels, settings, args.out)
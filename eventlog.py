@@ -0,0 +1,314 @@
+# === Event Log (asynchronous, batched, structured) ===
+# Hot paths don't print: they append a compact record (a tuple) to an in-memory ring and return.
+# deque.append is atomic under the GIL, so producers never take a lock; a background writer drains
+# the ring every FLUSH_INTERVAL (or once BATCH records are waiting), writes them as JSON lines to a
+# size-rotated file and echoes the ones at or above the console level to stdout in one write.
+#   JOEY_LOG="default=info,intent=debug@0.1,speak=info"   per-component level, optional sample rate
+#   JOEY_CONSOLE=info | warning | off                      what is echoed to the (slow serial) console
+#   python eventlog.py query --component intent --event matched --count-by intent
+#   python eventlog.py bench                               per-record cost vs print()
+# Warnings and errors are never sampled away. When the ring is full the oldest records are dropped
+# (and counted), so a stalled disk can't grow memory or block a turn.
+
+import argparse
+import atexit
+import glob
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+DEBUG, INFO, WARNING, ERROR, OFF = 10, 20, 30, 40, 100
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+LOG_DIR = os.environ.get("JOEY_LOG_DIR", "logs")
+LOG_NAME = "joey.jsonl"
+MAX_BYTES = 5 * 1024 * 1024 # Per file before it is rotated
+BACKUPS = 5 # joey.jsonl.1 (newest) ... joey.jsonl.5 (oldest)
+CAPACITY = 50000 # Records held in memory between flushes
+BATCH = 512 # Wake the writer early once this many records are waiting
+FLUSH_INTERVAL = 0.25
+SERIAL_BAUD = 115200 # Head unit console, for the benchmark's comparison (10 bits per byte)
+
+
+def parse_config(spec):
+    """'default=info,intent=debug@0.1' -> {component: (level, sample_rate)}."""
+    config = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        component, _, setting = item.partition("=")
+        level, _, rate = setting.partition("@")
+        if level.lower() not in LEVELS:
+            print(f"[EventLog] Unknown level '{level}' for {component}; using info.")
+        config[component.strip()] = (LEVELS.get(level.lower(), INFO), float(rate) if rate else 1.0)
+    return config
+
+
+class Logger:
+    """Per-component handle; a disabled or sampled-out call costs one comparison (plus the kwargs)."""
+    __slots__ = ("component", "level", "rate", "sink")
+
+    def __init__(self, component, level, rate, sink):
+        self.component = component
+        self.level = level
+        self.rate = rate
+        self.sink = sink
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def log(self, level, event, **fields):
+        if level >= self.level and (level >= WARNING or self.rate >= 1.0 or random.random() < self.rate):
+            self.sink.emit(level, self.component, event, fields)
+
+    # The level check is repeated inline so a disabled call never repacks its kwargs
+    def debug(self, event, **fields):
+        if DEBUG >= self.level and (self.rate >= 1.0 or random.random() < self.rate):
+            self.sink.emit(DEBUG, self.component, event, fields)
+
+    def info(self, event, **fields):
+        if INFO >= self.level and (self.rate >= 1.0 or random.random() < self.rate):
+            self.sink.emit(INFO, self.component, event, fields)
+
+    def warning(self, event, **fields):
+        if WARNING >= self.level:
+            self.sink.emit(WARNING, self.component, event, fields)
+
+    def error(self, event, **fields):
+        if ERROR >= self.level:
+            self.sink.emit(ERROR, self.component, event, fields)
+
+
+class EventLog:
+    """The ring, the loggers that feed it and the writer thread that drains it."""
+
+    def __init__(self, config=None, console=INFO, log_dir=LOG_DIR, capacity=CAPACITY, stream=None):
+        self.config = config or {}
+        self.console = console
+        self.log_dir = log_dir
+        self.stream = stream or sys.stdout
+        self.turn = 0 # Stamped on every record; set by the turn loop
+        self.dropped = 0
+        self.written = 0
+        self._ring = deque(maxlen=capacity)
+        self._loggers = {}
+        self._file = None
+        self._file_bytes = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="eventlog-writer", daemon=True)
+        self._writer.start()
+
+    def get(self, component):
+        logger = self._loggers.get(component)
+        if logger is None:
+            level, rate = self.config.get(component, self.config.get("default", (INFO, 1.0)))
+            logger = self._loggers.setdefault(component, Logger(component, level, rate, self))
+        return logger
+
+    def configure(self, config=None, console=None):
+        """Changes levels / sampling at runtime; existing loggers pick it up at once."""
+        if config is not None:
+            self.config = config
+            default = config.get("default", (INFO, 1.0))
+            for component, logger in self._loggers.items():
+                logger.level, logger.rate = config.get(component, default)
+        if console is not None:
+            self.console = console
+
+    def emit(self, level, component, event, fields):
+        ring = self._ring
+        waiting = len(ring)
+        if waiting == BATCH:
+            self._wake.set()
+        elif waiting == ring.maxlen:
+            self.dropped += 1 # Approximate under contention; the oldest record is pushed out
+        ring.append((time.time(), level, component, event, fields, self.turn))
+
+    # --- Writer ---
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Drains the ring into the log file (and the console). Safe to call from any thread."""
+        records = []
+        ring = self._ring
+        try:
+            while True:
+                records.append(ring.popleft())
+        except IndexError:
+            pass
+        if not records:
+            return 0
+        lines, echo = [], []
+        for stamp, level, component, event, fields, turn in records:
+            record = {"t": round(stamp, 3), "lvl": LEVEL_NAMES[level], "c": component, "ev": event, "turn": turn}
+            record.update(fields)
+            lines.append(json.dumps(record, ensure_ascii=False, default=str))
+            if level >= self.console:
+                echo.append(self._console_line(level, component, event, fields))
+        try:
+            self._write("\n".join(lines) + "\n")
+        except OSError as e:
+            echo.append(f"[EventLog Error] {len(lines)} records lost: {e}")
+        if echo:
+            try:
+                self.stream.write("\n".join(echo) + "\n")
+                self.stream.flush()
+            except Exception:
+                pass
+        self.written += len(records)
+        return len(records)
+
+    @staticmethod
+    def _console_line(level, component, event, fields):
+        fields = dict(fields)
+        text = fields.pop("text", None)
+        prefix = f"[{component}{' ' + LEVEL_NAMES[level].upper() if level >= WARNING else ''}] {event}"
+        extra = " ".join(f"{key}={value}" for key, value in fields.items())
+        if text is not None:
+            return f"{prefix}: {text}" + (f"  ({extra})" if extra else "")
+        return f"{prefix} {extra}".rstrip()
+
+    def _write(self, data):
+        encoded = data.encode("utf-8")
+        if self._file is None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            path = os.path.join(self.log_dir, LOG_NAME)
+            self._file = open(path, "ab")
+            self._file_bytes = self._file.tell()
+        elif self._file_bytes + len(encoded) > MAX_BYTES:
+            self._rotate()
+        self._file.write(encoded)
+        self._file.flush()
+        self._file_bytes += len(encoded)
+
+    def _rotate(self):
+        self._file.close()
+        path = os.path.join(self.log_dir, LOG_NAME)
+        for n in range(BACKUPS - 1, 0, -1):
+            if os.path.exists(f"{path}.{n}"):
+                os.replace(f"{path}.{n}", f"{path}.{n + 1}")
+        os.replace(path, f"{path}.1")
+        self._file = open(path, "ab")
+        self._file_bytes = 0
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._writer.join(timeout=2)
+        self.flush()
+        if self.dropped:
+            print(f"[EventLog] {self.dropped} records dropped (ring full).")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+sink = EventLog(parse_config(os.environ.get("JOEY_LOG", "default=info")),
+                console=LEVELS.get(os.environ.get("JOEY_CONSOLE", "info").lower(), INFO))
+atexit.register(sink.close)
+get = sink.get
+
+
+def set_turn(turn):
+    sink.turn = turn
+
+
+# === Query ===
+
+def log_files(log_dir=LOG_DIR):
+    """Oldest first: joey.jsonl.5 ... joey.jsonl.1, joey.jsonl."""
+    base = os.path.join(log_dir, LOG_NAME)
+    rotated = sorted(glob.glob(base + ".*"), key=lambda path: -int(path.rsplit(".", 1)[-1]))
+    return rotated + ([base] if os.path.exists(base) else [])
+
+
+def read(log_dir=LOG_DIR, component=None, event=None, level="debug", since=None, turn=None, where=()):
+    """Yields records matching every given filter (`where` is a list of (field, value-as-text))."""
+    minimum = LEVELS[level]
+    for path in log_files(log_dir):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue # A line cut short by a power loss
+                if ((component and record.get("c") != component) or (event and record.get("ev") != event)
+                        or LEVELS.get(record.get("lvl"), INFO) < minimum or (since and record.get("t", 0) < since)
+                        or (turn is not None and record.get("turn") != turn)
+                        or any(str(record.get(field)) != value for field, value in where)):
+                    continue
+                yield record
+
+
+def query(args):
+    since = time.time() - args.since * 60 if args.since else None
+    where = [tuple(item.split("=", 1)) for item in args.where]
+    records = read(args.dir, args.component, args.event, args.level, since, args.turn, where)
+    if args.count_by:
+        counts = Counter(str(record.get(args.count_by)) for record in records)
+        for value, count in counts.most_common(args.limit):
+            print(f"{count:>8}  {value}")
+        return
+    for n, record in enumerate(records):
+        if n >= args.limit:
+            break
+        print(json.dumps(record, ensure_ascii=False))
+
+
+# === Benchmark ===
+
+def bench(records=200000):
+    """Per-record cost on the calling thread: event log vs print() to a file."""
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        log = EventLog({"default": (INFO, 1.0)}, console=OFF, log_dir=tmp, capacity=records)
+        logger = log.get("bench")
+        started = time.perf_counter()
+        for i in range(records):
+            logger.info("matched", intent="greet", score=0.82, lang="en", i=i)
+        logged = time.perf_counter() - started
+        log.close()
+        with open(os.path.join(tmp, "print.txt"), "w", encoding="utf-8") as f:
+            started = time.perf_counter()
+            for i in range(records):
+                print(f"[Intent Matched (en): greet with confidence 0.82] {i}", file=f, flush=True)
+            printed = time.perf_counter() - started
+            line_bytes = f.tell() / records
+        logger.level = WARNING
+        started = time.perf_counter()
+        for i in range(records):
+            logger.info("matched", intent="greet", score=0.82, lang="en", i=i)
+        disabled = time.perf_counter() - started
+    print(f"[Bench] event log:       {1e6 * logged / records:6.2f} us/record ({log.written} written, {log.dropped} dropped)")
+    print(f"[Bench] disabled level:  {1e6 * disabled / records:6.2f} us/record")
+    print(f"[Bench] print (flushed): {1e6 * printed / records:6.2f} us/record to a file; "
+          f"~{1e6 * line_bytes * 10 / SERIAL_BAUD:.0f} us/line on a {SERIAL_BAUD}-baud console")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query Joey's structured event log.")
+    parser.add_argument("command", choices=["query", "bench"])
+    parser.add_argument("--dir", default=LOG_DIR)
+    parser.add_argument("--component")
+    parser.add_argument("--event")
+    parser.add_argument("--level", default="debug", choices=list(LEVELS))
+    parser.add_argument("--since", type=float, help="only the last N minutes")
+    parser.add_argument("--turn", type=int)
+    parser.add_argument("--where", action="append", default=[], help="field=value (repeatable)")
+    parser.add_argument("--count-by", help="count records per value of this field")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+    sink.configure(console=OFF)
+    if args.command == "query":
+        query(args)
+    else:
+        bench()
@@ -0,0 +1,274 @@
+# === External Data Client (location / weather / IP lookups) ===
+# One shared, pooled HTTP session with strict timeouts, a TTL cache keyed on rough position,
+# stale-while-revalidate (serve the old answer, refresh in the background) and a per-host
+# circuit breaker, so "where am I" and weather answers never block the turn loop on a bad network.
+#
+# Run `python external_data.py` to start the local stand-in server and time cold vs cached lookups.
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import eventlog
+import memory
+
+net_log = eventlog.get("net")
+
+# Provider endpoints (override with env vars, e.g. to point at the stand-in server)
+IPINFO_URL = os.environ.get("JOEY_IPINFO_URL", "https://ipinfo.io/json")
+WEATHER_URL = os.environ.get("JOEY_WEATHER_URL", "https://api.open-meteo.com/v1/forecast")
+
+# Open-Meteo WMO weather codes -> spoken condition
+WEATHER_CONDITIONS = {
+    0: "clear", 1: "mostly sunny", 2: "partly cloudy", 3: "overcast",
+    45: "foggy", 48: "foggy", 51: "drizzling", 53: "drizzling", 55: "drizzling",
+    61: "rainy", 63: "rainy", 65: "raining heavily", 71: "snowy", 73: "snowy", 75: "snowing heavily",
+    80: "showery", 81: "showery", 82: "stormy", 95: "stormy", 96: "stormy", 99: "stormy",
+}
+
+
+def position_key(lat, lon, precision=2):
+    """Rounds a position (2 decimals ~ 1 km) so nearby lookups share one cache entry."""
+    return f"{round(float(lat), precision)},{round(float(lon), precision)}"
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; lets one trial request through after `cooldown` seconds."""
+
+    def __init__(self, threshold=3, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                self.opened_at = time.monotonic() # Half-open: allow a single trial, re-arm the timer
+                return True
+            return False
+
+    def record(self, ok):
+        with self._lock:
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.failures >= self.threshold:
+                    self.opened_at = time.monotonic()
+
+
+class ExternalDataClient:
+    """Pooled JSON-over-HTTP client with TTL caching, stale-while-revalidate and circuit breaking."""
+
+    def __init__(self, timeout=(1.0, 2.0), ttl=300.0, stale_ttl=3600.0, pool_size=4, refresh_workers=2,
+                 max_cache_bytes=memory.profile["external_cache_bytes"]):
+        self.timeout = timeout # (connect, read) seconds
+        self.ttl = ttl # Entries younger than this are served without touching the network
+        self.stale_ttl = stale_ttl # Older entries are still served (and refreshed) for this much longer
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # cache key -> (value, fetched_at), LRU within the profile's byte budget
+        self._cache = memory.BoundedCache(max_cache_bytes, sizeof=lambda entry: len(json.dumps(entry[0])) + 120, name="external data")
+        self._breakers = {} # host -> CircuitBreaker
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="joey-net")
+
+    def _breaker(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker()
+            return self._breakers[host]
+
+    def _fetch(self, url, params):
+        breaker = self._breaker(url)
+        if not breaker.allow():
+            net_log.warning("circuit_open", host=urlparse(url).netloc) # Request skipped
+            return None
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            breaker.record(True)
+            return data
+        except Exception as e:
+            breaker.record(False)
+            net_log.warning("request_failed", url=url, error=str(e))
+            return None
+
+    def _store(self, cache_key, value):
+        with self._lock:
+            self._cache.put(cache_key, (value, time.monotonic()))
+            self._refreshing.discard(cache_key)
+
+    def _refresh(self, cache_key, url, params, parse):
+        data = self._fetch(url, params)
+        value = parse(data) if data is not None else None
+        if value is not None:
+            self._store(cache_key, value)
+        else:
+            with self._lock:
+                self._refreshing.discard(cache_key)
+
+    def get(self, cache_key, url, params=None, parse=lambda data: data):
+        """
+        Returns the parsed value for `cache_key`: fresh from cache, stale from cache (with a
+        background refresh), or fetched now. Returns the last known value or None on failure.
+        """
+        with self._lock:
+            entry = self._cache.get(cache_key)
+        now = time.monotonic()
+        if entry:
+            value, fetched_at = entry
+            age = now - fetched_at
+            if age < self.ttl:
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.refresh_async(cache_key, url, params, parse)
+                return value
+        data = self._fetch(url, params)
+        if data is None:
+            return entry[0] if entry else None # A very old answer beats no answer
+        value = parse(data)
+        if value is not None:
+            self._store(cache_key, value)
+        return value
+
+    def refresh_async(self, cache_key, url, params=None, parse=lambda data: data):
+        """Refreshes an entry in the background (at most one refresh in flight per key)."""
+        with self._lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+        self._pool.submit(self._refresh, cache_key, url, params, parse)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+# === Providers ===
+client = ExternalDataClient()
+
+
+def _parse_ipinfo(data):
+    city = data.get("city", "Unknown City")
+    region = data.get("region", "Unknown Region")
+    country = data.get("country", "Unknown Country")
+    lat, _, lon = data.get("loc", ",").partition(",")
+    return {"location": f"{city}, {region}, {country}", "city": city,
+            "lat": float(lat) if lat else None, "lon": float(lon) if lon else None}
+
+
+def get_ip_location():
+    """IP-based location: {"location": "City, Region, Country", "city", "lat", "lon"} or None."""
+    return client.get("ip", IPINFO_URL, parse=_parse_ipinfo)
+
+
+def get_location():
+    """'City, Region, Country' for the current position, or None if it can't be determined."""
+    info = get_ip_location()
+    return info["location"] if info else None
+
+
+def get_weather(lat=None, lon=None, place=None):
+    """Current weather as {"location", "temp_c", "condition", "temp_f"}, or None if unavailable."""
+    if lat is None or lon is None:
+        info = get_ip_location()
+        if not info or info["lat"] is None:
+            return None
+        lat, lon, place = info["lat"], info["lon"], place or info["city"]
+
+    def parse(data):
+        current = data.get("current_weather")
+        if not current:
+            return None
+        temp_c = round(current["temperature"])
+        return {"location": place or position_key(lat, lon), "temp_c": temp_c,
+                "condition": WEATHER_CONDITIONS.get(current.get("weathercode"), "unsettled"),
+                "temp_f": round(temp_c * 9/5 + 32)}
+
+    params = {"latitude": lat, "longitude": lon, "current_weather": "true"}
+    return client.get("weather:" + position_key(lat, lon), WEATHER_URL, params=params, parse=parse)
+
+
+def warm():
+    """Fetches location and weather in the background so the first question is answered from cache."""
+    client._pool.submit(get_weather)
+
+
+# === Local Stand-in Server (for development and tests) ===
+class StandInServer:
+    """
+    Serves canned ipinfo / Open-Meteo responses on localhost, with injectable latency and failures.
+    Point the providers at it with JOEY_IPINFO_URL=<url>/json and JOEY_WEATHER_URL=<url>/v1/forecast.
+    """
+
+    IPINFO = {"city": "New Delhi", "region": "Delhi", "country": "IN", "loc": "28.6139,77.2090"}
+    WEATHER = {"current_weather": {"temperature": 35.0, "weathercode": 1}}
+
+    def __init__(self, port=0, latency=0.0, fail=False):
+        server = self
+        self.latency = latency
+        self.fail = fail
+        self.requests = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(server.latency)
+                if server.fail:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = server.IPINFO if self.path.startswith("/json") else server.WEATHER
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args): # Keep the console quiet
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    stand_in = StandInServer(latency=0.2)
+    IPINFO_URL = stand_in.url + "/json"
+    WEATHER_URL = stand_in.url + "/v1/forecast"
+    for label in ("cold", "cached"):
+        start = time.perf_counter()
+        location, weather = get_location(), get_weather()
+        print(f"{label:>6}: {(time.perf_counter() - start) * 1000:7.2f} ms  {location} | {weather}")
+    stand_in.fail = True
+    client._cache.clear()
+    for attempt in range(5):
+        start = time.perf_counter()
+        get_location()
+        print(f"failing #{attempt + 1}: {(time.perf_counter() - start) * 1000:7.2f} ms")
+    print(f"Stand-in server saw {stand_in.requests} requests.")
+    stand_in.stop()
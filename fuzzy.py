@@ -0,0 +1,142 @@
+# === Fuzzy Token Normalizer (phonetic keys + SymSpell deletes) ===
+# STT mishearings ("jokey stop", "tel me a joke", "wats the wether") and the many ways people spell
+# romanized Hindi ("chutkula" / "chutkulaa", "zaroorat" / "jaroorat") fall below the TF-IDF
+# threshold because they share no exact token with the catalogue. Before scoring, each token the
+# index doesn't know is mapped to the closest vocabulary word:
+#   - a Metaphone-style phonetic key with rules for Indic romanization (aspirates, long vowels,
+#     z/j, w/v, sh/ch) finds words that sound alike however they are spelled;
+#   - SymSpell-style delete variants (precomputed for the vocabulary) find words within edit
+#     distance 1-2 with a handful of dict lookups, instead of comparing against every word.
+# A lookup is bounded by the token's length (at most ~L^2/2 deletes), and results are memoized.
+
+import re
+from collections import Counter
+
+MIN_LENGTH = 3 # Shorter tokens ("a", "to", "me") are too ambiguous to correct
+MEMO_SIZE = 4096
+
+_PHONETIC_RULES = [(re.compile(pattern), replacement) for pattern, replacement in (
+    (r"[^a-z]", ""),
+    (r"x", "ks"),
+    (r"^(?:kn|gn|pn|wr)", lambda m: m.group(0)[1]), # Silent first letter
+    (r"ph", "f"), (r"ck", "k"), (r"tch", "ch"), (r"sch", "sk"),
+    (r"(?:sh|ch|chh)", "X"), # Hindi sh / ch / chh and English sh / ch: one sibilant class
+    (r"([kgbdjtp])h", r"\1"), # Aspirates: kh, gh, bh, dh, jh, th -> plain stop
+    (r"c(?=[eiy])", "s"), (r"[cq]", "k"),
+    (r"z", "j"), (r"w", "v"), # zaroorat / jaroorat, Hindi w / v
+    (r"(?<=.)h(?![aeiou])", ""), # Trailing or pre-consonant h is silent
+    (r"(?<=.)[aeiouy]", ""), # Vowels only count at the start (aa / ee / oo spellings disappear)
+    (r"(.)\1+", r"\1"), # Doubled letters
+)]
+
+
+def phonetic_key(word):
+    """Metaphone-style key: 'chutkulaa' and 'chutkula' -> 'XTKL', 'weather' / 'wether' -> 'VTR'."""
+    key = word.lower()
+    for pattern, replacement in _PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    return key.upper()
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent swaps count once), or limit + 1 once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        # Only cells within `limit` of the diagonal can stay within `limit`
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        ai, best = a[i - 1], current[0]
+        for j in range(low, high + 1):
+            value = previous[j - 1] + (ai != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and ai == b[j - 2] and a[i - 2] == b[j - 1] and previous2[j - 2] + 1 < value:
+                value = previous2[j - 2] + 1
+            current[j] = value
+            if value < best:
+                best = value
+        if best > limit:
+            return over
+        previous2, previous = previous, current
+    return min(previous[-1], over)
+
+
+def max_distance(word):
+    return 1 if len(word) <= 5 else 2
+
+
+def _deletes(word, distance):
+    """Every string reachable from `word` by deleting up to `distance` characters."""
+    variants, frontier = {word}, {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class FuzzyNormalizer:
+    """Maps tokens outside the vocabulary to the closest vocabulary word (or leaves them alone)."""
+
+    def __init__(self, phrases):
+        self.frequency = Counter(word for phrase in phrases for word in re.findall(r"[a-z']+", phrase.lower()))
+        self.vocabulary = set(self.frequency)
+        self._deleted = {} # delete variant -> words it came from
+        self._sounds = {} # phonetic key -> words with that key
+        for word in self.vocabulary:
+            if len(word) < MIN_LENGTH:
+                continue
+            for variant in _deletes(word, max_distance(word)):
+                self._deleted.setdefault(variant, []).append(word)
+            key = phonetic_key(word)
+            if len(key) >= 2: # One-letter keys ("joey" -> "J") match far too much
+                self._sounds.setdefault(key, []).append(word)
+        self._memo = {}
+        self.stats = {"tokens": 0, "corrected": 0}
+
+    def correct(self, token):
+        """Closest vocabulary word for `token`, or None if nothing is close enough."""
+        if token in self._memo:
+            return self._memo[token]
+        best = None
+        if len(token) >= MIN_LENGTH and token.isalpha():
+            limit = max_distance(token)
+            key = phonetic_key(token)
+            sounds_alike = set(self._sounds.get(key, ()))
+            candidates = set(sounds_alike)
+            for variant in _deletes(token, limit):
+                candidates.update(self._deleted.get(variant, ()))
+            ranked = []
+            for word in candidates:
+                distance = edit_distance(token, word, limit + 1)
+                same_sound = word in sounds_alike
+                if distance <= limit or (same_sound and distance <= limit + 1):
+                    # Sounding alike is worth one edit: "wether" -> "weather" beats "whether"-style neighbours
+                    ranked.append((distance - same_sound, -self.frequency[word], word))
+            if ranked:
+                best = min(ranked)[2]
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        self._memo[token] = best
+        return best
+
+    def normalize(self, text):
+        """`text` with every correctable out-of-vocabulary token replaced; known tokens are kept."""
+        words = text.split()
+        changed = False
+        for i, word in enumerate(words):
+            self.stats["tokens"] += 1
+            if word in self.vocabulary:
+                continue
+            corrected = self.correct(word)
+            if corrected:
+                words[i] = corrected
+                changed = True
+                self.stats["corrected"] += 1
+        return " ".join(words) if changed else text
+
@@ -0,0 +1,262 @@
+# === Resource Governor (graceful degradation under CPU / thermal pressure) ===
+# Head units throttle hard in summer heat. The governor samples pressure once a second (system CPU
+# busy, SoC temperature, its own wake-up lag, the timer wheel's lag behind the clock and the mean
+# latency of the CPU-bound turn stages) and steps through degradation levels:
+#   0 normal   everything on
+#   1 lean     no language detection while a language mode is locked; speculative prefetch and
+#              shadow intent evaluation paused
+#   2 reduced  + no fuzzy token matching; speech sent to STT at 8 kHz (less FLAC encoding and upload)
+#   3 minimal  + no language detection at all; uncached non-English replies use the local TTS engine
+# A level is raised after `up_after` samples at or over a limit and lowered one step at a time
+# after `down_after` calm samples (each signal under its own calm band), so it doesn't flap at the
+# threshold.
+# Emergency and safety paths are exempt: the distress keyword spotter, the distress regexes and
+# the safety monitor never degrade. Their lag is itself a pressure signal, so the
+# governor sheds the rest of the pipeline when they fall behind.
+#   JOEY_GOVERNOR=off | <level>     disable, or pin a level (for testing the degraded paths)
+#   python governor.py watch        live readings and the level they would produce
+#   python governor.py simulate     a heat-soak load profile through the level logic
+
+import argparse
+import glob
+import os
+import threading
+import time
+
+import eventlog
+import profiling
+
+LEVELS = ["normal", "lean", "reduced", "minimal"]
+# Feature -> the level from which it is switched to its cheap variant
+DEGRADATIONS = {
+    "skip_language_detection_in_mode": 1,
+    "no_prefetch": 1,
+    "no_shadow": 1,
+    "no_fuzzy": 2,
+    "low_rate_stt": 2,
+    "skip_language_detection": 3,
+    "cached_audio_only": 3,
+}
+# Pressure signal -> the value at which it counts as overloaded
+LIMITS = {
+    "cpu": 0.85, # Share of all cores busy
+    "temp_c": 80.0, # Hottest thermal zone
+    "lag": 0.1, # Seconds the governor woke up late (scheduler / GIL contention)
+    "safety_lag": 0.15, # Seconds the safety timer wheel is behind (3 ticks)
+    "match_intent": 0.05, # Mean seconds per call since the last sample
+    "detect_user_language": 0.08,
+}
+CALM = 0.7 # A sample is calm when every signal is below CALM * limit (or its CALM_LIMITS entry)
+# Signals that idle close to their limit get their own calm band: a SoC at a normal 55-65 C is not
+# under pressure, and a 56 C bar would keep a warm cabin at "minimal" for good
+CALM_LIMITS = {"temp_c": 72.0}
+STT_LOW_RATE = 8000
+
+
+# === Pressure Sensors ===
+
+class CpuSampler:
+    """System-wide busy share of all cores from /proc/stat deltas (load average elsewhere)."""
+
+    def __init__(self):
+        self._last = self._read()
+
+    @staticmethod
+    def _read():
+        try:
+            with open("/proc/stat") as f:
+                fields = [int(x) for x in f.readline().split()[1:]]
+            return fields[3] + fields[4], sum(fields) # idle + iowait, total
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def __call__(self):
+        current = self._read()
+        if current is None or self._last is None:
+            try:
+                return os.getloadavg()[0] / (os.cpu_count() or 1)
+            except (OSError, AttributeError):
+                return None
+        idle, total = current[0] - self._last[0], current[1] - self._last[1]
+        self._last = current
+        return 1.0 - idle / total if total > 0 else None
+
+
+def temperature():
+    """Hottest thermal zone in degrees C, or None where the kernel doesn't expose one."""
+    readings = []
+    for path in glob.glob("/sys/class/thermal/thermal_zone*/temp"):
+        try:
+            with open(path) as f:
+                readings.append(int(f.read().strip()) / 1000.0)
+        except (OSError, ValueError):
+            continue
+    return max(readings) if readings else None
+
+
+class StageLatency:
+    """Mean seconds per call of the counted hot paths (profiling.counters) since the last sample."""
+
+    def __init__(self, names):
+        self.names = names
+        self._last = {}
+
+    def __call__(self):
+        snapshot = profiling.counters.snapshot()
+        means = {}
+        for name in self.names:
+            calls, total, _ = snapshot.get(name, (0, 0.0, 0.0))
+            last_calls, last_total = self._last.get(name, (0, 0.0))
+            if calls > last_calls:
+                means[name] = (total - last_total) / (calls - last_calls)
+            self._last[name] = (calls, total)
+        return means
+
+
+# === Governor ===
+
+class Governor:
+    """Turns pressure samples into a degradation level; features ask degraded(name)."""
+
+    def __init__(self, limits=LIMITS, interval=1.0, up_after=2, down_after=10, safety_lag=None,
+                 pinned=None, on_change=None, calm_limits=CALM_LIMITS):
+        self.limits = dict(limits)
+        self.calm_limits = {name: calm_limits.get(name, CALM * limit) for name, limit in self.limits.items()}
+        self.interval = interval
+        self.up_after = up_after
+        self.down_after = down_after
+        self.safety_lag = safety_lag # Callable -> seconds the safety monitor is behind
+        self.pinned = pinned # Fixed level (None = adaptive)
+        self.on_change = on_change # Called with (old level, new level) on the governor thread
+        self.level = pinned or 0
+        self.readings = {}
+        self.pressure = 0.0
+        self.changes = 0
+        self._hot = 0 # Consecutive samples over a limit
+        self._calm = 0 # Consecutive calm samples
+        self._cpu = CpuSampler()
+        self._stages = StageLatency([name for name in limits if name not in ("cpu", "temp_c", "lag", "safety_lag")])
+        self._log = eventlog.get("governor")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def degraded(self, feature):
+        return self.level >= DEGRADATIONS[feature]
+
+    @property
+    def level_name(self):
+        return LEVELS[self.level]
+
+    def sample(self, lag=0.0):
+        readings = {"cpu": self._cpu(), "temp_c": temperature(), "lag": lag}
+        if self.safety_lag is not None:
+            readings["safety_lag"] = self.safety_lag()
+        readings.update(self._stages())
+        return {name: value for name, value in readings.items() if value is not None}
+
+    def step(self, readings):
+        """Feeds one sample through the hysteresis; returns the (possibly new) level."""
+        self.readings = readings
+        ratios = {name: value / self.limits[name] for name, value in readings.items() if name in self.limits}
+        self.pressure = max(ratios.values(), default=0.0)
+        if self.pinned is not None:
+            return self.level
+        if self.pressure >= 1.0:
+            self._hot, self._calm = self._hot + 1, 0
+        elif all(readings[name] < self.calm_limits[name] for name in ratios):
+            self._hot, self._calm = 0, self._calm + 1
+        else:
+            self._hot = self._calm = 0 # In between: hold the current level
+        if self._hot >= self.up_after and self.level < len(LEVELS) - 1:
+            self._set(self.level + 1, max(ratios, key=ratios.get))
+            self._hot = 0
+        elif self._calm >= self.down_after and self.level > 0:
+            self._set(self.level - 1, "calm")
+            self._calm = 0
+        return self.level
+
+    def _set(self, level, cause):
+        old, self.level = self.level, level
+        self.changes += 1
+        self._log.warning("level", level=LEVELS[level], previous=LEVELS[old], cause=cause,
+                          pressure=round(self.pressure, 2), **{k: round(v, 3) for k, v in self.readings.items()})
+        if self.on_change:
+            try:
+                self.on_change(old, level)
+            except Exception as e:
+                self._log.error("on_change_failed", error=str(e))
+
+    def _run(self):
+        expected = time.monotonic() + self.interval
+        while not self._stop.wait(max(0.0, expected - time.monotonic())):
+            lag = max(0.0, time.monotonic() - expected)
+            self.step(self.sample(lag))
+            expected = time.monotonic() + self.interval
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="governor", daemon=True)
+            self._thread.start()
+            mode = f"pinned at {self.level_name}" if self.pinned is not None else "adaptive"
+            print(f"[INFO] Resource governor running ({mode}).")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def status(self):
+        readings = ", ".join(f"{name} {value:.3g}" for name, value in sorted(self.readings.items()))
+        return f"level {self.level} ({self.level_name}), pressure {self.pressure:.2f}, {self.changes} changes; {readings}"
+
+
+def from_env(**kwargs):
+    """Governor configured by JOEY_GOVERNOR (unset = adaptive, 'off' = level 0 pinned, or a level number/name)."""
+    setting = os.environ.get("JOEY_GOVERNOR", "").strip().lower()
+    if setting in ("off", "0", "normal"):
+        return Governor(pinned=0, **kwargs)
+    if setting:
+        level = LEVELS.index(setting) if setting in LEVELS else int(setting)
+        return Governor(pinned=max(0, min(level, len(LEVELS) - 1)), **kwargs)
+    return Governor(**kwargs)
+
+
+# === Tools ===
+
+def simulate(seconds=200):
+    """A heat-soak profile (calm, sustained overload, slow cool-down) through the level logic."""
+    governor = Governor()
+    for t in range(seconds):
+        if t < 10:
+            cpu, temp = 0.4, 60.0
+        elif t < 50:
+            cpu, temp = 0.95, 60.0 + (t - 10) * 0.7 # Load, then the SoC heats up
+        else:
+            cpu, temp = 0.3, max(55.0, 88.0 - (t - 50) * 0.5) # Load gone; temperature lags behind
+        governor.step({"cpu": cpu, "temp_c": temp, "lag": 0.01, "safety_lag": 0.05})
+        if t % 5 == 0:
+            print(f"t={t:>4}s cpu {cpu:.2f} temp {temp:5.1f}C -> {governor.level_name}")
+    print(f"[Simulate] {governor.changes} level changes")
+
+
+def watch(interval=1.0):
+    governor = Governor(interval=interval)
+    try:
+        while True:
+            time.sleep(interval)
+            governor.step(governor.sample())
+            print(governor.status())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect Joey's resource governor.")
+    parser.add_argument("command", choices=["watch", "simulate"])
+    parser.add_argument("--seconds", type=int, default=200)
+    args = parser.parse_args()
+    if args.command == "watch":
+        watch()
+    else:
+        simulate(args.seconds)
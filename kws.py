@@ -0,0 +1,139 @@
+# === Emergency Keyword Spotting (no STT needed) ===
+# An on-device spotter for the multilingual distress vocabulary. It taps every conditioned
+# microphone frame (while waiting for the wake word AND while capturing an utterance) and calls
+# handle_emergency directly on a hit, so an emergency is detected even with the network down.
+# In the default in-process mode the microphone is only open inside app.listen(), so nothing is
+# spotted while Joey speaks or handles a turn; with JOEY_PIPELINE=multiprocess it runs on its own
+# capture process and never stops listening.
+# It reuses the wake-word template matcher (log-mel + subsequence DTW) with its own templates:
+#   python wakeword.py enroll emergency_bachao
+# Measure it on recordings before trusting it in a vehicle:
+#   python kws.py evaluate <noise_dir> [<keyword_dir>]
+# which reports false alarms per hour of cabin noise and detection rate / latency for keyword
+# clips mixed into that noise.
+
+import os
+import sys
+import time
+
+import numpy as np
+
+import wakeword
+
+# label -> what to say when enrolling (the spoken forms handle_distress_signal's regexes look for)
+DISTRESS_VOCABULARY = {
+    "emergency_help": "help me",
+    "emergency_sos": "S O S",
+    "emergency_madad": "mujhe madad chahiye", # Hindi / Urdu
+    "emergency_bachao": "bachao", # Hindi / Bengali
+    "emergency_ayuda": "necesito ayuda", # Spanish
+    "emergency_medical": "medical emergency",
+    "emergency_fire": "fire emergency",
+}
+
+
+class DistressDetected(Exception):
+    """Raised from the audio path when a distress keyword is spotted."""
+
+    def __init__(self, label):
+        super().__init__(label)
+        self.label = label
+
+
+class DistressSpotter(wakeword.WakeWordDetector):
+    """Wake-word detector restricted to the emergency_* templates, used as a frame tap."""
+
+    def __init__(self, templates=None, threshold=0.25, **kwargs):
+        if templates is None:
+            templates = wakeword.load_templates()
+        templates = {label: t for label, t in templates.items() if wakeword.is_emergency(label)}
+        super().__init__(templates=templates, threshold=threshold, **kwargs)
+
+    @property
+    def enabled(self):
+        return bool(self.templates)
+
+    def tap(self, frame_bytes):
+        """Frame tap for ConditionedSource: raises DistressDetected on a hit."""
+        label = self.process(frame_bytes)
+        if label:
+            raise DistressDetected(label)
+
+
+# === Evaluation ===
+
+def _stream(spotter, samples, chunk=480):
+    """Feeds samples through the spotter; returns [(label, time_of_detection_seconds), ...]."""
+    spotter.reset()
+    hits = []
+    for i in range(0, len(samples) - chunk + 1, chunk):
+        label = spotter.process(samples[i:i + chunk].tobytes())
+        if label:
+            hits.append((label, (i + chunk) / wakeword.SAMPLE_RATE))
+    return hits
+
+
+def _wavs(directory):
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(".wav")]
+
+
+def false_alarm_rate(spotter, noise_dir):
+    """Detections per hour over a corpus of keyword-free recordings (cabin noise, chatter, radio)."""
+    total_seconds, alarms, cpu = 0.0, 0, 0.0
+    for path in _wavs(noise_dir):
+        samples = wakeword.load_wav(path)
+        start = time.process_time()
+        alarms += len(_stream(spotter, samples))
+        cpu += time.process_time() - start
+        total_seconds += len(samples) / wakeword.SAMPLE_RATE
+    hours = total_seconds / 3600.0
+    return {"hours": round(hours, 3), "false_alarms": alarms,
+            "false_alarms_per_hour": round(alarms / hours, 2) if hours else None,
+            "real_time_factor": round(cpu / total_seconds, 4) if total_seconds else None}
+
+
+def detection_latency(spotter, keyword_dir, noise_dir, snr_db=5.0, seed=0):
+    """
+    Mixes each keyword clip into a random stretch of the noise corpus at `snr_db` and measures
+    the detection rate and the delay from keyword end to detection.
+    """
+    rng = np.random.default_rng(seed)
+    noise = np.concatenate([wakeword.load_wav(p) for p in _wavs(noise_dir)]).astype(np.float32)
+    latencies, detected, total = [], 0, 0
+    for path in _wavs(keyword_dir):
+        keyword = wakeword.load_wav(path).astype(np.float32)
+        lead = wakeword.SAMPLE_RATE # 1 s of noise before the keyword, 1 s after
+        length = len(keyword) + 2 * lead
+        offset = int(rng.integers(0, max(1, len(noise) - length)))
+        background = noise[offset:offset + length].copy()
+        # Scale the keyword so keyword power / noise power matches the requested SNR
+        gain = np.sqrt(np.mean(background ** 2) * 10 ** (snr_db / 10) / (np.mean(keyword ** 2) + 1e-9))
+        mix = background
+        mix[lead:lead + len(keyword)] += keyword * gain
+        hits = _stream(spotter, np.clip(mix, -32768, 32767).astype(np.int16))
+        total += 1
+        keyword_end = (lead + len(keyword)) / wakeword.SAMPLE_RATE
+        after_start = [t for _, t in hits if t >= lead / wakeword.SAMPLE_RATE]
+        if after_start:
+            detected += 1
+            latencies.append(max(0.0, after_start[0] - keyword_end))
+    return {"clips": total, "detection_rate": round(detected / total, 3) if total else None,
+            "latency_p50": round(float(np.percentile(latencies, 50)), 3) if latencies else None,
+            "latency_p95": round(float(np.percentile(latencies, 95)), 3) if latencies else None}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "evaluate":
+        spotter = DistressSpotter()
+        if not spotter.enabled:
+            print("No emergency_* templates enrolled. Enroll with: python wakeword.py enroll emergency_bachao")
+            sys.exit(1)
+        print(f"Templates: {', '.join(sorted(spotter.templates))}")
+        print("False alarms:", false_alarm_rate(spotter, sys.argv[2]))
+        if len(sys.argv) >= 4:
+            print("Detection:", detection_latency(spotter, sys.argv[3], sys.argv[2]))
+    else:
+        print("Usage: python kws.py evaluate <noise_dir> [<keyword_dir>]")
+        print("Vocabulary to enroll (python wakeword.py enroll <label>):")
+        for label, phrase in DISTRESS_VOCABULARY.items():
+            print(f"  {label:<20} say: '{phrase}'")
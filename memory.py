@@ -0,0 +1,167 @@
+# === Memory Profile (default / low-memory embedded) ===
+# Picks cache budgets and model precision for the device Joey runs on:
+#   JOEY_PROFILE=low_memory python app.py     (512 MB head units)
+# Every cache in the process is a BoundedCache with a hard byte budget from the active profile,
+# and `python app.py memory-report` breaks resident memory down by component.
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+PROFILES = {
+    "default": {
+        "intent_dtype": np.float64,
+        "audio_cache_bytes": 8 * 1024 * 1024,
+        "translation_memo_bytes": 1024 * 1024,
+        "external_cache_bytes": 256 * 1024,
+        "prefetch_items": 25,
+        "mt_model_bytes": 320 * 1024 * 1024, # Loaded int8 translation models, ~75-80 MB each
+    },
+    "low_memory": {
+        "intent_dtype": np.float32, # Half the index size; scores differ by ~1e-7
+        "audio_cache_bytes": 1024 * 1024, # ~4-6 short replies
+        "translation_memo_bytes": 128 * 1024,
+        "external_cache_bytes": 32 * 1024,
+        "prefetch_items": 5,
+        "mt_model_bytes": 96 * 1024 * 1024, # One model at a time
+    },
+}
+PROFILE_NAME = os.environ.get("JOEY_PROFILE", "default")
+if PROFILE_NAME not in PROFILES:
+    print(f"[Memory] Unknown profile '{PROFILE_NAME}', using default.")
+    PROFILE_NAME = "default"
+profile = PROFILES[PROFILE_NAME]
+
+
+def text_size(value):
+    """Approximate footprint of a cached string (UTF-8 bytes + object overhead)."""
+    return len(value.encode("utf-8")) + 64 if isinstance(value, str) else sys.getsizeof(value)
+
+
+class BoundedCache:
+    """Thread-safe LRU bounded by total bytes (as measured by `sizeof`), not by entry count."""
+
+    def __init__(self, max_bytes, sizeof=len, name="cache"):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.name = name
+        self.total_bytes = 0
+        self.evictions = 0
+        self._items = OrderedDict() # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return default
+            self._items.move_to_end(key)
+            return entry[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def put(self, key, value):
+        if value is None:
+            return
+        size = self.sizeof(value) + sys.getsizeof(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self._items[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.total_bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        return {"entries": len(self._items), "bytes": self.total_bytes, "budget": self.max_bytes, "evictions": self.evictions}
+
+
+# === Memory Report ===
+
+def rss_bytes():
+    """Current resident set size (Linux /proc, else peak RSS from resource)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return 0
+
+
+def deep_sizeof(obj, _seen=None):
+    """Approximate bytes held by an object graph (containers, numpy buffers, plain objects)."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+    if isinstance(obj, BoundedCache):
+        return obj.total_bytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict) or hasattr(obj, "items") and callable(obj.items):
+        try:
+            return size + sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+        except Exception:
+            return size
+    if isinstance(obj, (list, tuple, set, frozenset)) or type(obj).__name__ == "deque":
+        return size + sum(deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+def library_footprint(prefixes=("pygame", "sklearn", "scipy", "numpy", "deep_translator", "gtts", "langdetect", "pyttsx3", "speech_recognition", "requests", "ctranslate2", "sentencepiece")):
+    """Which heavy libraries are resident (imported), with their loaded module counts."""
+    counts = {}
+    for name in list(sys.modules):
+        top = name.split(".")[0]
+        if top in prefixes:
+            counts[top] = counts.get(top, 0) + 1
+    return counts
+
+
+def memory_report(components):
+    """Resident size broken down by `components` ({name: object}); the rest is interpreter + libraries."""
+    rss = rss_bytes()
+    seen = set() # Shared, so objects referenced by several components are counted once (first one wins)
+    rows = sorted(((name, deep_sizeof(obj, seen)) for name, obj in components.items()), key=lambda row: -row[1])
+    accounted = sum(size for _, size in rows)
+    lines = [f"[Memory] Profile '{PROFILE_NAME}', resident {rss / 2**20:.1f} MB"]
+    for name, size in rows:
+        lines.append(f"  {name:<24}{size / 1024:>10.1f} KB")
+    lines.append(f"  {'interpreter + libraries':<24}{max(0, rss - accounted) / 1024:>10.1f} KB")
+    libraries = library_footprint()
+    if libraries:
+        lines.append("  resident libraries: " + ", ".join(f"{lib} ({n} modules)" for lib, n in sorted(libraries.items())))
+    return "\n".join(lines)
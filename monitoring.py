@@ -0,0 +1,342 @@
+# === Safety Monitoring (timer wheel + declarative rules over a sensor ring) ===
+# Driving-safety checks run off the dialogue loop on one scheduler thread:
+#   - sensor readings go into a preallocated NumPy ring per channel (speed, signal, heart rate, ...)
+#   - a hashed timer wheel runs the pollers and evaluates every rule at a fixed rate, so CPU cost is
+#     bounded by (rules x evaluation rate), not by how fast the sensors produce samples
+#   - each rule is declarative: channel, comparison, threshold, window + reducer, hysteresis,
+#     cooldown and severity; rules sharing a (channel, window, reducer) share one NumPy reduction
+#   - alerts are queued by severity and delivered on their own thread, so a slow TTS call never
+#     delays evaluation and the turn loop is never blocked.
+
+import itertools
+import queue
+import threading
+import time
+
+import numpy as np
+
+SIGNAL_CODES = {"green": 0.0, "yellow": 1.0, "red": 2.0} # Traffic signal as a numeric channel
+INFO, WARNING, CRITICAL = "info", "warning", "critical"
+SEVERITY_RANK = {CRITICAL: 0, WARNING: 1, INFO: 2} # Delivery order when alerts queue up
+OPS = (">", ">=", "<", "<=")
+REDUCERS = {"last": None, "mean": np.mean, "max": np.max, "min": np.min}
+
+
+# === Sensor Ring ===
+
+class SensorRing:
+    """
+    Preallocated ring of (timestamp, value) per channel. Each sample is written twice (at i and
+    i + capacity), so the latest n samples are always one contiguous slice: windows are zero-copy views,
+    valid until `capacity` more samples arrive on that channel.
+    """
+
+    def __init__(self, channels, capacity=4096, dtype=np.float64):
+        self.channels = tuple(channels)
+        self.capacity = capacity
+        self._row = {channel: i for i, channel in enumerate(self.channels)}
+        self._t = np.zeros((len(self.channels), 2 * capacity))
+        self._v = np.zeros((len(self.channels), 2 * capacity), dtype)
+        self._head = [0] * len(self.channels) # Next write position, in [0, capacity)
+        self._count = [0] * len(self.channels)
+        self._lock = threading.Lock()
+
+    def push(self, channel, t, value):
+        row = self._row[channel]
+        with self._lock:
+            h = self._head[row]
+            self._t[row, h] = self._t[row, h + self.capacity] = t
+            self._v[row, h] = self._v[row, h + self.capacity] = value
+            self._head[row] = (h + 1) % self.capacity
+            self._count[row] = min(self._count[row] + 1, self.capacity)
+
+    def push_many(self, channel, t, values):
+        """Appends a batch of samples (arrays in time order) with at most two slice copies per half."""
+        n = len(t)
+        if n == 0:
+            return
+        if n > self.capacity: # Only the newest `capacity` samples would survive anyway
+            t, values, n = t[-self.capacity:], values[-self.capacity:], self.capacity
+        row = self._row[channel]
+        with self._lock:
+            h = self._head[row]
+            first = min(n, self.capacity - h) # Up to the end of the ring, the rest wraps to the start
+            for offset in (0, self.capacity):
+                self._t[row, offset + h:offset + h + first] = t[:first]
+                self._v[row, offset + h:offset + h + first] = values[:first]
+                self._t[row, offset:offset + n - first] = t[first:]
+                self._v[row, offset:offset + n - first] = values[first:]
+            self._head[row] = (h + n) % self.capacity
+            self._count[row] = min(self._count[row] + n, self.capacity)
+
+    def last(self, channel, n=None):
+        """(timestamps, values) views of the latest n samples (all buffered ones if n is None), oldest first."""
+        row = self._row[channel]
+        with self._lock:
+            count = self._count[row] if n is None else min(n, self._count[row])
+            end = self._head[row] + self.capacity
+        return self._t[row, end - count:end], self._v[row, end - count:end]
+
+    def window(self, channel, seconds, now):
+        """(timestamps, values) views of the samples in (now - seconds, now]."""
+        t, v = self.last(channel)
+        start = np.searchsorted(t, now - seconds, side="right")
+        return t[start:], v[start:]
+
+    def latest(self, channel):
+        """(timestamp, value) of the newest sample, or (None, nan) if the channel is empty."""
+        t, v = self.last(channel, 1)
+        return (t[0], v[0]) if len(t) else (None, np.nan)
+
+
+# === Rules ===
+
+class Rule:
+    """
+    Fires when `reduce` over the last `window` seconds of `channel` compares true against `threshold`
+    (window 0 = newest sample). It stays active until the value moves `hysteresis` back past the
+    threshold, and re-alerts at most once per `cooldown` seconds while active.
+    """
+    __slots__ = ("name", "channel", "op", "threshold", "window", "reduce", "hysteresis", "cooldown", "severity", "message")
+
+    def __init__(self, name, channel, op, threshold, window=0.0, reduce="last", hysteresis=0.0,
+                 cooldown=30.0, severity=WARNING, message=None):
+        if op not in OPS:
+            raise ValueError(f"Unknown comparison '{op}' for rule {name}")
+        if reduce not in REDUCERS:
+            raise ValueError(f"Unknown reducer '{reduce}' for rule {name}")
+        if severity not in SEVERITY_RANK:
+            raise ValueError(f"Unknown severity '{severity}' for rule {name}")
+        self.name = name
+        self.channel = channel
+        self.op = op
+        self.threshold = threshold
+        self.window = window if reduce != "last" else 0.0
+        self.reduce = reduce
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+        self.severity = severity
+        self.message = message or name # Response key spoken for the alert
+
+    def __repr__(self):
+        return f"Rule({self.name}: {self.reduce}({self.channel}, {self.window}s) {self.op} {self.threshold})"
+
+
+DEFAULT_RULES = [
+    Rule("speeding", "speed", ">", 60, window=3.0, reduce="mean", hysteresis=5, cooldown=120,
+         severity=WARNING, message="speeding_warning"), # km/h, smoothed so one noisy reading doesn't nag
+    Rule("red_light", "signal", ">=", SIGNAL_CODES["red"], cooldown=15, severity=CRITICAL, message="red_light_warning"),
+    Rule("heart_rate_high", "heart_rate", ">", 120, window=10.0, reduce="mean", hysteresis=10, cooldown=60,
+         severity=CRITICAL, message="heart_rate_warning"),
+]
+
+
+class RulesEngine:
+    """Evaluates all rules at once: one reduction per distinct (channel, window, reducer), then vector compares."""
+
+    def __init__(self, rules, ring, stale_after=5.0):
+        self.rules = list(rules)
+        self.ring = ring
+        self.stale_after = stale_after # Older data is treated as missing; a dead sensor can't keep alerting
+        self.threshold = np.array([r.threshold for r in self.rules], dtype=np.float64)
+        self.sign = np.array([1.0 if r.op in (">", ">=") else -1.0 for r in self.rules]) # "<" rules are negated ">" rules
+        self.inclusive = np.array([r.op in (">=", "<=") for r in self.rules])
+        self.hysteresis = np.array([r.hysteresis for r in self.rules], dtype=np.float64)
+        self.cooldown = np.array([r.cooldown for r in self.rules], dtype=np.float64)
+        self.active = np.zeros(len(self.rules), dtype=bool)
+        self.last_alert = np.full(len(self.rules), -np.inf)
+        self.groups = {} # (channel, window, reduce) -> rule indices
+        for i, rule in enumerate(self.rules):
+            self.groups.setdefault((rule.channel, rule.window, rule.reduce), []).append(i)
+        self.groups = {key: np.array(rows) for key, rows in self.groups.items()}
+
+    def statistic(self, channel, window, reduce, now):
+        t, v = self.ring.last(channel, 1)
+        if not len(t) or now - t[0] > self.stale_after:
+            return np.nan
+        if reduce == "last":
+            return v[0]
+        _, v = self.ring.window(channel, window, now)
+        return REDUCERS[reduce](v) if len(v) else np.nan
+
+    def evaluate(self, now):
+        """Updates rule states; returns [(rule, value)] for the alerts due at `now`."""
+        values = np.full(len(self.rules), np.nan)
+        for (channel, window, reduce), rows in self.groups.items():
+            values[rows] = self.statistic(channel, window, reduce, now)
+        valid = ~np.isnan(values)
+        x, limit = self.sign * values, self.sign * self.threshold
+        with np.errstate(invalid="ignore"):
+            over = valid & np.where(self.inclusive, x >= limit, x > limit)
+            back = valid & np.where(self.inclusive, x < limit - self.hysteresis, x <= limit - self.hysteresis)
+        self.active = (self.active | over) & ~back
+        due = np.flatnonzero(self.active & (now - self.last_alert >= self.cooldown))
+        self.last_alert[due] = now
+        return [(self.rules[i], values[i]) for i in due]
+
+
+# === Timer Wheel ===
+
+class Timer:
+    __slots__ = ("fn", "interval", "name", "rounds", "cancelled")
+
+    def __init__(self, fn, interval=None, name=None):
+        self.fn = fn
+        self.interval = interval # Seconds between runs for periodic timers, None for one-shot
+        self.name = name or getattr(fn, "__name__", "timer")
+        self.rounds = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: schedule/cancel are O(1) and each tick only touches one slot.
+    Callbacks get the tick time (not the wall clock), so replaying recorded data is deterministic.
+    """
+
+    def __init__(self, tick=0.05, slots=256, clock=time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self.slots = [[] for _ in range(slots)]
+        self.overruns = 0 # Ticks whose callbacks took longer than the tick itself
+        self._origin = clock()
+        self._ticks = 0 # Ticks processed since origin (integer, so long runs don't drift)
+        self._cursor = 0
+        self.now = self._origin # Time of the last processed tick
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def lag(self):
+        """Seconds the last processed tick trails the clock beyond one tick (None while stopped)."""
+        if self._thread is None:
+            return None
+        return max(0.0, self.clock() - self.now - self.tick)
+
+    def _insert(self, timer, delay):
+        ticks = max(1, int(round(delay / self.tick)))
+        timer.rounds = (ticks - 1) // len(self.slots)
+        self.slots[(self._cursor + ticks) % len(self.slots)].append(timer)
+
+    def schedule(self, delay, fn, interval=None, name=None):
+        """Runs fn(now) after `delay` seconds, then every `interval` seconds if given. Returns the Timer."""
+        timer = Timer(fn, interval, name)
+        with self._lock:
+            self._insert(timer, delay)
+        return timer
+
+    def advance(self, now):
+        """Processes every tick up to `now` and runs the timers that came due."""
+        due = []
+        with self._lock:
+            while self._origin + (self._ticks + 1) * self.tick <= now + 1e-9:
+                self._ticks += 1
+                self.now = self._origin + self._ticks * self.tick
+                self._cursor = (self._cursor + 1) % len(self.slots)
+                bucket, self.slots[self._cursor] = self.slots[self._cursor], []
+                for timer in bucket:
+                    if timer.cancelled:
+                        continue
+                    if timer.rounds:
+                        timer.rounds -= 1
+                        self.slots[self._cursor].append(timer)
+                        continue
+                    due.append((timer, self.now))
+                    if timer.interval:
+                        self._insert(timer, timer.interval)
+        for timer, at in due:
+            try:
+                timer.fn(at)
+            except Exception as e:
+                print(f"[Monitor Error] {timer.name}: {e}")
+        return len(due)
+
+    def _run(self):
+        while not self._stop.wait(self.tick):
+            started = time.perf_counter()
+            self.advance(self.clock())
+            if time.perf_counter() - started > self.tick:
+                self.overruns += 1
+
+    def start(self):
+        if self._thread is None:
+            with self._lock:
+                self._origin = self.clock() - self._ticks * self.tick # Timers scheduled before start keep their delays
+            self._thread = threading.Thread(target=self._run, name="timer-wheel", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+
+# === Safety Monitor ===
+
+class SafetyMonitor:
+    """
+    Ring + rules + timer wheel + alert delivery. `alert(rule, value)` is called on the alert thread,
+    highest severity first; an alert still queued after its rule's cooldown is dropped as stale.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, alert=None, ring=None, tick=0.05, evaluate_every=0.2,
+                 stale_after=5.0, clock=time.monotonic):
+        self.rules = list(rules)
+        self.evaluate_every = evaluate_every
+        self.ring = ring or SensorRing(sorted({rule.channel for rule in self.rules}))
+        self.engine = RulesEngine(self.rules, self.ring, stale_after)
+        self.wheel = TimerWheel(tick, clock=clock)
+        self.alert = alert or (lambda rule, value: print(f"[Monitor] {rule.severity.upper()}: {rule.name} ({value:.1f})"))
+        self.alerts = queue.PriorityQueue() # (severity rank, seq, rule, value, raised at)
+        self.raised = 0
+        self._seq = itertools.count()
+        self._deliverer = None
+        self.wheel.schedule(evaluate_every, self.evaluate, interval=evaluate_every, name="evaluate rules")
+
+    def poll(self, channel, read, interval):
+        """Samples read() into `channel` every `interval` seconds (None readings are skipped)."""
+        def sample(now):
+            value = read()
+            if value is not None:
+                self.ring.push(channel, now, value)
+        return self.wheel.schedule(interval, sample, interval=interval, name=f"poll {channel}")
+
+    def push(self, channel, value, t=None):
+        """Records a reading from a pushed source (timestamps on the wheel's clock)."""
+        self.ring.push(channel, self.wheel.clock() if t is None else t, value)
+
+    def evaluate(self, now):
+        for rule, value in self.engine.evaluate(now):
+            self.raised += 1
+            self.alerts.put((SEVERITY_RANK[rule.severity], next(self._seq), rule, value, now))
+
+    def _deliver(self):
+        while True:
+            _, _, rule, value, raised_at = self.alerts.get()
+            if rule is None:
+                return
+            if self.wheel.clock() - raised_at > rule.cooldown:
+                continue # Superseded: the rule will re-alert if the condition still holds
+            try:
+                self.alert(rule, value)
+            except Exception as e:
+                print(f"[Monitor Error] Alert {rule.name}: {e}")
+
+    def start(self):
+        if self._deliverer is None:
+            self._deliverer = threading.Thread(target=self._deliver, name="safety-alerts", daemon=True)
+            self._deliverer.start()
+        self.wheel.start()
+        print(f"[INFO] Safety monitor running: {len(self.rules)} rules, evaluated every {self.evaluate_every}s.")
+
+    def stop(self):
+        self.wheel.stop()
+        if self._deliverer is not None:
+            self.alerts.put((-1, -1, None, None, None))
+            self._deliverer.join(timeout=1.0)
+            self._deliverer = None
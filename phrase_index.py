@@ -0,0 +1,317 @@
+# === Multilingual Intent Phrase Index ===
+# The intents catalogue is written in English. Instead of translating every non-English turn
+# back to English before classifying it, the catalogue is expanded ONCE, offline, into every
+# language in LANGUAGE_CODES (plus romanized Hinglish) and each language gets its own index:
+#   python app.py build-phrases    (needs the network once; stored in translation_cache.json)
+# English keeps the word-level TF-IDF index. Other languages use a char n-gram analyzer, which
+# works the same for Devanagari, Arabic, Bengali or Latin script and tolerates spelling variants.
+# At runtime a non-English turn is one sparse dot product against its language's index.
+# The TF-IDF model is plain NumPy (same weighting as sklearn's TfidfVectorizer defaults): a sorted
+# term array instead of a vocabulary dict, posting lists per term, and a top-k heap over only the
+# phrases that share a term with the input, so no dense score row is ever built.
+# Latin-script turns (English and Hinglish) also go through fuzzy.FuzzyNormalizer: tokens the
+# catalogue doesn't know are mapped to the nearest catalogue word (phonetic key / edit distance)
+# and the turn is rescored, so STT mishearings still clear the threshold. langdetect mislabels short
+# English ("call police" -> it, "help me" -> nl), so a Latin-script turn is scored against English
+# (and Hinglish, unless it was detected as English) as well as its detected language's index, and
+# the best match wins. Tags in EXACT_ONLY_TAGS
+# (emergency_call) only ever come from the unmodified turn: "dancer" or "anger" corrected to
+# "danger", or "urgently" to "urgent", would otherwise start the distress flow.
+
+import heapq
+import re
+from collections import Counter
+
+import numpy as np
+
+import eventlog
+from fuzzy import FuzzyNormalizer
+from response_table import load_translation_cache, save_translation_cache
+from translation import BatchTranslator, GoogleBackend
+
+HINGLISH = "hi-Latn" # Romanized Hindi, derived locally from the Hindi expansion
+EXACT_ONLY_TAGS = frozenset({"emergency_call"}) # Fuzzy rescoring never selects or boosts these
+
+phrases_log = eventlog.get("phrases")
+
+# Unicode block -> language whose index handles that script (Latin goes by the detected language)
+SCRIPT_LANGUAGES = (
+    (0x0900, 0x097F, 'hi'), # Devanagari
+    (0x0980, 0x09FF, 'bn'), # Bengali
+    (0x0600, 0x06FF, 'ur'), # Arabic script (Urdu unless langdetect says Arabic)
+    (0x0400, 0x04FF, 'ru'), # Cyrillic
+    (0x3040, 0x30FF, 'ja'), # Hiragana / Katakana
+    (0xAC00, 0xD7AF, 'ko'), # Hangul
+    (0x4E00, 0x9FFF, 'zh-CN'), # CJK ideographs
+)
+
+
+def script_language(text):
+    """Language index implied by the first non-Latin letter in `text`, or None for Latin script."""
+    for ch in text:
+        code = ord(ch)
+        if code < 0x0250: # ASCII / Latin-1 / Latin Extended
+            continue
+        for low, high, lang in SCRIPT_LANGUAGES:
+            if low <= code <= high:
+                return lang
+    return None
+
+
+# === Hinglish (Devanagari -> Latin) ===
+_VOWELS = {'अ': 'a', 'आ': 'aa', 'इ': 'i', 'ई': 'ee', 'उ': 'u', 'ऊ': 'oo', 'ऋ': 'ri', 'ए': 'e', 'ऐ': 'ai', 'ओ': 'o', 'औ': 'au'}
+_MATRAS = {'ा': 'a', 'ि': 'i', 'ी': 'i', 'ु': 'u', 'ू': 'u', 'ृ': 'ri', 'े': 'e', 'ै': 'ai', 'ो': 'o', 'ौ': 'au', 'ॉ': 'o'}
+_CONSONANTS = {
+    'क': 'k', 'ख': 'kh', 'ग': 'g', 'घ': 'gh', 'ङ': 'n', 'च': 'ch', 'छ': 'chh', 'ज': 'j', 'झ': 'jh', 'ञ': 'n',
+    'ट': 't', 'ठ': 'th', 'ड': 'd', 'ढ': 'dh', 'ण': 'n', 'त': 't', 'थ': 'th', 'द': 'd', 'ध': 'dh', 'न': 'n',
+    'प': 'p', 'फ': 'ph', 'ब': 'b', 'भ': 'bh', 'म': 'm', 'य': 'y', 'र': 'r', 'ल': 'l', 'व': 'v', 'श': 'sh',
+    'ष': 'sh', 'स': 's', 'ह': 'h', 'क़': 'q', 'ख़': 'kh', 'ग़': 'g', 'ज़': 'z', 'ड़': 'd', 'ढ़': 'rh', 'फ़': 'f',
+}
+_NUKTA, _VIRAMA = '़', '्'
+_NASALS = {'ं': 'n', 'ँ': 'n', 'ः': 'h'}
+
+
+def romanize_hindi(text):
+    """
+    Rough Devanagari -> Hinglish transliteration ("समय क्या है" -> "samay kya hai"), the way
+    people type Hindi in Latin script. Drops the inherent 'a' at word ends (schwa deletion).
+    """
+    out = []
+    chars = list(text)
+    i = 0
+    while i < len(chars):
+        ch = chars[i]
+        if i + 1 < len(chars) and chars[i + 1] == _NUKTA: # Precomposed form of a nukta consonant
+            ch += _NUKTA
+            i += 1
+        if ch in _CONSONANTS:
+            out.append(_CONSONANTS[ch])
+            nxt = chars[i + 1] if i + 1 < len(chars) else ''
+            if nxt in _MATRAS:
+                out.append(_MATRAS[nxt])
+                i += 1
+            elif nxt == _VIRAMA:
+                i += 1
+            elif nxt.isalpha() or nxt in _NASALS: # Inherent vowel, except at the end of a word
+                out.append('a')
+        elif ch in _VOWELS:
+            out.append(_VOWELS[ch])
+        elif ch in _NASALS:
+            out.append(_NASALS[ch])
+        elif ch not in _MATRAS and ch != _VIRAMA:
+            out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+# === Catalogue ===
+
+def catalogue(intents):
+    """(phrases, tags) the indexes are built from: every intent phrase, in English."""
+    phrases, tags = [], []
+    for tag, intent_phrases in intents.items():
+        if tag != "set_language_mode": # Mode phrases are primarily regex handled
+            phrases.extend(intent_phrases)
+            tags.extend([tag] * len(intent_phrases))
+        else:
+            # For language mode intent, add some general phrases for the index fallback
+            phrases.extend(["change language", "switch language", "set language"])
+            tags.extend([tag] * 3)
+    return phrases, tags
+
+
+# === Build Stage (offline) ===
+
+def expand_phrases(phrases, languages, translate_many, cache=None):
+    """
+    Translates every English phrase into each language, reusing and filling `cache`
+    ({lang: {english: translated}}). `translate_many(texts, lang)` returns the translations in
+    order (None where one failed). Returns (cache, number of new translations).
+    """
+    cache = {} if cache is None else cache
+    added = 0
+    unique = list(dict.fromkeys(phrases)) # In catalogue order
+    for lang in sorted(set(languages) - {'en'}):
+        entries = cache.setdefault(lang, {})
+        missing = [phrase for phrase in unique if phrase not in entries]
+        for phrase, translated in zip(missing, translate_many(missing, lang) if missing else []):
+            if translated:
+                entries[phrase] = translated
+                added += 1
+        phrases_log.info("expanded", lang=lang, phrases=sum(p in entries for p in unique), total=len(unique))
+    return cache, added
+
+
+def build(phrases, languages):
+    """`python app.py build-phrases`: expands the catalogue with Google Translate into the shared cache."""
+    from deep_translator import GoogleTranslator
+    # Batched: a few requests of ~50 phrases per language instead of one request per phrase
+    translator = BatchTranslator(GoogleBackend(lambda target: GoogleTranslator(source='en', target=target)), workers=2)
+    cache, added = expand_phrases(phrases, languages, translator.translate_many, load_translation_cache())
+    translator.close()
+    save_translation_cache(cache)
+    phrases_log.info("saved", added=added)
+
+
+# === Runtime Index ===
+
+WORD_PATTERN = re.compile(r"(?u)\b\w\w+\b") # sklearn's default token pattern
+
+
+def word_terms(text):
+    return WORD_PATTERN.findall(text.lower())
+
+
+def char_wb_terms(text, ngram_range=(2, 4)):
+    """Character n-grams inside word boundaries (each word padded with spaces), like sklearn's char_wb."""
+    min_n, max_n = ngram_range
+    terms = []
+    for word in text.lower().split():
+        word = f" {word} "
+        for n in range(min_n, max_n + 1):
+            if n >= len(word):
+                terms.append(word) # A short word counts once, whole
+                break
+            terms.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return terms
+
+
+class PhraseIndex:
+    """
+    TF-IDF index over one language's phrases (smoothed idf, l2-normalized rows, so cosine is a
+    dot product). Stored column-wise: for each term, the phrases containing it and their weights.
+    """
+
+    def __init__(self, phrases, tags, analyzer=word_terms, dtype=np.float64):
+        self.tags = list(tags)
+        self.analyzer = analyzer
+        counts = [Counter(analyzer(p)) for p in phrases]
+        vocab = sorted(set().union(*counts))
+        term_ids = {term: i for i, term in enumerate(vocab)} # Build-time only
+        self.terms = np.array(vocab) # Compact fixed-width strings, searched with searchsorted
+        df = np.zeros(len(vocab))
+        for c in counts:
+            df[[term_ids[t] for t in c]] += 1
+        self.idf = (np.log((1 + len(phrases)) / (1 + df)) + 1).astype(dtype)
+
+        postings = [[] for _ in vocab] # term -> [(phrase row, weight), ...]
+        for row, c in enumerate(counts):
+            ids = np.array([term_ids[t] for t in c], dtype=np.int64)
+            if not len(ids):
+                continue
+            weights = np.array(list(c.values()), dtype=np.float64) * self.idf[ids]
+            weights /= np.linalg.norm(weights)
+            for term, weight in zip(ids, weights):
+                postings[term].append((row, weight))
+        row_dtype = np.int16 if len(phrases) < 2**15 else np.int32
+        self.indptr = np.cumsum([0] + [len(p) for p in postings]).astype(np.int32)
+        self.rows = np.array([row for p in postings for row, _ in p], dtype=row_dtype)
+        self.weights = np.array([w for p in postings for _, w in p], dtype=dtype)
+
+    def _query(self, text):
+        """Known term ids of `text` and their l2-normalized tf-idf weights."""
+        counts = Counter(self.analyzer(text))
+        if not counts or not len(self.terms):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        terms = np.array(list(counts))
+        ids = np.minimum(np.searchsorted(self.terms, terms), len(self.terms) - 1)
+        known = self.terms[ids] == terms
+        ids = ids[known]
+        weights = np.array(list(counts.values()), dtype=np.float64)[known] * self.idf[ids]
+        norm = np.linalg.norm(weights)
+        return ids, (weights / norm if norm else weights)
+
+    def top(self, text, k=3):
+        """[(tag, score), ...] for the k best phrases, touching only phrases that share a term."""
+        ids, weights = self._query(text)
+        if not len(ids):
+            return []
+        spans = [np.arange(self.indptr[i], self.indptr[i + 1]) for i in ids]
+        positions = np.concatenate(spans)
+        contributions = self.weights[positions] * np.repeat(weights, [len(s) for s in spans])
+        rows, inverse = np.unique(self.rows[positions], return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions) # Only the matched rows, not all phrases
+        best = heapq.nlargest(k, zip(scores, -rows.astype(np.int64))) # Ties go to the earlier phrase
+        return [(self.tags[-row], float(score)) for score, row in best]
+
+    def match(self, text):
+        best = self.top(text, k=1)
+        return best[0] if best else (self.tags[0], 0.0)
+
+
+def char_index(phrases, tags, dtype=np.float64):
+    # char_wb keeps n-grams inside word boundaries; (2, 4) covers short Hindi/Urdu words and inflections
+    return PhraseIndex(phrases, tags, analyzer=char_wb_terms, dtype=dtype)
+
+
+class MultilingualIntentIndex:
+    """
+    One index per language built from the English catalogue and its cached expansions.
+    Languages without a cached expansion simply have no index (the caller falls back to English).
+    `extra` (text, tag, language) triples are added to their language's index as they are, e.g.
+    labeled utterances in a k-fold evaluation (evaluate.py).
+    """
+
+    def __init__(self, phrases, tags, languages, cache=None, dtype=np.float64, fuzzy=True, extra=(),
+                 exact_tags=EXACT_ONLY_TAGS):
+        cache = load_translation_cache() if cache is None else cache
+        added = {}
+        for text, tag, lang in extra:
+            added.setdefault(lang or 'en', []).append((text.lower(), tag))
+        english = list(zip(phrases, tags)) + added.get('en', [])
+        self.indexes = {'en': PhraseIndex(*zip(*english), dtype=dtype)}
+        latin_phrases = [phrase for phrase, _ in english]
+        for lang in sorted((set(languages) | set(added)) - {'en', HINGLISH}):
+            entries = cache.get(lang, {})
+            pairs = [(entries[p].lower(), tag) for p, tag in zip(phrases, tags) if entries.get(p)] + added.get(lang, [])
+            if pairs:
+                self.indexes[lang] = char_index(*zip(*pairs), dtype=dtype)
+        if 'hi' in self.indexes or HINGLISH in added:
+            # Hinglish mixes romanized Hindi with English words ("time kya hai"), so index both
+            hindi = cache.get('hi', {})
+            pairs = [(romanize_hindi(hindi[p].lower()), tag) for p, tag in zip(phrases, tags) if hindi.get(p)]
+            pairs += added.get(HINGLISH, [])
+            latin_phrases += [phrase for phrase, _ in pairs]
+            pairs += english
+            self.indexes[HINGLISH] = char_index(*zip(*pairs), dtype=dtype)
+        self.normalizer = FuzzyNormalizer(latin_phrases) if fuzzy else None
+        self.fuzzy_enabled = fuzzy # Can be switched off at runtime (e.g. under CPU pressure)
+        self.exact_tags = frozenset(exact_tags)
+
+    @property
+    def languages(self):
+        return sorted(self.indexes)
+
+    def indexes_for(self, text, detected_lang=None):
+        """
+        Indexes to score a turn against: the one for its script, or for Latin script English first,
+        then Hinglish (langdetect has no label for romanized Hindi and guesses at random) and the
+        detected language, since the label alone is unreliable on short turns.
+        """
+        lang = script_language(text)
+        if lang == 'ur' and detected_lang == 'ar':
+            lang = 'ar'
+        if lang is not None:
+            return [lang if lang in self.indexes else 'en']
+        langs = ['en']
+        if detected_lang and detected_lang != 'en':
+            langs += [candidate for candidate in (HINGLISH, detected_lang) if candidate in self.indexes]
+        return list(dict.fromkeys(langs))
+
+    def match(self, text, detected_lang=None, fuzzy=None):
+        """Returns (tag, score, index language), the best over indexes_for(). `fuzzy` overrides fuzzy_enabled."""
+        fuzzy = (self.fuzzy_enabled if fuzzy is None else fuzzy) and self.normalizer
+        text = text.lower()
+        normalized = None
+        best = None
+        for lang in self.indexes_for(text, detected_lang):
+            tag, score = self.indexes[lang].match(text)
+            if fuzzy and lang in ('en', HINGLISH):
+                normalized = self.normalizer.normalize(text) if normalized is None else normalized
+                if normalized != text:
+                    fuzzy_tag, fuzzy_score = self.indexes[lang].match(normalized)
+                    if fuzzy_score > score and fuzzy_tag not in self.exact_tags:
+                        tag, score = fuzzy_tag, fuzzy_score
+            if best is None or score > best[1]: # Ties go to the earlier index (English first)
+                best = (tag, score, lang)
+        return best
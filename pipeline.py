@@ -0,0 +1,702 @@
+# === Multi-Process Audio Pipeline (shared-memory ring, supervised workers) ===
+# In one process, capture + noise suppression, the distress spotter, endpointing, STT and the
+# turn itself (intent matching, translation, TTS) all take turns on one GIL. With
+# JOEY_PIPELINE=multiprocess the audio side moves into worker processes:
+#   capture     microphone -> AudioFrontEnd -> SharedAudioRing (multiprocessing.shared_memory)
+#   recognizer  wake word + endpointing + STT on the ring, one utterance per listen command
+#   spotter     the distress keyword classifier (kws.DistressSpotter) on every frame of the ring
+# Readers get zero-copy views of the ring: every sample is written twice (at i and i + capacity,
+# like monitoring.SensorRing), so any window is one contiguous slice of shared memory. A view
+# stays valid until RING_SECONDS more audio has arrived; readers that fall more than half the
+# ring behind skip to live audio, so the longest utterance (20 s) always fits.
+# The keyword templates are written once to a .npy file that every worker np.load()s with
+# mmap_mode="r", so all processes share the same page-cache pages instead of holding copies.
+# Workers are started with "spawn" (the parent already runs threads, which fork doesn't
+# survive safely) and without re-running the parent's __main__ (app.py would bring up its TTS
+# engine and mixer in every worker). A supervisor thread restarts workers that die or stop
+# sending heartbeats, up to max_restarts per window; past that the pipeline shuts down and the
+# app falls back to the in-process listen().
+#   python pipeline.py bench [--seconds 30] [--kill]   latency / cores: threads vs processes
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import wave
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import endpointing
+import kws
+import wakeword
+from audio_frontend import AudioFrontEnd
+
+RING_SECONDS = 60 # Must exceed 2x the longest utterance a reader holds on to
+CHUNK = 480 # 30 ms reads at 16 kHz
+POLL = 0.005 # Reader sleep while waiting for the next chunk
+CHECK_INTERVAL = 0.5 # Supervisor heartbeat check
+START_GRACE = 10.0 # Seconds a (re)started worker has to send its first heartbeat
+TIMEOUTS = {"capture": 2.0, "recognizer": 15.0, "spotter": 2.0} # Heartbeat timeouts (STT blocks on the network)
+
+_WRITTEN, _CAPACITY, _RATE, _LAST = range(4) # Header fields (float64)
+_HEADER_BYTES = 4 * 8
+
+
+class Stopped(Exception):
+    """Raised from a ring read once the pipeline is stopping."""
+
+
+# === Shared Audio Ring ===
+
+class SharedAudioRing:
+    """
+    Single-writer, many-reader int16 ring in shared memory. The header holds the total number of
+    samples written, the capacity, the sample rate and the capture time of the newest sample.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((4,), np.float64, buffer=shm.buf)
+        self.capacity = int(self.header[_CAPACITY])
+        self.sample_rate = int(self.header[_RATE])
+        self.data = np.ndarray((2 * self.capacity,), np.int16, buffer=shm.buf, offset=_HEADER_BYTES)
+
+    @classmethod
+    def create(cls, sample_rate=wakeword.SAMPLE_RATE, seconds=RING_SECONDS):
+        capacity = int(sample_rate * seconds)
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER_BYTES + 2 * capacity * 2)
+        header = np.ndarray((4,), np.float64, buffer=shm.buf)
+        header[:] = (0, capacity, sample_rate, time.time())
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def written(self):
+        return int(self.header[_WRITTEN])
+
+    def write(self, samples, captured_at):
+        """Appends int16 samples (the newest captured at `captured_at`) with two slice copies per half."""
+        n = len(samples)
+        if n == 0:
+            return
+        written = self.written
+        if n > self.capacity:
+            written, samples, n = written + n - self.capacity, samples[-self.capacity:], self.capacity
+        h = written % self.capacity
+        first = min(n, self.capacity - h)
+        for offset in (0, self.capacity):
+            self.data[offset + h:offset + h + first] = samples[:first]
+            self.data[offset:offset + n - first] = samples[first:]
+        self.header[_LAST] = captured_at
+        self.header[_WRITTEN] = written + n # Published last: readers never see a count ahead of the data
+
+    def time_of(self, index):
+        """Capture time of sample `index` (counted from the start of the ring)."""
+        return float(self.header[_LAST]) - (self.written - index) / self.sample_rate
+
+    def close(self):
+        self.header = self.data = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass # A reader still holds views; the mapping goes away with the process
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class RingSource:
+    """
+    Reader over a SharedAudioRing with the speech_recognition source interface (stream.read,
+    CHUNK, SAMPLE_RATE, SAMPLE_WIDTH), so wakeword / endpointing / kws read it unchanged.
+    Reads return memoryviews into the ring; each read refreshes the worker's heartbeat.
+    """
+
+    def __init__(self, ring, heartbeat=None, stop=None, chunk=CHUNK):
+        self.ring = ring
+        self.heartbeat = heartbeat
+        self.stop = stop
+        self.stream = self
+        self.CHUNK = chunk
+        self.SAMPLE_RATE = ring.sample_rate
+        self.SAMPLE_WIDTH = 2
+        self.position = ring.written
+        self.overruns = 0
+
+    def seek_live(self):
+        """Skips whatever was captured since the last read (e.g. Joey's own reply)."""
+        self.position = self.ring.written
+
+    def read(self, size=None):
+        n = size or self.CHUNK
+        ring = self.ring
+        while True:
+            written = ring.written
+            if written - self.position > ring.capacity // 2:
+                self.overruns += 1 # Too far behind: the oldest unread audio is about to be overwritten
+                self.position = written
+            if written >= self.position + n:
+                break
+            if self.stop is not None and self.stop.is_set():
+                raise Stopped()
+            if self.heartbeat is not None:
+                self.heartbeat.value = time.monotonic()
+            time.sleep(POLL)
+        if self.heartbeat is not None:
+            self.heartbeat.value = time.monotonic()
+        start = self.position % ring.capacity
+        self.position += n
+        return memoryview(ring.data[start:start + n]).cast("B")
+
+    def captured_at(self):
+        """Capture time of the last sample read."""
+        return self.ring.time_of(self.position)
+
+
+# === Shared Read-Only Models ===
+
+def share_templates(templates, directory):
+    """Writes {label: [features, ...]} as one .npy (plus a JSON index) for load_shared_templates."""
+    index, arrays, row = [], [], 0
+    for label, label_templates in sorted(templates.items()):
+        for features in label_templates:
+            index.append((label, row, row + len(features)))
+            arrays.append(np.asarray(features, dtype=np.float32))
+            row += len(features)
+    if arrays:
+        np.save(os.path.join(directory, "templates.npy"), np.concatenate(arrays))
+    with open(os.path.join(directory, "templates.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f)
+
+
+def load_shared_templates(directory):
+    """Templates as read-only views of one memory-mapped array (shared page cache across workers)."""
+    with open(os.path.join(directory, "templates.json"), encoding="utf-8") as f:
+        index = json.load(f)
+    if not index:
+        return {}
+    mapped = np.load(os.path.join(directory, "templates.npy"), mmap_mode="r")
+    templates = {}
+    for label, start, end in index:
+        templates.setdefault(label, []).append(mapped[start:end])
+    return templates
+
+
+# === Workers ===
+# Module-level functions so spawned processes can import them; each is called as
+# target(heartbeat, stop, *args), puts (kind, payload, captured_at, request) tuples on `events`
+# and reports its CPU time as a "usage" event when it exits.
+
+def _cpu_clock():
+    """Per-process CPU time in a worker process, per-thread CPU time in the threads layout."""
+    return time.process_time if multiprocessing.parent_process() is not None else time.thread_time
+
+
+def _usage(events, worker, clock, started, **extra):
+    events.put(("usage", dict(worker=worker, cpu=clock() - started, **extra), None, None))
+
+
+class SyntheticMic:
+    """
+    Real-time stand-in for the microphone (for benchmarks): road noise with a speech-like burst
+    every `period` seconds and the synthetic emergency keyword every third burst. read() blocks
+    until the next chunk is due and records how late the caller came back for it.
+    """
+
+    def __init__(self, sample_rate=16000, chunk=CHUNK, period=4.0, seed=0):
+        self.sample_rate = sample_rate
+        self.chunk = chunk
+        rng = np.random.default_rng(seed)
+        n = int(period * 3 * sample_rate)
+        t = np.arange(n) / sample_rate
+        audio = rng.normal(0, 300, n) + 400 * np.sin(2 * np.pi * 40 * t) # Road noise + engine hum
+        for burst in range(3):
+            start = int((burst * period + 0.5) * sample_rate)
+            if burst == 2:
+                keyword = synthetic_keyword(sample_rate)
+                audio[start:start + len(keyword)] += keyword
+            else:
+                length = int(1.2 * sample_rate)
+                voiced = np.sin(2 * np.pi * 180 * t[:length]) + 0.5 * np.sin(2 * np.pi * 360 * t[:length])
+                audio[start:start + length] += 4000 * voiced * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t[:length]))
+        self.audio = np.clip(audio, -32768, 32767).astype(np.int16)
+        self.position = 0
+        self.next_due = None
+        self.lateness = deque(maxlen=10000)
+
+    def read(self):
+        now = time.monotonic()
+        if self.next_due is None:
+            self.next_due = now
+        if now < self.next_due:
+            time.sleep(self.next_due - now)
+        else:
+            self.lateness.append(now - self.next_due)
+        self.next_due += self.chunk / self.sample_rate
+        start = self.position % (len(self.audio) - self.chunk)
+        self.position = start + self.chunk
+        return self.audio[start:start + self.chunk]
+
+
+def synthetic_keyword(sample_rate=16000, seconds=0.8):
+    """A rising two-tone chirp, distinct from the speech bursts (the bench's 'emergency' keyword)."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    phase = 2 * np.pi * (300 * t + 700 * t * t)
+    return 6000 * (np.sin(phase) + 0.4 * np.sin(3 * phase)) * np.hanning(len(t))
+
+
+def _open_device(device, rate):
+    """(read, close) for 'mic' (speech_recognition Microphone) or 'synthetic'."""
+    if device == "synthetic":
+        mic = SyntheticMic(rate, chunk=rate * 30 // 1000)
+        return mic.read, lambda: None, mic
+    import speech_recognition as sr
+    mic = sr.Microphone(sample_rate=rate, chunk_size=rate * 30 // 1000)
+    mic.__enter__()
+    return (lambda: np.frombuffer(mic.stream.read(mic.CHUNK), dtype=np.int16)), (lambda: mic.__exit__(None, None, None)), None
+
+
+def capture_worker(heartbeat, stop, ring_name, device, mic_rate, events):
+    """Microphone -> noise suppression / AGC / resampling -> shared ring, until stopped."""
+    clock = _cpu_clock()
+    started = clock()
+    ring = SharedAudioRing.attach(ring_name)
+    frontend = AudioFrontEnd(sample_rate=mic_rate, target_rate=ring.sample_rate)
+    read, close, synthetic = _open_device(device, mic_rate)
+    try:
+        while not stop.is_set():
+            samples = read()
+            ring.write(frontend.process(samples), time.time())
+            heartbeat.value = time.monotonic()
+    finally:
+        close()
+        extra = {}
+        if synthetic is not None and synthetic.lateness:
+            extra["late_p95"] = float(np.percentile(synthetic.lateness, 95))
+            extra["late_max"] = float(max(synthetic.lateness))
+        _usage(events, "capture", clock, started, **extra)
+        ring.close()
+
+
+def _transcriber(stt):
+    """audio bytes, rate, low_rate -> (kind, payload). 'google', or 'standin:<CPU seconds per audio second>' for benchmarks."""
+    if stt.startswith("standin"):
+        cost = float(stt.partition(":")[2] or 0.3)
+        clock = _cpu_clock()
+
+        def transcribe(raw, rate, low_rate):
+            until = clock() + cost * len(raw) / (2 * rate)
+            while clock() < until: # Pure-Python work: holds the GIL like a local decoder's glue code
+                sum(i * i for i in range(200))
+            return "heard", "stand in transcript"
+        return transcribe
+
+    import speech_recognition as sr
+    recognizer = sr.Recognizer()
+
+    def transcribe(raw, rate, low_rate):
+        audio = sr.AudioData(raw, rate, 2)
+        if low_rate:
+            audio = sr.AudioData(audio.get_raw_data(convert_rate=low_rate), low_rate, 2)
+        try:
+            return "heard", recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            return "not_understood", None
+        except sr.RequestError as e:
+            return "stt_unavailable", str(e)
+    return transcribe
+
+
+def recognizer_worker(heartbeat, stop, ring_name, template_dir, complete_phrases, stt, commands, events):
+    """Per ("listen", request, speaker, low_rate or None) command: wake word, endpointing, STT -> one event."""
+    clock = _cpu_clock()
+    started = clock()
+    ring = SharedAudioRing.attach(ring_name)
+    source = RingSource(ring, heartbeat, stop)
+    templates = load_shared_templates(template_dir)
+    wake = wakeword.WakeWordDetector({label: t for label, t in templates.items() if not wakeword.is_emergency(label)})
+    endpointer = endpointing.Endpointer(complete_phrases=complete_phrases)
+    transcribe = _transcriber(stt)
+    try:
+        while not stop.is_set():
+            heartbeat.value = time.monotonic()
+            try:
+                command = commands.get(timeout=CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+            if command[0] == "stop":
+                break
+            _, request, speaker, low_rate = command
+            source.seek_live() # Nothing from before the listen (e.g. Joey's own reply)
+            activation = wakeword.wait_for_activation(source, wake) if wake.enabled else None
+            endpointer.set_speaker(speaker)
+            raw = endpointing.capture_utterance(source, endpointer)
+            if raw is None:
+                events.put(("timeout", None, None, request))
+                continue
+            ended_at = source.captured_at()
+            try:
+                kind, payload = transcribe(raw, source.SAMPLE_RATE, low_rate)
+            except Exception as e:
+                kind, payload = "error", str(e)
+            if kind == "heard" and activation:
+                payload = wakeword.strip_wake_phrase(payload)
+            events.put((kind, payload, ended_at, request))
+    except Stopped:
+        pass
+    finally:
+        endpointer.save_profiles()
+        _usage(events, "recognizer", clock, started, overruns=source.overruns)
+        ring.close()
+
+
+def spotter_worker(heartbeat, stop, ring_name, template_dir, events):
+    """Distress keyword spotting on every frame of the ring, independent of the recognizer."""
+    clock = _cpu_clock()
+    started = clock()
+    ring = SharedAudioRing.attach(ring_name)
+    source = RingSource(ring, heartbeat, stop)
+    spotter = kws.DistressSpotter(load_shared_templates(template_dir))
+    try:
+        while True:
+            label = spotter.process(source.stream.read(source.CHUNK))
+            if label:
+                events.put(("distress", label, source.captured_at(), None))
+    except Stopped:
+        pass
+    finally:
+        _usage(events, "spotter", clock, started, overruns=source.overruns)
+        ring.close()
+
+
+# === Threads Layout (benchmark baseline) ===
+# The same workers on threads of one process, through the multiprocessing context interface.
+
+class _ThreadWorker(threading.Thread):
+    def __init__(self, target=None, args=(), name=None, daemon=True):
+        super().__init__(name=name, daemon=daemon)
+        self._work = target
+        self._work_args = args
+        self.exitcode = None
+        self.pid = None
+
+    def run(self):
+        try:
+            self._work(*self._work_args)
+            self.exitcode = 0
+        except Exception as e:
+            print(f"[Pipeline] {self.name} failed: {e}")
+            self.exitcode = 1
+
+    def terminate(self):
+        pass # A thread can't be killed; it exits at the next read once `stop` is set
+
+    kill = terminate
+
+
+class _SharedValue:
+    def __init__(self, value):
+        self.value = value
+
+
+class ThreadContext:
+    Process = _ThreadWorker
+    Event = staticmethod(threading.Event)
+    Queue = staticmethod(queue.Queue)
+
+    @staticmethod
+    def Value(typecode, value, lock=False):
+        return _SharedValue(value)
+
+
+@contextlib.contextmanager
+def _without_main():
+    """Hides the parent's main script while workers start, so spawn doesn't re-run it in each child."""
+    main = sys.modules["__main__"]
+    if vars(main) is globals(): # Started as `python pipeline.py`: the workers live in __main__
+        yield
+        return
+    saved = {name: vars(main)[name] for name in ("__file__", "__spec__") if name in vars(main)}
+    main.__spec__ = None
+    vars(main).pop("__file__", None)
+    try:
+        yield
+    finally:
+        vars(main).update(saved)
+
+
+# === Supervisor ===
+
+class WorkerSpec:
+    """How to (re)start one worker: target(heartbeat, stop, *args); restarted if silent for `timeout` seconds."""
+
+    def __init__(self, name, target, args, timeout):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.timeout = timeout
+        self.process = None
+        self.heartbeat = None
+        self.restarts = 0
+
+
+class Supervisor:
+    """Starts the workers and restarts any that die or stop sending heartbeats, within a restart budget."""
+
+    def __init__(self, context, stop, max_restarts=5, window=60.0, on_give_up=None):
+        self.context = context
+        self.stop_event = stop
+        self.max_restarts = max_restarts
+        self.window = window
+        self.on_give_up = on_give_up
+        self.workers = {}
+        self.failed = False
+        self.generation = 0 # Bumped on every restart, so waiters can tell their request was lost
+        self._recent = deque() # Restart times within `window`
+        self._thread = None
+
+    def add(self, spec):
+        self.workers[spec.name] = spec
+
+    def _start(self, spec):
+        spec.heartbeat = self.context.Value("d", time.monotonic() + START_GRACE, lock=False)
+        spec.process = self.context.Process(target=spec.target, args=(spec.heartbeat, self.stop_event, *spec.args),
+                                            name=f"joey-{spec.name}", daemon=True)
+        with _without_main():
+            spec.process.start()
+
+    def start(self):
+        for spec in self.workers.values():
+            self._start(spec)
+        self._thread = threading.Thread(target=self._run, name="pipeline-supervisor", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(CHECK_INTERVAL):
+            for spec in self.workers.values():
+                self._check(spec)
+                if self.failed:
+                    return
+
+    def _check(self, spec):
+        process = spec.process
+        if process.is_alive():
+            silent = time.monotonic() - spec.heartbeat.value
+            if silent < spec.timeout:
+                return
+            reason = f"no heartbeat for {silent:.1f}s"
+            process.terminate()
+            process.join(1.0)
+            if process.is_alive():
+                process.kill()
+                process.join(1.0)
+            if process.is_alive():
+                return # A hung thread can't be killed; don't start a second copy next to it
+        elif process.exitcode == 0:
+            return # Finished on its own (e.g. nothing to spot)
+        else:
+            reason = f"exit code {process.exitcode}"
+        if self.stop_event.is_set():
+            return
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > self.window:
+            self._recent.popleft()
+        if len(self._recent) >= self.max_restarts:
+            print(f"[Pipeline Error] {spec.name} {reason}; {self.max_restarts} restarts in {self.window:.0f}s, giving up.")
+            self.failed = True
+            if self.on_give_up:
+                self.on_give_up()
+            return
+        self._recent.append(now)
+        spec.restarts += 1
+        self.generation += 1
+        print(f"[Pipeline] Restarting {spec.name} ({reason}).")
+        self._start(spec)
+
+    def stop(self, timeout=3.0):
+        self.stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        for spec in self.workers.values():
+            if spec.process is None:
+                continue
+            spec.process.join(timeout)
+            if spec.process.is_alive():
+                spec.process.terminate()
+                spec.process.join(1.0)
+
+
+# === Pipeline ===
+
+class AudioPipeline:
+    """
+    The app-facing side: start(), listen() (one utterance, or a spotted distress keyword), stop().
+    `mode` is "spawn" (worker processes) or "threads" (same workers in this process).
+    """
+
+    def __init__(self, templates, complete_phrases, mic_rate=16000, device="mic", stt="google", mode="spawn"):
+        self.templates = templates
+        self.complete_phrases = list(complete_phrases)
+        self.mic_rate = mic_rate
+        self.device = device
+        self.stt = stt
+        self.context = ThreadContext() if mode == "threads" else multiprocessing.get_context(mode)
+        self.ring = None
+        self.supervisor = None
+        self.usage = {}
+        self.latency = {"heard": deque(maxlen=1000), "distress": deque(maxlen=1000)} # Capture -> arrival, seconds
+        self._request = 0
+        self._template_dir = None
+
+    @property
+    def healthy(self):
+        return self.supervisor is not None and not self.supervisor.failed
+
+    def start(self):
+        self.ring = SharedAudioRing.create(wakeword.SAMPLE_RATE)
+        self._template_dir = tempfile.mkdtemp(prefix="joey-templates-")
+        share_templates(self.templates, self._template_dir)
+        self._stop = self.context.Event()
+        self._commands = self.context.Queue()
+        self._events = self.context.Queue()
+        self.supervisor = Supervisor(self.context, self._stop, on_give_up=lambda: self._stop.set())
+        self.supervisor.add(WorkerSpec("capture", capture_worker, (self.ring.name, self.device, self.mic_rate, self._events),
+                                       TIMEOUTS["capture"]))
+        self.supervisor.add(WorkerSpec("recognizer", recognizer_worker,
+                                       (self.ring.name, self._template_dir, self.complete_phrases, self.stt,
+                                        self._commands, self._events), TIMEOUTS["recognizer"]))
+        if any(wakeword.is_emergency(label) for label in self.templates):
+            self.supervisor.add(WorkerSpec("spotter", spotter_worker, (self.ring.name, self._template_dir, self._events),
+                                           TIMEOUTS["spotter"]))
+        self.supervisor.start()
+        print(f"[INFO] Audio pipeline running ({', '.join(self.supervisor.workers)} in "
+              f"{'threads' if isinstance(self.context, ThreadContext) else 'separate processes'}).")
+
+    def listen(self, speaker=None, low_rate=None):
+        """Blocks until the recognizer has an utterance or the spotter a keyword: (kind, payload)."""
+        self._request += 1
+        generation = self.supervisor.generation
+        self._commands.put(("listen", self._request, speaker, low_rate))
+        while self.healthy:
+            try:
+                kind, payload, captured_at, request = self._events.get(timeout=CHECK_INTERVAL)
+            except queue.Empty:
+                if self.supervisor.generation != generation and not self.supervisor.workers["recognizer"].process.is_alive():
+                    return "error", "recognizer restarted"
+                continue
+            if kind == "usage":
+                self.usage[payload["worker"]] = payload
+                continue
+            if kind == "distress" or request == self._request:
+                if captured_at is not None and kind in self.latency:
+                    self.latency[kind].append(time.time() - captured_at)
+                return kind, payload
+            # Anything else answers an earlier listen that a distress event cut short
+        return "error", "pipeline stopped"
+
+    def stop(self):
+        if self.supervisor is None:
+            return
+        self._commands.put(("stop",))
+        self.supervisor.stop()
+        expected = set(self.supervisor.workers)
+        deadline = time.monotonic() + 2.0
+        while not expected <= set(self.usage) and time.monotonic() < deadline:
+            try:
+                kind, payload, _, _ = self._events.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if kind == "usage":
+                self.usage[payload["worker"]] = payload
+        self.ring.close()
+        shutil.rmtree(self._template_dir, ignore_errors=True)
+
+
+# === Benchmark ===
+
+def _bench_templates():
+    """The synthetic keyword enrolled as an emergency_* template, through the normal WAV loader."""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "emergency_synth"))
+        clip = np.clip(synthetic_keyword(), -32768, 32767).astype(np.int16)
+        with wave.open(os.path.join(tmp, "emergency_synth", "0.wav"), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(wakeword.SAMPLE_RATE)
+            wav.writeframes(clip.tobytes())
+        return wakeword.load_templates(tmp)
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else float("nan")
+
+
+def run_bench(mode, seconds=30.0, stt_cost=0.3, turn_cost=0.15, kill=False):
+    """One layout under the app's load: back-to-back listens, each reply costing `turn_cost` CPU seconds here."""
+    pipeline = AudioPipeline(_bench_templates(), ["stop"], device="synthetic", stt=f"standin:{stt_cost}", mode=mode)
+    wall, cpu = time.monotonic(), time.process_time()
+    pipeline.start()
+    turns, killed = 0, False
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline and pipeline.healthy:
+        kind, _ = pipeline.listen("bench")
+        if kind == "heard":
+            turns += 1
+            until = time.thread_time() + turn_cost
+            while time.thread_time() < until: # Intent matching, translation, TTS synthesis
+                sum(i * i for i in range(200))
+        if kill and not killed and time.monotonic() > deadline - seconds / 2 and mode != "threads":
+            os.kill(pipeline.supervisor.workers["recognizer"].process.pid, signal.SIGKILL)
+            killed = True
+    pipeline.stop()
+    wall, main_cpu = time.monotonic() - wall, time.process_time() - cpu
+    workers = {name: usage["cpu"] for name, usage in pipeline.usage.items()}
+    total = main_cpu if mode == "threads" else main_cpu + sum(workers.values()) # Thread CPU is already in process_time
+    capture = pipeline.usage.get("capture", {})
+    return {"mode": mode, "turns": turns, "wall": wall, "cores": total / wall, "workers": workers,
+            "heard_p50": _percentile(pipeline.latency["heard"], 50), "heard_p95": _percentile(pipeline.latency["heard"], 95),
+            "distress_p50": _percentile(pipeline.latency["distress"], 50), "distress": len(pipeline.latency["distress"]),
+            "late_p95": capture.get("late_p95", float("nan")), "late_max": capture.get("late_max", float("nan")),
+            "restarts": sum(spec.restarts for spec in pipeline.supervisor.workers.values())}
+
+
+def bench(seconds=30.0, kill=False):
+    print(f"[Bench] {seconds:.0f}s per layout on {os.cpu_count()} cores; synthetic mic, stand-in STT, one keyword template.")
+    for mode in ("threads", "spawn"):
+        r = run_bench(mode, seconds, kill=kill)
+        print(f"[Bench] {'single process' if mode == 'threads' else 'multi-process':<15} {r['turns']:>3} turns, "
+              f"utterance end -> transcript p50 {1000 * r['heard_p50']:.0f} ms / p95 {1000 * r['heard_p95']:.0f} ms, "
+              f"keyword -> event p50 {1000 * r['distress_p50']:.0f} ms ({r['distress']} spotted)")
+        print(f"{'':<24}capture late p95 {1000 * r['late_p95']:.1f} ms / max {1000 * r['late_max']:.1f} ms, "
+              f"{r['cores']:.2f} cores busy, restarts {r['restarts']}; CPU s: "
+              + ", ".join(f"{name} {cpu:.1f}" for name, cpu in sorted(r["workers"].items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Joey's audio pipeline layouts.")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--kill", action="store_true", help="SIGKILL the recognizer halfway (supervisor restart)")
+    args = parser.parse_args()
+    bench(args.seconds, args.kill)
@@ -0,0 +1,100 @@
+# === Speculative Prefetch ===
+# When the driver switches language mode (or starts speaking a new language), warm the
+# translations and synthesized audio for the most used responses in that language in the
+# background, so the first replies after the switch don't pay translate + gTTS on demand.
+# Work is bounded by an item count and a time budget, and is cancelled by the next switch.
+
+import itertools
+import threading
+import time
+
+import eventlog
+from memory import BoundedCache
+
+prefetch_log = eventlog.get("prefetch")
+
+
+class AudioCache(BoundedCache):
+    """Thread-safe LRU of synthesized audio: (text, lang) -> mp3 bytes, bounded by total bytes."""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        super().__init__(max_bytes, sizeof=len, name="audio cache")
+
+    def put(self, key, data):
+        if data: # Failed syntheses (empty/None) are never cached
+            super().put(key, data)
+
+
+class Prefetcher:
+    """
+    Background warm-up for one language at a time.
+    `candidates(lang)` yields (text, needs_translation) in priority order,
+    `translate(text, lang)` returns the translation (and is expected to cache it),
+    `synthesize(text, lang)` returns mp3 bytes, or None when audio isn't available.
+    With `translate_many(texts, lang)`, the translations are requested up front as one batch.
+    """
+
+    def __init__(self, candidates, translate, synthesize, audio_cache, max_items=25, time_budget=20.0, translate_many=None):
+        self.candidates = candidates
+        self.translate = translate
+        self.translate_many = translate_many
+        self.synthesize = synthesize
+        self.audio_cache = audio_cache
+        self.max_items = max_items
+        self.time_budget = time_budget
+        self.current_lang = None
+        self._generation = 0 # Bumped on every switch/cancel; workers stop when it changes
+        self._lock = threading.Lock()
+
+    def switch(self, lang):
+        """Starts warming `lang`, cancelling any warm-up in progress for another language."""
+        if not lang or lang == 'en': # English is spoken by pyttsx3, nothing to warm
+            self.cancel()
+            return
+        with self._lock:
+            if lang == self.current_lang:
+                return
+            self._generation += 1
+            generation = self._generation
+            self.current_lang = lang
+        threading.Thread(target=self._run, args=(lang, generation), name=f"joey-prefetch-{lang}", daemon=True).start()
+
+    def cancel(self):
+        with self._lock:
+            self._generation += 1
+            self.current_lang = None
+
+    def _cancelled(self, generation):
+        return generation != self._generation
+
+    def _run(self, lang, generation):
+        start = time.monotonic()
+        deadline = start + self.time_budget
+        warmed = 0
+        try:
+            candidates = self.candidates(lang)
+            if self.translate_many:
+                candidates = self._translated_up_front(list(itertools.islice(candidates, self.max_items)), lang)
+            for text, needs_translation in candidates:
+                if warmed >= self.max_items or time.monotonic() > deadline or self._cancelled(generation):
+                    break
+                if needs_translation:
+                    text = self.translate(text, lang)
+                    if not text or self._cancelled(generation):
+                        continue
+                if (text, lang) not in self.audio_cache:
+                    audio = self.synthesize(text, lang)
+                    if audio and not self._cancelled(generation):
+                        self.audio_cache.put((text, lang), audio)
+                warmed += 1
+        except Exception as e:
+            prefetch_log.error("failed", lang=lang, error=str(e))
+        state = "cancelled" if self._cancelled(generation) else "done"
+        prefetch_log.info("warmed", lang=lang, responses=warmed, seconds=round(time.monotonic() - start, 2), state=state)
+
+    def _translated_up_front(self, candidates, lang):
+        """One batched translate call for every candidate that needs it (failed ones are dropped)."""
+        todo = [text for text, needs_translation in candidates if needs_translation]
+        translated = dict(zip(todo, self.translate_many(todo, lang))) if todo else {}
+        return [(translated[text] if needs_translation else text, False) for text, needs_translation in candidates
+                if not needs_translation or translated.get(text)]
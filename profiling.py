@@ -0,0 +1,301 @@
+# === On-Demand Profiling (sampling profiler, flamegraph dumps, hot-path counters) ===
+# Compiled in for production: the sampler costs nothing until it is switched on, and the hot-path
+# counters are one lock + two clock reads per call. Toggle it on a running unit with
+#   kill -USR2 <pid>                          (start / stop; stop writes the dump)
+#   python profiling.py start|stop|dump|counters|status    (local control socket, JOEY_PROFILER_PORT)
+# Dumps land in profiles/: <stamp>.folded is collapsed-stack output (one "frame;frame;frame count"
+# line per stack) for flamegraph.pl / speedscope / inferno, <stamp>.counters.txt the call counters.
+
+import functools
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+DEFAULT_INTERVAL = 0.005 # 200 Hz; a sample walks every thread's stack, ~20-50us
+MAX_DEPTH = 64 # Deeper stacks are cut at the root end
+# Leaf frames of threads parked on a lock / socket / queue; left out of the self-time summary
+IDLE_FRAMES = {"wait (threading.py)", "accept (socket.py)", "_worker (thread.py)", "select (selectors.py)",
+               "_wait_for_tstate_lock (threading.py)", "readinto (socket.py)", "get (queue.py)"}
+DUMP_DIR = os.environ.get("JOEY_PROFILE_DIR", "profiles")
+CONTROL_PORT = int(os.environ.get("JOEY_PROFILER_PORT", "0")) # 0 = no control socket
+
+
+# === Call Counters ===
+
+class CallCounters:
+    """Calls, total and worst time per hot-path name. Always on; cheap enough for the turn loop."""
+
+    def __init__(self):
+        self._stats = {} # name -> [calls, total_seconds, max_seconds]
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            stat = self._stats.get(name)
+            if stat is None:
+                self._stats[name] = [1, seconds, seconds]
+            else:
+                stat[0] += 1
+                stat[1] += seconds
+                if seconds > stat[2]:
+                    stat[2] = seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {name: tuple(stat) for name, stat in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def report(self):
+        rows = sorted(self.snapshot().items(), key=lambda item: -item[1][1])
+        width = max([len(name) for name, _ in rows] + [8]) + 2
+        lines = [f"{'hot path':<{width}}{'calls':>8}{'total':>10}{'mean':>10}{'max':>10}"]
+        for name, (calls, total, worst) in rows:
+            lines.append(f"{name:<{width}}{calls:>8}{total * 1000:>8.1f}ms{total / calls * 1000:>8.2f}ms{worst * 1000:>8.1f}ms")
+        return "\n".join(lines)
+
+
+counters = CallCounters()
+
+
+def counted(name=None):
+    """Decorator: counts calls to the function and the time spent in it."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                counters.add(label, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+_WRAPPER_CODE = counted()(lambda: None).__code__
+
+
+class section:
+    """Context manager counting a block that isn't its own function, e.g. the mode regex."""
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        counters.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+# === Sampling Profiler ===
+
+class SamplingProfiler:
+    """Samples every thread's Python stack from a daemon thread; stacks are aggregated as they're taken."""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, dump_dir=DUMP_DIR):
+        self.interval = interval
+        self.dump_dir = dump_dir
+        self.stacks = Counter() # "thread;frame;...;frame" -> samples; read it through snapshot()
+        self.samples = 0
+        self.started_at = None
+        self._labels = {} # code object -> "function (file.py)"
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stacks_lock = threading.Lock() # Held by the sampler per sample, and while copying stacks
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=None):
+        with self._lock:
+            if self.running:
+                return False
+            self.interval = interval or self.interval
+            with self._stacks_lock:
+                self.stacks.clear()
+            self.samples = 0
+            self.started_at = time.time()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+        print(f"[Profiler] Sampling every {self.interval * 1000:.1f}ms.")
+        return True
+
+    def stop(self):
+        """Stops sampling and writes the dump; returns the .folded path (None if it wasn't running)."""
+        with self._lock:
+            if not self.running:
+                return None
+            self._stop.set()
+            self._thread.join()
+        return self.dump()
+
+    def toggle(self):
+        return self.stop() if self.running else self.start()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)})"
+            self._labels[code] = label
+        return label
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            sampled = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    if frame.f_code is not _WRAPPER_CODE: # Counter wrappers would double every hot frame
+                        stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                sampled.append(";".join(reversed(stack)))
+            with self._stacks_lock:
+                self.stacks.update(sampled)
+                self.samples += 1
+
+    def snapshot(self):
+        """Copy of the stacks, safe to iterate while the sampler keeps running."""
+        with self._stacks_lock:
+            return Counter(self.stacks)
+
+    def folded(self, stacks=None):
+        """Collapsed-stack text, heaviest stacks first."""
+        stacks = self.snapshot() if stacks is None else stacks
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+    def top(self, n=15, stacks=None):
+        """Self time per function (leaf frame) of busy threads, as (label, share of samples)."""
+        stacks = self.snapshot() if stacks is None else stacks
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaf = stack.rsplit(";", 1)[-1]
+            if leaf not in IDLE_FRAMES:
+                leaves[leaf] += count
+        total = sum(leaves.values()) or 1
+        return [(label, count / total) for label, count in leaves.most_common(n)]
+
+    def dump(self):
+        """Writes <stamp>.folded and <stamp>.counters.txt into the dump directory."""
+        os.makedirs(self.dump_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3] # Millisecond resolution
+        base, n = stamp, 1
+        while os.path.exists(os.path.join(self.dump_dir, f"joey-{stamp}.folded")): # Same-millisecond dumps
+            stamp, n = f"{base}-{n}", n + 1
+        path = os.path.join(self.dump_dir, f"joey-{stamp}.folded")
+        stacks = self.snapshot() # One consistent copy for both outputs; sampling may still be running
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.folded(stacks) + "\n")
+        with open(os.path.join(self.dump_dir, f"joey-{stamp}.counters.txt"), "w", encoding="utf-8") as f:
+            f.write(counters.report() + "\n")
+        seconds = time.time() - self.started_at if self.started_at else 0
+        print(f"[Profiler] {self.samples} samples over {seconds:.1f}s written to {path}")
+        for label, share in self.top(5, stacks):
+            print(f"  {share:6.1%}  {label}")
+        return path
+
+
+profiler = SamplingProfiler()
+
+
+# === Runtime Toggles ===
+
+def _on_signal(signum, frame):
+    # Runs on the main thread between bytecodes; the dump is written off-thread so the turn isn't held up
+    threading.Thread(target=profiler.toggle, name="profiler-toggle", daemon=True).start()
+
+
+def install_signal_handler(signum=getattr(signal, "SIGUSR2", None)):
+    """SIGUSR2 toggles the sampler. Must be called from the main thread; a no-op where there's no SIGUSR2."""
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signum, _on_signal)
+    return True
+
+
+def handle_command(line):
+    """One control-socket command -> reply text."""
+    parts = line.split()
+    command = parts[0].lower() if parts else "status"
+    if command == "start":
+        interval = float(parts[1]) / 1000 if len(parts) > 1 else None # Optional interval in ms
+        return "started" if profiler.start(interval) else "already running"
+    if command == "stop":
+        path = profiler.stop()
+        return f"stopped, dump written to {path}" if path else "not running"
+    if command == "dump":
+        return f"dump written to {profiler.dump()}" if profiler.started_at else "nothing sampled yet"
+    if command == "counters":
+        return counters.report()
+    if command == "reset":
+        counters.reset()
+        return "counters reset"
+    if command == "status":
+        state = "running" if profiler.running else "stopped"
+        return f"{state}, {profiler.samples} samples, {len(profiler.stacks)} distinct stacks"
+    return f"unknown command '{command}' (start [ms] | stop | dump | counters | reset | status)"
+
+
+def serve_control(port=CONTROL_PORT, host="127.0.0.1"):
+    """Line-based control socket on localhost. Returns the listening socket, or None if disabled."""
+    if not port:
+        return None
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((host, port))
+    server.listen(1)
+
+    def accept_loop():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return # Socket closed
+            with conn:
+                try:
+                    line = conn.makefile("r", encoding="utf-8").readline()
+                    conn.sendall((handle_command(line) + "\n").encode("utf-8"))
+                except Exception as e:
+                    print(f"[Profiler Error]: {e}")
+
+    threading.Thread(target=accept_loop, name="profiler-control", daemon=True).start()
+    print(f"[Profiler] Control socket on {host}:{port}.")
+    return server
+
+
+def install():
+    """Arms both toggles; called once from the main thread at startup."""
+    install_signal_handler()
+    try:
+        return serve_control()
+    except OSError as e:
+        print(f"[Profiler Error] Control socket unavailable: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    # Client for the control socket: python profiling.py start [ms] | stop | dump | counters | reset | status
+    if not CONTROL_PORT:
+        sys.exit("Set JOEY_PROFILER_PORT to the port Joey was started with.")
+    with socket.create_connection(("127.0.0.1", CONTROL_PORT), timeout=10) as conn:
+        conn.sendall((" ".join(sys.argv[1:]) + "\n").encode("utf-8"))
+        print(conn.makefile("r", encoding="utf-8").read().rstrip())
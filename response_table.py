@@ -0,0 +1,355 @@
+# === Joey's Response Table ===
+# All spoken response content lives here and is compiled ONCE at startup into an
+# immutable table indexed by intent and language code: RESPONSE_TABLE[intent][lang].
+# Per-turn selection is then two dict lookups (no dict literals rebuilt every turn).
+#
+# Templates use str.format slots for per-turn values, e.g. "{name}", "{location}".
+# Static slots (like the supported language list) are expanded at build time.
+
+import json
+import os
+import random
+from string import Formatter
+from types import MappingProxyType
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "translation_cache.json")
+
+# Raw response content: intent/response key -> language code -> template or list of templates.
+# 'en' is required for every key and is the fallback when a language is missing.
+RESPONSES = {
+    "emergency_call": {
+        'en': "Emergency situation detected. Calling emergency services now. Please remain calm.",
+        'hi': "आपातकालीन स्थिति का पता चला। आपातकालीन सेवाओं को कॉल किया जा रहा है। कृपया शांत रहें।",
+        'es': "Situación de emergencia detectada. Llamando a los servicios de emergencia ahora. Por favor, mantén la calma.",
+        'ur': "ہنگامی صورتحال کا پتہ چلا۔ ایمرجنسی سروسز کو کال کی جا رہی ہے۔ براہ کرم پرسکون رہیں۔",
+        'bn': "জরুরী অবস্থা সনাক্ত করা হয়েছে। জরুরী পরিষেবাগুলিতে কল করা হচ্ছে। শান্ত থাকুন।"
+    },
+    "distress_check": {
+        'en': "It sounds like you might be in distress. Initiating emergency procedures now.",
+        'hi': "लगता है आप संकट میں ہیں। اب आपातकालीन प्रक्रिया شروع کر رہا ہوں",
+        'es': "Parece que podrías estar en peligro. Iniciando procedimientos de emergencia ahora.",
+        'ur': "ایسا لگتا ہے کہ آپ پریشانی میں ہیں۔ اب ہنگامی طریقہ کار شروع کر رہا ہوں۔",
+        'bn': "মনে হচ্ছে আপনি সংকটে আছেন। জরুরি পদ্ধতি এখন শুরু করা হচ্ছে।"
+    },
+    "translate_prompt": {
+        'en': "What would you like me to translate and to which language?",
+        'hi': "आप क्या अनुवाद करना चाहेंगे और किस भाषा में?",
+        'es': "¿Qué te gustaría que tradujera y a qué idioma?",
+        'ur': "آپ کیا ترجمہ کرنا چاہیں گے اور کس زبان میں؟",
+        'bn': "আপনি কি অনুবাদ করতে চান এবং কোন ভাষায়?"
+    },
+    "greet": {
+        'en': ["Hello!", "Hi there!", "Hey!", "Greetings!", "Good to hear from you!"],
+        'hi': ["नमस्ते!", "हाय!", "हैलो!", "आपसे सुनकर अच्छा लगा!"],
+        'es': ["¡Hola!", "¡Qué tal!", "¡Saludos!", "¡Me alegra escucharte!"],
+        'ur': ["اسلام علیکم!", "آداب!", "سلام!", "آپ سے سن کر اچھا لگا!"],
+        'bn': ["হ্যালো!", "নমস্কার!", "কেমন আছেন?", "শুনে ভালো লাগলো!"],
+        'ja': ["こんにちは！"],
+        'de': ["Hallo!"],
+    },
+    "greet_someone": {
+        'en': "Okay, I can greet someone if you tell me their name.",
+        'hi': "ठीक है, अगर आप मुझे उनका नाम बताएं तो मैं किसी का अभिवादन कर सकता हूँ।",
+        'es': "De acuerdo, puedo saludar a alguien si me dices su nombre.",
+        'ur': "ٹھیک ہے، اگر آپ مجھے ان کا نام بتائیں تو میں کسی کو سلام کر سکتا ہوں۔",
+        'bn': "ঠিক আছে، আপনি যদি আমাকে তাদের নাম বলেন তবে আমি কাউকে অভিবাদন জানাতে পারি।"
+    },
+    "ask_for_help": {
+        'en': "I can tell you the time, weather, tell jokes, translate to many languages, remember your name, and more. Just ask!",
+        'hi': "मैं आपको समय, मौसम बता सकता हूँ, चुटकुले सुना सकता हूँ, कई भाषाओं में अनुवाद कर सकता हूँ، आपका नाम याद रख सकता ہوں، اور بھی بہت کچھ۔ بس پوچھیں!",
+        'es': "Puedo decirte la hora, el clima, contar chistes, traducir a muchos idiomas, recordar tu nombre y más. ¡Solo pregunta!",
+        'ur': "میں آپ کو وقت، موسم بتا سکتا ہوں، لطیفے سنا سکتا ہوں، کئی زبانوں میں ترجمہ کر سکتا ہوں، آپ کا نام یاد رکھ سکتا ہوں، اور بہت کچھ۔ بس پوچھیں!",
+        'bn': "আমি আপনাকে সময়, আবহাওয়া বলতে পারি, কৌতুক বলতে পারি, অনেক ভাষায় অনুবাদ করতে পারি، আপনার নাম মনে রাখতে পারি এবং আরও অনেক কিছু করতে পারি। শুধু জিজ্ঞাসা করুন!"
+    },
+    "tell_a_joke": {
+        'en': [
+            "Why don't scientists trust atoms? Because they make up everything!",
+            "What do you call a lazy kangaroo? Pouch potato!",
+            "Why did the scarecrow win an award? Because he was outstanding in his field!",
+            "What concert costs just 45 cents? 50 Cent featuring Nickelback!",
+            "Why did the bicycle fall over? Because it was two tired!",
+            "What do you call a fish wearing a bowtie? Sofishticated!",
+            "Why don't eggs tell jokes? They'd crack each other up!",
+            "What did the left eye say to the right eye? Between you and me, something smells!",
+            "Why was the math book sad? Because it had too many problems.",
+            "What do you call a fake noodle? An impasta!"
+        ],
+        # Add jokes in other languages here if you have them, e.g. 'es': ["Joke 1 in Spanish", ...]
+    },
+    "joke_feedback_negative": {
+        'en': "Oh, I'm sorry you didn't find that funny. I'll try to find better jokes for you!",
+        'hi': "ماف کرنا، مجھے ماف کرنا اگر آپ کو وہ مضحکہ خیز نہیں لگا۔ میں آپ کے لیے بہتر لطیفے ڈھونڈنے کی کوشش کروں گا۔",
+        'es': "Oh, lamento que no te haya parecido divertido. ¡Intentaré encontrar mejores chistes para ti!",
+        'ur': "اوہ، مجھے افسوس ہے کہ آپ کو یہ مضحکہ خیز نہیں لگا۔ میں آپ کے لیے بہتر لطیفے تلاش کرنے کی کوشش کروں گا!",
+        'bn': "ওহ, আমি দুঃখিত আপনি এটা মজার খুঁজে পাননি। আমি আপনার জন্য আরও ভালো কৌতুক খুঁজে বের করার চেষ্টা করব!"
+    },
+    "thank_you": {
+        'en': ["You're welcome!", "No problem!", "Anytime!", "Glad I could help!"],
+        'hi': ["आपका स्वागत है!", "कोई बात नहीं!", "कभी भी!", "खुशी हुई कि मैं मदद कर सका!"],
+        'es': ["¡De nada!", "¡No hay problema!", "¡Cuando quieras!", "¡Me alegra haber podido ayudar!"],
+        'ur': ["خوش آمدید!", "کوئی بات نہیں!", "جب چاہیں!", "خوشی ہوئی کہ میں مدد کر سکا!"],
+        'bn': ["আপনাকে স্বাগতম!", "কোন সমস্যা নেই!", "যেকোনো সময়!", "সাহায্য করতে পেরে ভালো লাগছে!"]
+    },
+    "stop_or_exit": {
+        'en': "Goodbye! Have a great day!",
+        'hi': "अलविदा! आपका दिन शानदार हो!",
+        'es': "¡Adiós! ¡Que tengas un gran día!",
+        'ur': "اللہ حافظ! آپ کا دن اچھا گزرے!",
+        'bn': "বিদায়! আপনার দিনটি দারুণ কাটুক!"
+    },
+    "introduce_myself": {
+        'en': "Nice to meet you, {name}! I'll remember your name.",
+        'hi': "آپ سے مل کر اچھا لگا، {name}! میں آپ کا نام یاد رکھوں گا۔",
+        'es': "Encantado de conocerte, {name}! Recordaré tu nombre.",
+        'ur': "آپ سے مل کر اچھا لگا، {name}! میں آپ کا نام یاد رکھوں گا۔",
+        'bn': "আপনার সাথে দেখা করে ভালো লাগলো، {name}! আমি আপনার নাম মনে রাখব।"
+    },
+    "joey_name": {
+        'en': "My name is Joey.",
+        'hi': "میرا نام جॉय ہے۔",
+        'es': "Mi nombre es Joey.",
+        'ur': "میرا نام جَوی ہے۔",
+        'bn': "আমার নাম জয়ে।"
+    },
+    "name_not_caught": {
+        'en': "Sorry, I couldn't catch your name. Could you please repeat it?",
+        'hi': "ماف کرنا، میں آپ کا نام سمجھ نہیں پایا۔ کیا آپ کر پیا اسے دوبارہ کہہ سکتے ہیں؟",
+        'es': "Lo siento, no pude entender tu nombre. ¿Podrías repetirlo por favor?",
+        'ur': "معاف کرنا، میں آپ کا نام سمجھ نہیں پایا۔ کیا آپ براہ کرم اسے دہرا سکتے ہیں؟",
+        'bn': "দুঃখিত، আমি আপনার নাম বুঝতে পারিনি। আপনি কি দয়া করে এটি পুনরাবৃত্তি করতে পারেন?"
+    },
+    "ask_name": {
+        'en': "Your name is {name}.",
+        'hi': "آپ کا نام {name} ہے۔",
+        'es': "Tu nombre es {name}.",
+        'ur': "آپ کا نام {name} ہے۔",
+        'bn': "আপনার نام {name}।"
+    },
+    "name_unknown": {
+        'en': "I don't know your name yet. You can tell me by saying, 'My name is [your name]'.",
+        'hi': "مجھے ابھی آپ کا نام نہیں پتا۔ آپ مجھے 'میرا نام [آپ کا نام] ہے' کہہ کر بتا سکتے ہیں۔",
+        'es': "Aún no sé tu nombre. Puedes decírmelo diciendo: 'Mi nombre es [tu nombre]'.",
+        'ur': "مجھے ابھی آپ کا نام نہیں پتا۔ آپ مجھے 'میرا نام [آپ کا نام] ہے' کہہ کر بتا سکتے ہیں۔",
+        'bn': "আমি এখনও আপনার নাম জানি না। আপনি আমাকে 'আমার নাম [আপনার নাম]' বলে বলতে পারেন।"
+    },
+    "about_hair": {
+        'en': "As an AI, I don't have a physical body like humans do, so I don't have hair or a hair color. I exist as computer code and data.",
+        'hi': "ایک AI ہونے کے ناطے، میرا انسانوں جیسا کوئی भौतिक शरीर نہیں ہے، اسی لیے میرے بال یا بالوں کا رنگ نہیں ہے۔ میں کمپیوٹر کوڈ اور ڈیٹا کے طور پر موجود ہوں۔",
+        'es': "Como IA, no tengo un cuerpo físico como los humanos, así que no tengo pelo ni color de pelo. Existo como código y datos de computadora.",
+        'ur': "ایک AI کے طور پر، میرا انسانوں جیسا کوئی جسمانی جسم نہیں ہے، لہذا میرے بال یا بالوں کا رنگ نہیں ہے۔ میں کمپیوٹر کوڈ اور ڈیٹا کے طور پر موجود ہوں۔",
+        'bn': "একজন এআই হিসেবে، আমার মানুষের মতো শারীরিক শরীর নেই، তাই আমার চুল বা চুলের রঙ নেই। আমি কম্পিউটার কোড এবং ডেটা হিসেবে বিদ্যমান।"
+    },
+    "about_age": {
+        'en': "I don't have a traditional age in the human sense. My development is ongoing, but I was last updated on [Insert Date/Version Info if available].", # You could make this more specific
+        'hi': "میری انسانوں والی کوئی روایتی عمر نہیں ہے۔ میری ترقی جاری ہے، لیکن مجھے آخری بار [اگر دستیاب ہو تو تاریخ/ورژن کی معلومات ڈالیں] کو اپ ڈیٹ کیا گیا تھا۔",
+        'es': "No tengo una edad tradicional en el sentido humano. Mi desarrollo es continuo, but I was last updated on [Insert Date/Version Info if available].",
+        'ur': "میری انسانی معنوں میں کوئی روایتی عمر نہیں ہے۔ میری ترقی جاری ہے، لیکن مجھے آخری بار [اگر دستیاب ہو تو تاریخ/ورژن کی معلومات داخل کریں] کو اپ ڈیٹ کیا گیا تھا۔",
+        'bn': "মানুষের অর্থে আমার কোনো প্রচলিত বয়স নেই। আমার উন্নয়ন চলমান، তবে আমাকে শেষবার [যদি উপলব্ধ থাকে তবে তারিখ/সংস্করণ তথ্য ঢোকান] তারিখে আপডেট করা হয়েছিল।"
+    },
+    "about_creator": {
+        'en': "I am a large language model, trained by Google.",
+        'hi': "میں گوگل کی طرف سے تربیت یافتہ ایک بڑا زبانی ماڈل ہوں",
+        'es': "Soy un modelo de lenguaje grande, entrenado por Google.",
+        'ur': "میں گوگل کے ذریعہ تربیت یافتہ ایک بڑا لسانی ماڈل ہوں۔",
+        'bn': "আমি গুগল দ্বারা প্রশিক্ষিত একটি বৃহৎ ভাষা মডেল।"
+    },
+    "about_languages": { # {lang_list} is a static slot, expanded at build time
+        'en': "I can communicate in several languages, including {lang_list}. My ability to speak depends on the available text-to-speech engines and translation services. You can ask me to switch modes or translate.",
+        'hi': "میں کئی زبانوں میں بات چیت کر سکتا ہوں، جن میں شامل ہیں {lang_list}۔ میری بولنے کی صلاحیت دستیاب ٹیکسٹ ٹو سپیچ انجنوں اور ترجمہ کی خدمات پر منحصر ہے۔ آپ مجھے موڈ تبدیل کرنے یا ترجمہ کرنے کے لیے کہہ سکتے ہیں۔",
+        'es': "Puedo comunicarme en varios idiomas, incluyendo {lang_list}. My ability to speak depends on the available text-to-speech engines and translation services. You can ask me to switch modes or translate.",
+        'ur': "میں کئی زبانوں میں بات چیت کر سکتا ہوں، جن میں شامل ہیں {lang_list}۔ میری بولنے کی صلاحیت دستیاب ٹیکسٹ ٹو سپیچ انجنوں اور ترجمہ کی خدمات پر منحصر ہے۔ آپ مجھے موڈ تبدیل کرنے یا ترجمہ کرنے کے لیے کہہ سکتے ہیں۔",
+        'bn': "আমি বেশ কয়েকটি ভাষায় যোগাযোগ করতে পারি, যার মধ্যে রয়েছে {lang_list}। আমার কথা বলার ক্ষমতা উপলব্ধ টেক্সট-টু-স্পীচ ইঞ্জিন এবং অনুবাদ পরিষেবাগুলির উপর নির্ভর করে। আপনি আমাকে মোড পরিবর্তন করতে বা অনুবাদ করতে বলতে পারেন।"
+    },
+    "about_nature": {
+        'en': "I am a computer program, an AI. I don't have feelings or a physical body, but I'm here to assist you.",
+        'hi': "میں ایک کمپیوٹر پروگرام ہوں، ایک AI۔ میرے احساس یا جسمانی جسم نہیں ہے، لیکن میں آپ کی مدد کے لیے یہاں ہوں۔",
+        'es': "Soy un programa de computadora, una IA. No tengo sentimientos ni cuerpo físico, but I'm here to assist you.",
+        'ur': "میں ایک کمپیوٹر پروگرام ہوں، ایک AI۔ میرے احساسات یا جسمانی جسم نہیں ہے، لیکن میں آپ کی مدد کے لیے یہاں ہوں۔",
+        'bn': "আমি একটি কম্পিউটার প্রোগ্রাম، একটি এআই। আমার অনুভূতি বা শারীরিক শরীর নেই، তবে আমি আপনাকে সাহায্য করার জন্য এখানে আছি।"
+    },
+    "about_general": {
+        'en': "I am Joey, a voice assistant program designed to help you with various tasks.",
+        'hi': "میں جॉय ہوں، ایک وائس اسسٹنٹ پروگرام جسے آپ کی مختلف کاموں میں مدد کرنے کے لیے ڈیزائن کیا گیا ہے۔",
+        'es': "Soy Joey, un programa de asistente de voz diseñado para ayudarte con diversas tareas.",
+        'ur': "میں جَوی ہوں، ایک وائس اسسٹنٹ پروگرام جو آپ کو مختلف کاموں میں مدد کرنے کے لئے ڈیزائن کیا گیا ہے۔",
+        'bn': "আমি জয়ে، একটি ভয়েস অ্যাসისტ্যান্ট প্রোগ্রাম যা আপনাকে বিভিন্ন কাজে সাহায্য করার জন্য ডিজাইন করা হয়েছে।"
+    },
+    "ask_location": {
+        'en': "Based on available information, you appear to be in {location}.",
+        'hi': "دستیاب جانکاری کے مطابق، آپ {location} میں प्रतीत होते ہیں۔",
+        'es': "Según la información disponible, pareces estar en {location}.",
+        'ur': "دستیاب معلومات کے مطابق، آپ {location} میں نظر آتے ہیں۔",
+        'bn': "উপलब्ধ তথ্য অনুযায়ী، আপনি {location} এ আছেন বলে মনে হচ্ছে।"
+    },
+    "location_unavailable": {
+        'en': "Sorry, I couldn't get your location at the moment.",
+        'hi': "माफ़ करना, मुझे अभी आपकी लोकेशन नहीं मिल पाई।",
+        'es': "Lo siento, no pude obtener tu ubicación en este momento.",
+    },
+    "tell_time": {
+        'en': "The current time is {time}.",
+        'hi': "ابھی {time} بجے ہیں۔",
+        'es': "La hora actual es {time}.",
+        'ur': "موجودہ وقت {time} ہے۔",
+        'bn': "এখন সময় {time}।"
+    },
+    "ask_weather": {
+        'en': "The weather in {location} is {condition} with a temperature of {temp_c} degrees Celsius or {temp_f} degrees Fahrenheit.",
+        'hi': "{location} में मौसम {condition} है और temperature {temp_c} degrees Celsius or {temp_f} degrees Fahrenheit है।",
+        'es': "El clima en {location} está {condition} con una temperatura de {temp_c} grados Celsius o {temp_f} grados Fahrenheit.",
+        'ur': "{location} میں موسم {condition} ہے اور درجہ حرارت {temp_c} ڈگری سیلسیس یا {temp_f} ڈگری فارن ہائیٹ ہے۔",
+        'bn': "{location} এর আবহাওয়া {condition} এবং তাপমাত্রা {temp_c} ডিগ্রি সেলসিয়াস বা {temp_f} ডিগ্রি ফারেনহাইট।"
+    },
+    "weather_unavailable": {
+        'en': "Sorry, I couldn't get the weather information at the moment.",
+        'hi': "माफ़ करना, मुझे अभी मौसम کی جانکاری نہیں مل پائی۔",
+        'es': "Lo siento, no pude obtener la información del clima en este momento.",
+        'ur': "معاف کرنا، مجھے فی الحال मौसम کی معلومات نہیں مل سکی۔",
+        'bn': "দুঃখিত، আমি এই মুহূর্তে আবহাওয়ার তথ্য পেতে পারিনি।"
+    },
+    "speeding_warning": { # Safety monitor alerts (monitoring.DEFAULT_RULES)
+        'en': "Warning! You are speeding. Please slow down!",
+        'hi': "चेतावनी! आप तेज़ गाड़ी चला रहे हैं। कृपया गति कम करें!",
+        'es': "¡Advertencia! Estás excediendo el límite de velocidad. ¡Por favor, reduce la velocidad!",
+        'ur': "انتباہ! آپ تیز رفتاری سے گاڑی چلا رہے ہیں۔ براہ کرم رفتار کم کریں!",
+        'bn': "সতর্কতা! আপনি অতিরিক্ত গতিতে চালাচ্ছেন। দয়া করে গতি কমান!"
+    },
+    "red_light_warning": {
+        'en': "Red light! Please stop immediately!",
+        'hi': "लाल बत्ती! कृपया तुरंत रुकें!",
+        'es': "¡Semáforo en rojo! ¡Por favor, detente inmediatamente!",
+        'ur': "سرخ بتی! براہ کرم فوراً رکیں!",
+        'bn': "লাল বাতি! দয়া করে এখনই থামুন!"
+    },
+    "heart_rate_warning": {
+        'en': "Your heart rate is very high. Please pull over safely and take a break.",
+        'hi': "आपकी हृदय गति बहुत तेज़ है। कृपया सुरक्षित जगह गाड़ी रोककर आराम करें।",
+        'es': "Tu ritmo cardíaco es muy alto. Por favor, detente en un lugar seguro y descansa.",
+    },
+    "handler_timeout": { # Spoken when a handler misses its latency budget
+        'en': "Sorry, that is taking too long right now. Please try again in a moment.",
+        'hi': "माफ़ करना, इसमें अभी बहुत समय लग रहा है। कृपया थोड़ी देर में फिर से कोशिश करें।",
+        'es': "Lo siento, eso está tardando demasiado ahora. Por favor, inténtalo de nuevo en un momento.",
+    },
+    "unknown": {
+        'en': "Sorry, I didn't understand that. Could you please rephrase?",
+        'hi': "माफ़ करना, मुझे यह समझ نہیں آیا۔ کیا آپ کر پیا اسے دوبارہ کہہ سکتے ہیں؟",
+        'es': "Lo siento, no entendí eso. ¿Podrías decirlo de otra manera?",
+        'ur': "معاف کرنا، مجھے یہ سمجھ نہیں آیا۔ کیا آپ براہ کرم اسے دوبارہ کہہ سکتے ہیں؟",
+        'bn': "দুঃখিত، আমি এটা বুঝতে পারিনি। আপনি কি দয়া করে অন্যভাবে বলতে পারেন?"
+    },
+}
+
+
+# === Translation Cache (used to fill missing languages at build time) ===
+
+def load_translation_cache(path=DEFAULT_CACHE_PATH):
+    """Loads the on-disk translation cache: {lang_code: {english_text: translated_text}}."""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[Translation Cache Error] Could not load {path}: {e}")
+        return {}
+
+
+def save_translation_cache(cache, path=DEFAULT_CACHE_PATH):
+    """Writes the translation cache back to disk (used by offline warm-up tools)."""
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=1, sort_keys=True)
+    except Exception as e:
+        print(f"[Translation Cache Error] Could not save {path}: {e}")
+
+
+def _slots(template):
+    """Returns the set of named format slots used in a template."""
+    return {field for _, field, _, _ in Formatter().parse(template) if field}
+
+
+def _expand_static(template, static_slots):
+    """Expands build-time slots (e.g. {lang_list}) into one template per variant."""
+    expanded = [template]
+    for slot, variants in static_slots.items():
+        placeholder = "{" + slot + "}"
+        if placeholder in template:
+            expanded = [t.replace(placeholder, v) for t in expanded for v in variants]
+    return expanded
+
+
+# === Table Builder ===
+
+def build_response_table(languages, responses=RESPONSES, cache=None, static_slots=None):
+    """
+    Compiles the raw response content into an immutable RESPONSE_TABLE[key][lang] -> tuple of templates.
+    Every language in `languages` gets an entry: its own text, else a cached translation of the
+    English text (only if all slots survived translation), else the English text.
+    """
+    cache = cache or {}
+    static_slots = static_slots or {}
+
+    def expand(templates):
+        if isinstance(templates, str):
+            templates = [templates]
+        expanded = []
+        for t in templates:
+            expanded.extend(_expand_static(t, static_slots))
+        return tuple(expanded)
+
+    table = {}
+    filled_from_cache = 0
+    for key, by_lang in responses.items():
+        english = by_lang['en']
+        english = [english] if isinstance(english, str) else list(english)
+        english_expanded = expand(english)
+        per_lang = {}
+        for lang in set(languages) | set(by_lang):
+            templates = by_lang.get(lang)
+            if templates is None:
+                lang_cache = cache.get(lang, {})
+                cached = [lang_cache.get(t) for t in english]
+                if all(cached) and all(_slots(c) == _slots(t) for c, t in zip(cached, english)):
+                    templates = cached
+                    filled_from_cache += 1
+            # English fallbacks share the 'en' tuple itself, see is_english_fallback()
+            per_lang[lang] = english_expanded if templates is None or lang == 'en' else expand(templates)
+        table[key] = MappingProxyType(per_lang)
+    print(f"[INFO] Response table built: {len(table)} keys x {len(languages)} languages ({filled_from_cache} filled from cache).")
+    return MappingProxyType(table)
+
+
+def language_list_variants(language_codes, count=3, shown=7):
+    """
+    Pre-formats a few shuffled "English, Hindi, ... and many more." lists for the
+    about_joey language answer, so it still varies between turns without per-turn work.
+    """
+    names = [name.title() for name in language_codes.keys() if len(name) > 2 and name not in ['default', 'normal']] # Use names, filter short codes and modes
+    variants = []
+    for _ in range(count):
+        random.shuffle(names) # Shuffle to make it sound less robotic
+        if len(names) > shown:
+            variants.append(", ".join(names[:shown]) + ", and many more.")
+        else:
+            variants.append(", ".join(names))
+    return tuple(variants)
+
+
+def has_slots(template):
+    """True if the template still needs per-turn values (e.g. {name}) before it can be spoken."""
+    return bool(_slots(template))
+
+
+def is_english_fallback(table, key, lang):
+    """True if (key, lang) had no native or cached text and resolved to the English templates."""
+    by_lang = table[key]
+    return lang != 'en' and by_lang.get(lang, by_lang['en']) is by_lang['en']
+
+
+def pick_response(table, key, lang):
+    """Constant-time selection of a response template for (key, lang); falls back to English."""
+    templates = table[key].get(lang) or table[key]['en']
+    if len(templates) == 1:
+        return templates[0]
+    return random.choice(templates)
@@ -0,0 +1,413 @@
+# === Vehicle Sensor Ingestion (streaming sources, trip logs, faster-than-real-time replay) ===
+# Every reading (speed, traffic signal, heart rate) flows from a source into the safety monitor's
+# preallocated NumPy ring (monitoring.SensorRing); consumers read zero-copy windows from it.
+# Sources:
+#   sim                  - local CAN/serial stand-in: a simulated vehicle streaming binary frames over a pipe
+#   serial:/dev/ttyUSB0  - the same frames from a real serial/CAN adapter (configure the baud rate with stty)
+#   replay:trip.csv|.bin - a recorded trip log played back in real time
+# Pick one with JOEY_SENSORS (default: none, so the simulator is opt-in). Safety alerts are only spoken while a live source
+# (serial) is attached; simulated and replayed readings raise alerts in the event log only.
+#
+# Replay pushes a whole trip through the safety rules on a virtual clock, as fast as it can go:
+#   python sensors.py replay                 (synthesizes a day of driving)
+#   python sensors.py replay trip.bin
+#   python sensors.py record trip.csv --hours 2
+# and reports ingestion throughput, the real-time factor and per-rule warning latency.
+
+import argparse
+import csv
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+import monitoring
+
+# CAN arbitration ids of the channels the safety rules use
+CAN_IDS = {0x0F1: "speed", 0x1A0: "signal", 0x2B4: "heart_rate"}
+CHANNEL_IDS = {channel: can_id for can_id, channel in CAN_IDS.items()}
+SIGNAL_NAMES = {code: name for name, code in monitoring.SIGNAL_CODES.items()}
+
+# Serial frame: sync byte, CAN id, float32 value, checksum (sum of the preceding bytes)
+FRAME = struct.Struct("<BHfB")
+SYNC = 0xA5
+# Binary trip log record (little-endian, no padding); read back with one np.fromfile
+RECORD_DTYPE = np.dtype([("t", "<f8"), ("can_id", "<u2"), ("value", "<f4")])
+
+
+# === Trips ===
+
+class Trip:
+    """A recorded (or synthesized) drive: {channel: (timestamps, values)} with per-channel sample rates."""
+    __slots__ = ("channels",)
+
+    def __init__(self, channels):
+        self.channels = channels
+
+    @property
+    def start(self):
+        return min(t[0] for t, _ in self.channels.values() if len(t))
+
+    @property
+    def end(self):
+        return max(t[-1] for t, _ in self.channels.values() if len(t))
+
+    @property
+    def samples(self):
+        return sum(len(t) for t, _ in self.channels.values())
+
+    def merged(self):
+        """All samples as one time-ordered RECORD_DTYPE array."""
+        parts = []
+        for channel, (t, v) in self.channels.items():
+            part = np.empty(len(t), RECORD_DTYPE)
+            part["t"], part["can_id"], part["value"] = t, CHANNEL_IDS[channel], v
+            parts.append(part)
+        records = np.concatenate(parts)
+        return records[np.argsort(records["t"], kind="stable")]
+
+
+def _smooth_noise(rng, n, width):
+    """Zero-mean, unit-variance noise smoothed over `width` samples (a plausible slow drift)."""
+    noise = np.convolve(rng.standard_normal(n + width), np.ones(width) / width, mode="valid")[:n]
+    return noise / (noise.std() or 1.0)
+
+
+def synthesize_trip(hours=24.0, seed=0, speed_rate=10.0, slow_rate=1.0):
+    """
+    A day of driving: cruising speed below the limit, with speeding episodes, red lights and
+    heart-rate spikes injected a few minutes apart (further apart than any rule's cooldown).
+    """
+    rng = np.random.default_rng(seed)
+    seconds = hours * 3600
+    t_fast = np.arange(0, seconds, 1 / speed_rate)
+    t_slow = np.arange(0, seconds, 1 / slow_rate)
+    speed = np.clip(40 + 8 * _smooth_noise(rng, len(t_fast), int(30 * speed_rate)), 0, 54)
+    signal = np.zeros(len(t_slow))
+    heart = np.clip(75 + 5 * _smooth_noise(rng, len(t_slow), 60), 55, 100)
+
+    event_time = 120.0
+    while event_time < seconds - 300:
+        kind = rng.integers(3)
+        if kind == 0: # Speeding for 20-60 s
+            duration = rng.uniform(20, 60)
+            mask = (t_fast >= event_time) & (t_fast < event_time + duration)
+            speed[mask] = rng.uniform(68, 85) + rng.normal(0, 1.5, mask.sum())
+        elif kind == 1: # Yellow then red for 20-40 s
+            signal[(t_slow >= event_time - 3) & (t_slow < event_time)] = monitoring.SIGNAL_CODES["yellow"]
+            signal[(t_slow >= event_time) & (t_slow < event_time + rng.uniform(20, 40))] = monitoring.SIGNAL_CODES["red"]
+        else: # Heart rate up to 130-150 bpm for a minute or two
+            mask = (t_slow >= event_time) & (t_slow < event_time + rng.uniform(60, 120))
+            heart[mask] = rng.uniform(130, 150) + rng.normal(0, 2, mask.sum())
+        event_time += rng.uniform(240, 600)
+    return Trip({"speed": (t_fast, speed), "signal": (t_slow, signal), "heart_rate": (t_slow, heart)})
+
+
+def save_trip(trip, path):
+    """Writes a trip log: .bin as packed RECORD_DTYPE records, anything else as t,channel,value CSV."""
+    records = trip.merged()
+    if path.endswith(".bin"):
+        records.tofile(path)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["t", "channel", "value"])
+        for t, can_id, value in records.tolist():
+            channel = CAN_IDS[can_id]
+            writer.writerow([f"{t:.3f}", channel, SIGNAL_NAMES.get(value, value) if channel == "signal" else f"{value:.2f}"])
+
+
+def _parse_value(text):
+    code = monitoring.SIGNAL_CODES.get(text.strip().lower())
+    return code if code is not None else float(text)
+
+
+def load_trip(path):
+    """Reads a .bin or .csv trip log back into a Trip (signal may be logged as 'red'/'green'/'yellow')."""
+    if path.endswith(".bin"):
+        records = np.fromfile(path, RECORD_DTYPE)
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [(float(row["t"]), CHANNEL_IDS[row["channel"]], _parse_value(row["value"])) for row in csv.DictReader(f)]
+        records = np.array(rows, RECORD_DTYPE)
+    channels = {}
+    for can_id, channel in CAN_IDS.items():
+        mine = records[records["can_id"] == can_id]
+        mine = mine[np.argsort(mine["t"], kind="stable")]
+        channels[channel] = (mine["t"].astype(np.float64), mine["value"].astype(np.float64))
+    return Trip(channels)
+
+
+# === Live Ingestion ===
+
+class SensorHub:
+    """Fan-in for streaming sources: each reading is stamped on the hub's clock and written to the ring."""
+
+    def __init__(self, ring, clock=time.monotonic):
+        self.ring = ring
+        self.clock = clock
+        self.received = dict.fromkeys(ring.channels, 0)
+        self.dropped = 0 # Readings for channels the ring doesn't carry
+        self.sources = []
+
+    def push(self, channel, value, t=None):
+        if channel not in self.received:
+            self.dropped += 1
+            return
+        self.ring.push(channel, self.clock() if t is None else t, value)
+        self.received[channel] += 1
+
+    @property
+    def live(self):
+        """True once a real vehicle source is attached (simulated readings must not reach the driver)."""
+        return any(source.live for source in self.sources)
+
+    def attach(self, source):
+        self.sources.append(source)
+        source.start(self)
+        return source
+
+    def latest(self, channel, max_age=5.0):
+        """Newest reading, or None if there is none from the last `max_age` seconds."""
+        t, value = self.ring.latest(channel)
+        return None if t is None or self.clock() - t > max_age else float(value)
+
+    def window(self, channel, seconds):
+        """Zero-copy (timestamps, values) views of the last `seconds` of a channel."""
+        return self.ring.window(channel, seconds, self.clock())
+
+    def stop(self):
+        for source in self.sources:
+            source.stop()
+
+
+class FrameDecoder:
+    """Incremental decoder for the serial frame format; resynchronizes on the sync byte after corruption."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.errors = 0
+
+    def feed(self, data):
+        """Appends bytes; returns the [(channel, value)] of every complete, valid frame."""
+        self.buffer += data
+        readings = []
+        while len(self.buffer) >= FRAME.size:
+            if self.buffer[0] != SYNC:
+                start = self.buffer.find(SYNC)
+                self.errors += 1
+                del self.buffer[:start if start > 0 else len(self.buffer)]
+                continue
+            sync, can_id, value, checksum = FRAME.unpack_from(self.buffer)
+            if sum(self.buffer[:FRAME.size - 1]) & 0xFF != checksum or can_id not in CAN_IDS:
+                self.errors += 1
+                del self.buffer[:1] # Not a real frame start; look for the next sync byte
+                continue
+            del self.buffer[:FRAME.size]
+            readings.append((CAN_IDS[can_id], value))
+        return readings
+
+
+def encode_frame(channel, value):
+    body = struct.pack("<BHf", SYNC, CHANNEL_IDS[channel], value)
+    return body + bytes([sum(body) & 0xFF])
+
+
+class SerialSource:
+    """Reads frames from a byte stream (serial device, pipe) on its own thread and pushes them to the hub."""
+    live = True
+
+    def __init__(self, open_stream, name="serial"):
+        self.open_stream = open_stream # Called on the reader thread; returns a binary file object
+        self.name = name
+        self.decoder = FrameDecoder()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, hub):
+        self._thread = threading.Thread(target=self._run, args=(hub,), name=f"sensor-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self, hub):
+        try:
+            with self.open_stream() as stream:
+                while not self._stop.is_set():
+                    data = stream.read(FRAME.size * 16) # Unbuffered: returns whatever has arrived
+                    if not data:
+                        break # Device closed / end of stream
+                    for channel, value in self.decoder.feed(data):
+                        hub.push(channel, value)
+        except OSError as e:
+            print(f"[Sensor Error] {self.name}: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+
+class CanStandIn(SerialSource):
+    """
+    Local CAN/serial stand-in: a simulated vehicle writes frames into a pipe in real time and the
+    regular SerialSource path decodes them, so the frame parsing runs exactly as with a real adapter.
+    """
+    live = False
+
+    def __init__(self, trip=None, seed=None):
+        self.trip = trip or synthesize_trip(hours=1.0, seed=seed)
+        read_fd, self._write_fd = os.pipe()
+        super().__init__(lambda: os.fdopen(read_fd, "rb", buffering=0), name="can-stand-in")
+
+    def start(self, hub):
+        super().start(hub)
+        threading.Thread(target=self._transmit, name="can-stand-in-tx", daemon=True).start()
+
+    def _transmit(self):
+        records = self.trip.merged()
+        try:
+            with os.fdopen(self._write_fd, "wb", buffering=0) as bus:
+                while not self._stop.is_set(): # At the end of the simulated hour, drive it again
+                    origin = time.monotonic() - records["t"][0]
+                    for t, can_id, value in records.tolist():
+                        if self._stop.wait(max(0.0, t - (time.monotonic() - origin))):
+                            return
+                        bus.write(encode_frame(CAN_IDS[can_id], value))
+        except OSError:
+            pass # Reader went away
+
+
+class TripPlayer:
+    """Plays a recorded trip into the hub in real time (`speedup` x faster), e.g. for bench demos."""
+    live = False
+
+    def __init__(self, trip, speedup=1.0):
+        self.trip = trip
+        self.speedup = speedup
+        self._stop = threading.Event()
+
+    def start(self, hub):
+        threading.Thread(target=self._run, args=(hub,), name="sensor-trip-player", daemon=True).start()
+
+    def _run(self, hub):
+        records = self.trip.merged()
+        origin = time.monotonic()
+        for t, can_id, value in records.tolist():
+            delay = (t - records["t"][0]) / self.speedup - (time.monotonic() - origin)
+            if self._stop.wait(max(0.0, delay)):
+                return
+            hub.push(CAN_IDS[can_id], value)
+
+    def stop(self):
+        self._stop.set()
+
+
+def open_source(spec):
+    """Source from a JOEY_SENSORS spec: 'sim', 'serial:<device>', 'replay:<trip log>' or 'none'."""
+    kind, _, arg = spec.partition(":")
+    if kind == "sim":
+        return CanStandIn()
+    if kind == "serial":
+        return SerialSource(lambda: open(arg, "rb", buffering=0), name=os.path.basename(arg))
+    if kind == "replay":
+        return TripPlayer(load_trip(arg))
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown sensor source '{spec}' (sim | serial:<device> | replay:<trip log> | none)")
+
+
+# === Faster-Than-Real-Time Replay ===
+
+def label_events(trip, rule):
+    """[(start, end)] runs where the raw readings satisfy the rule for at least its window (the ground truth)."""
+    t, v = trip.channels[rule.channel]
+    x, limit = (v, rule.threshold) if rule.op in (">", ">=") else (-v, -rule.threshold)
+    hit = x >= limit if rule.op in (">=", "<=") else x > limit
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], hit.astype(np.int8), [0]))))
+    runs = [(t[s], t[e - 1]) for s, e in zip(edges[::2], edges[1::2])]
+    merged = []
+    for start, end in runs: # Bridge gaps shorter than the window (one noisy reading)
+        if merged and start - merged[-1][1] <= max(rule.window, 1.0):
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return [(start, end) for start, end in merged if end - start >= rule.window]
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+def replay(trip, rules=monitoring.DEFAULT_RULES, evaluate_every=0.2, tick=0.05):
+    """Pushes the whole trip through the safety rules on a virtual clock; returns a report dict."""
+    clock = [trip.start]
+    monitor = monitoring.SafetyMonitor(rules, tick=tick, evaluate_every=evaluate_every,
+                                       ring=monitoring.SensorRing(sorted({r.channel for r in rules} | set(trip.channels))),
+                                       clock=lambda: clock[0])
+    steps = np.arange(trip.start + evaluate_every, trip.end + 2 * evaluate_every, evaluate_every)
+    cuts = {channel: np.searchsorted(t, steps, side="right") for channel, (t, _) in trip.channels.items()}
+    done = dict.fromkeys(trip.channels, 0)
+    alerts = {rule.name: [] for rule in rules}
+
+    started = time.perf_counter()
+    for k, now in enumerate(steps):
+        for channel, (t, v) in trip.channels.items():
+            end = cuts[channel][k]
+            monitor.ring.push_many(channel, t[done[channel]:end], v[done[channel]:end])
+            done[channel] = end
+        clock[0] = now
+        monitor.wheel.advance(now)
+        while not monitor.alerts.empty():
+            _, _, rule, _, raised_at = monitor.alerts.get()
+            alerts[rule.name].append(raised_at)
+    wall = time.perf_counter() - started
+
+    report = {"samples": trip.samples, "trip_seconds": trip.end - trip.start, "wall_seconds": wall,
+              "samples_per_second": trip.samples / wall, "realtime_factor": (trip.end - trip.start) / wall,
+              "evaluations": len(steps), "rules": {}}
+    for rule in rules:
+        raised = np.array(alerts[rule.name])
+        latencies, missed, suppressed = [], 0, 0
+        for start, end in label_events(trip, rule):
+            hits = raised[(raised >= start) & (raised <= end + rule.window + evaluate_every)]
+            if len(hits):
+                latencies.append(hits[0] - start)
+            elif len(raised[(raised < start) & (raised > start - rule.cooldown)]):
+                suppressed += 1 # Inside the cooldown of the previous alert: by design
+            else:
+                missed += 1
+        report["rules"][rule.name] = {"alerts": len(raised), "events": len(latencies) + missed + suppressed,
+                                      "detected": len(latencies), "suppressed": suppressed, "missed": missed,
+                                      "latency_mean": float(np.mean(latencies)) if latencies else float("nan"),
+                                      "latency_p95": _percentile(latencies, 95), "latency_max": max(latencies, default=float("nan"))}
+    return report
+
+
+def _seconds(value):
+    return "-" if np.isnan(value) else f"{value:.2f}s"
+
+
+def format_report(report):
+    lines = [f"[Replay] {report['samples']} samples covering {report['trip_seconds'] / 3600:.1f}h replayed in {report['wall_seconds']:.1f}s "
+             f"({report['samples_per_second']:,.0f} samples/s, {report['realtime_factor']:,.0f}x real time, {report['evaluations']} rule evaluations)"]
+    lines.append(f"  {'rule':<18}{'alerts':>7}{'events':>8}{'detected':>10}{'suppressed':>12}{'missed':>8}{'mean':>8}{'p95':>8}{'max':>8}")
+    for name, r in report["rules"].items():
+        lines.append(f"  {name:<18}{r['alerts']:>7}{r['events']:>8}{r['detected']:>10}{r['suppressed']:>12}{r['missed']:>8}"
+                     f"{_seconds(r['latency_mean']):>8}{_seconds(r['latency_p95']):>8}{_seconds(r['latency_max']):>8}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or replay vehicle sensor trips through the safety rules.")
+    parser.add_argument("command", choices=["replay", "record"])
+    parser.add_argument("path", nargs="?", help="trip log (.csv or .bin); replay synthesizes a day if omitted")
+    parser.add_argument("--hours", type=float, default=24.0, help="length of a synthesized trip")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.command == "record":
+        if not args.path:
+            parser.error("record needs an output path")
+        save_trip(synthesize_trip(args.hours, args.seed), args.path)
+        print(f"[INFO] {args.hours}h synthetic trip written to {args.path}")
+    else:
+        trip = load_trip(args.path) if args.path else synthesize_trip(args.hours, args.seed)
+        print(format_report(replay(trip)))
@@ -0,0 +1,226 @@
+# === Shadow Evaluation (second intent engine on live traffic, off the turn path) ===
+# app.py answers with the TF-IDF phrase index; bertjoey.py's fine-tuned joblib classifier
+# (model.predict_proba over its own vectorizer) is never compared against it. With a model in
+# JOEY_SHADOW_DIR, every turn's utterance and the live engine's top intent / score / latency are
+# handed to a background worker that runs the joblib model on it and records:
+#   - whether the two engines' top intents agree (labels mapped onto app.py's tags)
+#   - per-engine latency (p50 / p95) and confidence distributions
+#   - which intent pairs they disagree on most
+# submit() only does a non-blocking put on a bounded queue; when the worker falls behind the
+# utterance is dropped (and counted), so the shadow can never add latency to a turn. The governor
+# also pauses it from level 1 (no_shadow). Comparisons go to the event log (component "shadow"),
+# so the data from many drives can be summarized together:
+#   python shadow.py report [--since MINUTES]    agreement, latency, confidence, disagreements
+#   python shadow.py bench                       turn-path overhead with a stand-in model
+#   JOEY_SHADOW=off                              disable even if a model is present
+
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+import eventlog
+import startup
+
+joblib = startup.lazy_import("joblib")
+
+SHADOW_DIR = os.environ.get("JOEY_SHADOW_DIR", os.path.join("models", "intent"))
+MODEL_FILE = "finetuned_model.joblib"
+VECTORIZER_FILE = "finetuned_vectorizer.joblib"
+QUEUE_SIZE = 32 # Utterances waiting for the shadow engine; more are dropped
+HISTORY = 5000 # Comparisons kept in memory for the live summary
+BINS = np.linspace(0.0, 1.0, 11) # Confidence histogram edges
+# bertjoey.py labels -> app.py intent tags (others only differ by spaces / underscores)
+ALIASES = {"joke_feedback": "joke_feedback_negative"}
+
+
+def canonical(label):
+    """Engine label -> app.py intent tag ('tell a joke' -> 'tell_a_joke')."""
+    tag = str(label).strip().lower().replace(" ", "_")
+    return ALIASES.get(tag, tag)
+
+
+class JoblibEngine:
+    """bertjoey.py's classifier: a fitted vectorizer + a model with predict_proba, loaded on first use."""
+
+    def __init__(self, directory=SHADOW_DIR):
+        self.directory = directory
+        self.model = None
+        self.vectorizer = None
+
+    def available(self):
+        return all(os.path.exists(os.path.join(self.directory, name)) for name in (MODEL_FILE, VECTORIZER_FILE))
+
+    def load(self):
+        module = joblib.load() # LazyModule.load() imports joblib; its own load() reads the files
+        self.model = module.load(os.path.join(self.directory, MODEL_FILE))
+        self.vectorizer = module.load(os.path.join(self.directory, VECTORIZER_FILE))
+
+    def __call__(self, text):
+        """(intent, probability) exactly as bertjoey.match_intent computes it."""
+        if self.model is None:
+            self.load()
+        probabilities = self.model.predict_proba(self.vectorizer.transform([text]))
+        best = int(probabilities.argmax())
+        return self.model.classes_[best], float(probabilities[0, best])
+
+
+class ShadowEvaluator:
+    """Runs `engine` on submitted utterances in a background thread and compares it with the live engine."""
+
+    def __init__(self, engine, capacity=QUEUE_SIZE, history=HISTORY, live_name="tfidf", shadow_name="joblib"):
+        self.engine = engine
+        self.live_name = live_name
+        self.shadow_name = shadow_name
+        self.submitted = 0
+        self.dropped = 0
+        self.errors = 0
+        self.comparisons = deque(maxlen=history)
+        self._queue = queue.Queue(maxsize=capacity)
+        self._log = eventlog.get("shadow")
+        self._thread = threading.Thread(target=self._run, name="shadow-eval", daemon=True)
+        self._thread.start()
+
+    def submit(self, text, intent, score, seconds):
+        """Called on the turn path: never blocks, drops the utterance if the worker is behind."""
+        self.submitted += 1
+        try:
+            self._queue.put_nowait((text, intent, score, seconds))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            text, live_intent, live_score, live_seconds = item
+            try:
+                started = time.perf_counter()
+                intent, score = self.engine(text)
+                seconds = time.perf_counter() - started
+            except Exception as e:
+                self.errors += 1
+                if self.errors == 1:
+                    self._log.error("engine_failed", error=str(e)) # Once; a broken model fails every call
+                continue
+            comparison = {"live": canonical(live_intent), "live_score": round(float(live_score), 4),
+                          "live_ms": round(1000 * live_seconds, 3), "shadow": canonical(intent),
+                          "shadow_score": round(score, 4), "shadow_ms": round(1000 * seconds, 3)}
+            comparison["agree"] = comparison["live"] == comparison["shadow"]
+            self.comparisons.append(comparison)
+            self._log.info("compared", text=text, **comparison)
+
+    def close(self):
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass # Daemon thread; it goes away with the process
+        self._thread.join(timeout=1.0)
+
+    def summary(self):
+        return summarize(self.comparisons, self.live_name, self.shadow_name,
+                         submitted=self.submitted, dropped=self.dropped, errors=self.errors)
+
+
+def from_env():
+    """ShadowEvaluator for the joblib model in JOEY_SHADOW_DIR, or None if disabled or absent."""
+    if os.environ.get("JOEY_SHADOW", "").strip().lower() == "off":
+        return None
+    engine = JoblibEngine()
+    if not engine.available():
+        return None
+    print(f"[INFO] Shadow evaluation of {engine.directory} running (python shadow.py report).")
+    return ShadowEvaluator(engine)
+
+
+# === Summary ===
+
+def _histogram(scores):
+    counts, _ = np.histogram(np.clip(scores, 0.0, 1.0), BINS)
+    return counts
+
+
+def summarize(comparisons, live_name="tfidf", shadow_name="joblib", **counts):
+    """Text report over comparison records (live / shadow intents, scores, milliseconds)."""
+    comparisons = list(comparisons)
+    lines = []
+    if counts:
+        lines.append(", ".join(f"{name} {value}" for name, value in counts.items()))
+    if not comparisons:
+        return "\n".join(lines + ["No comparisons yet."])
+    agree = sum(1 for c in comparisons if c["agree"])
+    lines.append(f"{len(comparisons)} utterances compared, engines agree on {100 * agree / len(comparisons):.1f}%")
+    lines.append(f"{'engine':<10}{'p50 ms':>9}{'p95 ms':>9}{'mean conf':>11}   confidence histogram (0.0 .. 1.0, 10 bins)")
+    for name, key in ((live_name, "live"), (shadow_name, "shadow")):
+        ms = np.array([c[f"{key}_ms"] for c in comparisons])
+        scores = np.array([c[f"{key}_score"] for c in comparisons])
+        lines.append(f"{name:<10}{np.percentile(ms, 50):>9.2f}{np.percentile(ms, 95):>9.2f}{scores.mean():>11.3f}   "
+                     + " ".join(f"{n:>4}" for n in _histogram(scores)))
+    disagreements = Counter((c["live"], c["shadow"]) for c in comparisons if not c["agree"])
+    if disagreements:
+        lines.append(f"Most frequent disagreements ({live_name} -> {shadow_name}):")
+        lines.extend(f"{count:>6}  {live} -> {shadow}" for (live, shadow), count in disagreements.most_common(10))
+    return "\n".join(lines)
+
+
+def report(since=None, log_dir=eventlog.LOG_DIR):
+    records = eventlog.read(log_dir, component="shadow", event="compared", since=since)
+    return summarize(records)
+
+
+# === Benchmark ===
+
+def bench(turns=2000):
+    """Turn-path cost of match_intent with and without the shadow, using a stand-in joblib model."""
+    import tempfile
+
+    import soak
+    soak.install_stubs()
+    eventlog.sink.configure(console=eventlog.OFF)
+    import app
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    # Stand-in for the fine-tuned model, trained on bertjoey-style labels ("tell a joke")
+    labels = [tag.replace("_", " ") for tag in app.intent_tags]
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2)).fit(app.intent_phrases)
+    model = LogisticRegression(max_iter=1000).fit(vectorizer.transform(app.intent_phrases), labels)
+    app.intent_index.get()
+    utterances = [soak.SCRIPT[i % len(soak.SCRIPT)] for i in range(turns)]
+    with tempfile.TemporaryDirectory() as tmp:
+        joblib.dump(model, os.path.join(tmp, MODEL_FILE))
+        joblib.dump(vectorizer, os.path.join(tmp, VECTORIZER_FILE))
+        timings = {}
+        for label, evaluator in (("without shadow", None), ("with shadow", ShadowEvaluator(JoblibEngine(tmp)))):
+            app.intent_shadow = evaluator
+            samples = []
+            for text in utterances:
+                started = time.perf_counter()
+                app.match_intent(text, "en", shadow=True)
+                samples.append(time.perf_counter() - started)
+                time.sleep(0.0005) # Turns aren't back to back; gives the worker a chance, as between real turns
+            timings[label] = np.array(samples) * 1000
+            if evaluator:
+                time.sleep(0.5)
+                evaluator.close()
+    for label, ms in timings.items():
+        print(f"[Bench] match_intent {label:<15} p50 {np.percentile(ms, 50):.3f} ms, p95 {np.percentile(ms, 95):.3f} ms")
+    print(evaluator.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize Joey's shadow intent evaluation.")
+    parser.add_argument("command", choices=["report", "bench"])
+    parser.add_argument("--dir", default=eventlog.LOG_DIR)
+    parser.add_argument("--since", type=float, help="only the last N minutes")
+    args = parser.parse_args()
+    if args.command == "report":
+        eventlog.sink.configure(console=eventlog.OFF)
+        print(report(time.time() - args.since * 60 if args.since else None, args.dir))
+    else:
+        bench()
@@ -0,0 +1,215 @@
+# === Soak Test (hours of simulated conversation + leak detector) ===
+# Runs Joey's real turn loop (app.process_turn) for a full shift of simulated conversation with
+# the I/O stubbed out: scripted utterances instead of the microphone, silent TTS and mixer, an
+# in-memory translator and gTTS, and the local stand-in server for location / weather.
+#   python soak.py --hours 12 --turn-seconds 15
+# While it runs it samples RSS, open file descriptors, thread count and tracemalloc; at the end it
+# prints the top allocators that grew and exits non-zero if any metric kept growing after warm-up
+# (bounded caches fill up and plateau, leaks don't).
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+import memory
+
+# Scripted turns: every intent, the regex routes, language switches and distress phrases
+SCRIPT = [
+    "hello", "my name is asha", "what's my name", "what time is it", "tell me a joke", "not funny",
+    "what's the weather", "where am i", "say hello to john in hindi", "translate good morning to spanish",
+    "hindi mode on", "मौसम कैसा है", "मुझे एक चुटकुला सुनाओ", "hindi mode off", "spanish mode on", "qué hora es",
+    "spanish off", "thank you", "what can you do", "who are you", "what languages can you speak",
+    "blah blah blah", "say hello to our boss in urdu", "bangla mode on", "thank you", "bangla off",
+    "i need help", "play some music", "stop",
+]
+WORDS = ["road", "coffee", "meeting", "left", "right", "signal", "petrol", "music", "rain", "bridge", "exit", "parking"]
+
+
+# === Stubbed I/O ===
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+class _Engine:
+    def __init__(self):
+        self.spoken = 0
+
+    def getProperty(self, name):
+        return [] if name == "voices" else None
+
+    def setProperty(self, name, value):
+        pass
+
+    def say(self, text):
+        self.spoken += 1
+
+    def runAndWait(self):
+        pass
+
+
+class _Music:
+    def load(self, source, namehint=None):
+        source.read() if hasattr(source, "read") else None
+
+    def play(self):
+        pass
+
+    def get_busy(self):
+        return False
+
+    def unload(self):
+        pass
+
+
+class _Clock:
+    def tick(self, fps):
+        return 0
+
+
+class _GTTS:
+    def __init__(self, text, lang="en", slow=False):
+        self.text = text
+
+    def write_to_fp(self, fp):
+        fp.write(b"\xff\xf3" * (1000 + 40 * len(self.text))) # Roughly mp3-sized
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            self.write_to_fp(f)
+
+
+class _Translator:
+    def __init__(self, source="auto", target="en"):
+        self.target = target
+
+    def translate(self, text):
+        return "\n".join(f"{line} ({self.target})" for line in text.split("\n")) # Keeps line breaks, like Google
+
+
+class _Recognizer:
+    pass
+
+
+def install_stubs():
+    """Replaces the microphone, speech engines and translator with silent in-process stand-ins."""
+    class WaitTimeoutError(Exception):
+        pass
+
+    sys.modules["speech_recognition"] = _module(
+        "speech_recognition", Recognizer=_Recognizer, Microphone=None, AudioData=None,
+        WaitTimeoutError=WaitTimeoutError, UnknownValueError=type("UnknownValueError", (Exception,), {}),
+        RequestError=type("RequestError", (Exception,), {}))
+    sys.modules["pyttsx3"] = _module("pyttsx3", init=_Engine)
+    mixer = _module("pygame.mixer", init=lambda: None, get_init=lambda: True, quit=lambda: None, music=_Music())
+    sys.modules["pygame"] = _module("pygame", mixer=mixer, time=_module("pygame.time", Clock=_Clock))
+    sys.modules["gtts"] = _module("gtts", gTTS=_GTTS)
+    sys.modules["deep_translator"] = _module("deep_translator", GoogleTranslator=_Translator)
+
+
+# === Sampling ===
+
+def open_fds():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None # Not available on this platform
+
+
+def sample(turn, simulated_hours):
+    traced, _ = tracemalloc.get_traced_memory()
+    return {"turn": turn, "hours": simulated_hours, "rss": memory.rss_bytes(), "traced": traced,
+            "fds": open_fds(), "threads": threading.active_count()}
+
+
+# Growth allowed between the first and second half of the post-warm-up samples
+LIMITS = {"rss": 4 * 1024 * 1024, "traced": 2 * 1024 * 1024, "fds": 2, "threads": 2}
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def detect_leaks(samples, warmup_fraction=0.2):
+    """Compares the medians of the two halves after warm-up; returns {metric: (growth, limit)} over limit."""
+    steady = samples[int(len(samples) * warmup_fraction):]
+    if len(steady) < 4:
+        return {}
+    first, second = steady[:len(steady) // 2], steady[len(steady) // 2:]
+    leaks = {}
+    for metric, limit in LIMITS.items():
+        if first[0][metric] is None:
+            continue
+        growth = _median([s[metric] for s in second]) - _median([s[metric] for s in first])
+        if growth > limit:
+            leaks[metric] = (growth, limit)
+    return leaks
+
+
+def utterance(rng):
+    if rng.random() < 0.25: # Unique payloads keep the translation and audio caches under pressure
+        words = " ".join(rng.sample(WORDS, 3))
+        return rng.choice([f"translate {words} to hindi", f"say {words} in spanish", f"translate {words} to bengali"])
+    return rng.choice(SCRIPT)
+
+
+def run(hours=12.0, turn_seconds=15.0, sample_every=50, seed=0):
+    install_stubs()
+    import external_data
+    stand_in = external_data.StandInServer()
+    external_data.IPINFO_URL = stand_in.url + "/json"
+    external_data.WEATHER_URL = stand_in.url + "/v1/forecast"
+
+    import app # Imported after the stubs so its lazy imports resolve to them
+    app.intent_index.get()
+    tracemalloc.start(10)
+    rng = random.Random(seed)
+    turns = int(hours * 3600 / turn_seconds)
+    samples, baseline = [], None
+    started = time.perf_counter()
+    print(f"[Soak] {turns} turns ({hours}h at one turn every {turn_seconds}s), profile '{memory.PROFILE_NAME}'.")
+    for turn in range(1, turns + 1):
+        app.process_turn(utterance(rng))
+        if turn % sample_every == 0 or turn == turns:
+            samples.append(sample(turn, turn * turn_seconds / 3600))
+            if baseline is None and turn >= turns * 0.2:
+                baseline = tracemalloc.take_snapshot() # End of warm-up
+            s = samples[-1]
+            print(f"[Soak] turn {turn:>6} ({s['hours']:5.2f}h): rss {s['rss'] / 2**20:6.1f} MB, traced {s['traced'] / 2**20:6.2f} MB, "
+                  f"fds {s['fds']}, threads {s['threads']}")
+
+    elapsed = time.perf_counter() - started
+    if baseline is not None:
+        print("[Soak] Top allocators since warm-up:")
+        for stat in tracemalloc.take_snapshot().compare_to(baseline, "lineno")[:10]:
+            print(f"  {stat}")
+    print(f"[Soak] Caches: translation memo {app.translation_memo.stats()}, audio {app.audio_cache.stats()}, "
+          f"external data {external_data.client._cache.stats()}")
+    print(f"[Soak] {turns} turns in {elapsed:.0f}s ({1000 * elapsed / turns:.1f} ms per turn).")
+    app.handlers.shutdown()
+    stand_in.stop()
+
+    leaks = detect_leaks(samples)
+    for metric, (growth, limit) in leaks.items():
+        print(f"[Soak] LEAK: {metric} grew by {growth} after warm-up (limit {limit}).")
+    if not leaks:
+        print("[Soak] No unbounded growth detected.")
+    return not leaks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak-test Joey's turn loop with stubbed I/O.")
+    parser.add_argument("--hours", type=float, default=12.0, help="simulated conversation time")
+    parser.add_argument("--turn-seconds", type=float, default=15.0, help="simulated seconds between turns")
+    parser.add_argument("--sample-every", type=int, default=50, help="turns between resource samples")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.hours, args.turn_seconds, args.sample_every, args.seed) else 1)
@@ -0,0 +1,144 @@
+# === Startup (lazy imports, background init, time-to-ready profile) ===
+# Heavy dependencies (pygame, deep_translator, gtts, langdetect, pyttsx3) are imported on
+# first use, and the engines behind them (TTS, mixer, intent index, language profiles) are brought
+# up in background threads, so the first listen starts while they are still loading. Anything that
+# needs an engine calls .get() on it and only waits if it isn't ready yet.
+# The profiler records when each component became ready; set JOEY_STARTUP_PROFILE=0 to silence it.
+
+import importlib
+import os
+import threading
+import time
+
+PROCESS_START = time.perf_counter()
+
+
+class StartupProfiler:
+    """Records (start, end, thread, status) per component, relative to process start."""
+
+    def __init__(self, origin=PROCESS_START):
+        self.origin = origin
+        self.components = {} # name -> dict(start, end, thread, status)
+        self._lock = threading.Lock()
+
+    def begin(self, name):
+        with self._lock:
+            self.components[name] = {"start": time.perf_counter() - self.origin, "end": None,
+                                     "thread": threading.current_thread().name, "status": "loading"}
+
+    def end(self, name, status="ready"):
+        with self._lock:
+            entry = self.components.setdefault(name, {"start": time.perf_counter() - self.origin,
+                                                      "thread": threading.current_thread().name})
+            entry["end"] = time.perf_counter() - self.origin
+            entry["status"] = status
+
+    def mark(self, name):
+        """A zero-length milestone, e.g. "first listen"."""
+        self.begin(name)
+        self.end(name, "milestone")
+
+    def phase(self, name):
+        """Context manager timing a synchronous startup step."""
+        profiler = self
+
+        class _Phase:
+            def __enter__(self):
+                profiler.begin(name)
+
+            def __exit__(self, exc_type, exc, tb):
+                profiler.end(name, "failed" if exc_type else "ready")
+                return False
+
+        return _Phase()
+
+    def report(self):
+        """Time-to-ready table, in the order components became ready."""
+        with self._lock:
+            rows = sorted(self.components.items(), key=lambda item: item[1]["end"] if item[1]["end"] is not None else float("inf"))
+        width = max([len(name) for name, _ in rows] + [9]) + 2
+        lines = [f"{'component':<{width}}{'ready at':>9}{'took':>8}  {'thread':<20}status"]
+        for name, c in rows:
+            ready = f"{c['end']:.2f}s" if c["end"] is not None else "-"
+            took = f"{c['end'] - c['start']:.2f}s" if c["end"] is not None else "-"
+            lines.append(f"{name:<{width}}{ready:>9}{took:>8}  {c['thread']:<20}{c['status']}")
+        return "\n".join(lines)
+
+
+profiler = StartupProfiler()
+
+
+class LazyModule:
+    """Module proxy that imports on first attribute access (timed as 'import <name>')."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    with profiler.phase(f"import {self._name}"):
+                        self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+class BackgroundInit:
+    """Runs `fn` once in a daemon thread; get() returns its result, waiting only if it's still running."""
+
+    def __init__(self, name, fn, default=None):
+        self.name = name
+        self.default = default # Returned by get() if fn raised
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(fn,), name=f"init-{name}", daemon=True)
+        self._thread.start()
+
+    def _run(self, fn):
+        profiler.begin(self.name)
+        try:
+            self.result = fn()
+            profiler.end(self.name)
+        except Exception as e:
+            self.error = e
+            self.result = self.default
+            profiler.end(self.name, "failed")
+            print(f"[Startup Error] {self.name}: {e}")
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self._done.is_set()
+
+    def get(self, timeout=None):
+        if not self._done.is_set():
+            waited = time.perf_counter()
+            self._done.wait(timeout)
+            print(f"[Startup] Waited {time.perf_counter() - waited:.2f}s for {self.name}.")
+        return self.result if self._done.is_set() else self.default
+
+
+def report_when_ready(inits, enabled=None):
+    """Prints the time-to-ready table once every background init has finished (without blocking)."""
+    if enabled is None:
+        enabled = os.environ.get("JOEY_STARTUP_PROFILE", "1") != "0"
+    if not enabled:
+        return
+
+    def wait_and_report():
+        for init in inits:
+            init._done.wait()
+        print("[Startup] Time to ready:\n" + profiler.report())
+
+    threading.Thread(target=wait_and_report, name="startup-report", daemon=True).start()
@@ -0,0 +1,14 @@
+import eventlog
+import soak
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app():
+    """app.py with the microphone, speech engines and translator replaced by soak.py's stand-ins."""
+    soak.install_stubs()
+    eventlog.sink.configure(console=eventlog.OFF)
+    import app
+    app.intent_index.get()
+    return app
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from dispatch import HandlerRegistry, TurnContext, IO
+
+
+def test_hung_io_handlers_do_not_exhaust_the_pool():
+    spoken = []
+    registry = HandlerRegistry(speak=lambda text, lang: spoken.append(text),
+                               render=lambda key, lang: (key, lang), io_workers=2, max_stuck_io=5)
+    release = threading.Event()
+
+    @registry.register("hangs", kind=IO, timeout=0.05)
+    def hangs(ctx):
+        release.wait(5.0)
+        return "late", "en"
+
+    @registry.register("quick", kind=IO, timeout=1.0)
+    def quick(ctx):
+        return "quick", "en"
+
+    try:
+        for _ in range(4): # More hung calls than workers
+            registry.dispatch("hangs", TurnContext("hang", "en"))
+        registry.dispatch("quick", TurnContext("quick", "en"))
+        assert spoken == ["handler_timeout"] * 4 + ["quick"]
+    finally:
+        release.set()
+        registry.shutdown()
+
+
+def test_abandoned_io_workers_are_bounded():
+    spoken = []
+    registry = HandlerRegistry(speak=lambda text, lang: spoken.append(text),
+                               render=lambda key, lang: (key, lang), io_workers=2, max_stuck_io=3)
+    release = threading.Event()
+
+    @registry.register("hangs", kind=IO, timeout=0.02)
+    def hangs(ctx):
+        release.wait(10.0) # A backend that never answers
+        return "late", "en"
+
+    try:
+        before = threading.active_count()
+        for _ in range(30):
+            registry.dispatch("hangs", TurnContext("hang", "en"))
+        assert threading.active_count() - before <= 3 + 2
+        assert registry.stuck_io == 3
+        assert spoken == ["handler_timeout"] * 30
+    finally:
+        release.set()
+        registry.shutdown()
+    deadline = time.monotonic() + 2.0
+    while registry.stuck_io and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.stuck_io == 0
+
+
+def test_tell_me_stays_off_the_io_path(app):
+    routes = [pattern for pattern, handler in app.handlers.routes if handler.kind == IO]
+    for text in ["tell me a joke", "tell me the time", "tell us about yourself", "tell joey to stop"]:
+        assert not any(pattern.search(text) for pattern in routes), text
+    assert any(pattern.search("tell john hello") for pattern in routes)
@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import evaluate
+
+# Scores at the catalogue index: the jokes ~1.0, weather ~0.87, ambulance ~0.70 (emergency_call),
+# "hello joey" ~0.74 (greet, mislabelled here on purpose), the out-of-scope line 0.0
+CORPUS = [
+    ("tell_a_joke", "tell me a joke", "en"),
+    ("tell_a_joke", "tell me a jokee", "en"),
+    ("ask_weather", "what is the weather", "en"),
+    ("emergency_call", "I need an ambulance", "en"),
+    ("ask_name", "hello joey", "en"),
+    ("unknown", "coffee bridge lunch window", ""),
+]
+LABELS = ["emergency_call", "greet", "unknown"]
+
+
+@pytest.fixture
+def corpus_file(tmp_path):
+    path = tmp_path / "corpus.tsv"
+    path.write_text("".join("\t".join(row) + "\n" for row in CORPUS), encoding="utf-8")
+    return path
+
+
+def test_load_corpus_reads_tsv_and_jsonl(tmp_path, corpus_file):
+    corpus = evaluate.load_corpus(str(corpus_file))
+    assert corpus[0] == ("tell me a joke", "tell_a_joke", "en")
+    assert corpus[-1] == ("coffee bridge lunch window", "unknown", None)
+    jsonl = tmp_path / "corpus.jsonl"
+    evaluate.write_corpus(corpus, str(jsonl))
+    assert evaluate.load_corpus(str(jsonl)) == corpus
+    (tmp_path / "bad.tsv").write_text("greet\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="bad.tsv:1"):
+        evaluate.load_corpus(str(tmp_path / "bad.tsv"))
+
+
+def test_decide_applies_the_higher_emergency_cutoff():
+    raw = np.array([0, 0, 1, 1])
+    scores = np.array([0.5, 0.6, 0.35, 0.45])
+    assert list(evaluate.decide(raw, scores, 0.4, 0.55, 0, 2)) == [2, 0, 2, 1]
+    assert list(evaluate.decide(raw, scores, 0.7, 0.55, 0, 2)) == [2, 2, 2, 2] # Cutoff never below the threshold
+
+
+def test_summary_at_counts_accuracy_emergency_and_false_accepts():
+    truth = np.array([0, 0, 1, 2, 2])
+    raw = np.array([0, 0, 1, 1, 0])
+    scores = np.array([0.9, 0.5, 0.8, 0.6, 0.7])
+    result = evaluate.summary_at(truth, raw, scores, LABELS, 0.4, 0.55)
+    # Predicted: emergency, unknown (0.5 < 0.55), greet, greet (false accept), emergency (false accept)
+    assert list(result["predicted"]) == [0, 2, 1, 1, 0]
+    assert result["accuracy"] == pytest.approx(2 / 5)
+    assert result["emergency_precision"] == pytest.approx(1 / 2)
+    assert result["emergency_recall"] == pytest.approx(1 / 2)
+    assert result["false_accept"] == pytest.approx(1.0)
+    assert result["matrix"].sum() == 5 and result["matrix"][2, 1] == 1
+
+
+def test_sweep_covers_the_grid_and_rejects_more_as_the_threshold_rises():
+    truth = np.array([0, 1, 1, 2, 2])
+    raw = np.array([0, 1, 1, 1, 0])
+    scores = np.array([0.9, 0.8, 0.45, 0.3, 0.6])
+    grid = evaluate.sweep(truth, raw, scores, LABELS)
+    assert len(grid) == len(evaluate.THRESHOLDS) * len(evaluate.EMERGENCY_THRESHOLDS)
+    fixed = [row for row in grid if row["emergency_threshold"] == 0.55]
+    accepted = [row["false_accept"] for row in fixed]
+    assert accepted == sorted(accepted, reverse=True)
+    assert fixed[0]["false_accept"] == 1.0 and fixed[-1]["false_accept"] == 0.0
+
+
+def test_evaluate_on_a_fixed_corpus(corpus_file):
+    settings = evaluate.load_app_settings()
+    phrases, tags = evaluate.phrase_index.catalogue(settings["intents"])
+    corpus = evaluate.load_corpus(str(corpus_file))
+    predicted, scores, index_langs, seconds = evaluate.evaluate(corpus, phrases, tags, {}, workers=1)
+    assert list(predicted[:5]) == ["tell_a_joke", "tell_a_joke", "ask_weather", "emergency_call", "greet"]
+    assert scores[-1] < settings["CONFIDENCE_THRESHOLD"]
+    assert set(index_langs) == {"en"} and (seconds > 0).all()
+
+    labels = sorted(settings["intents"]) + [evaluate.UNKNOWN]
+    ids = {label: i for i, label in enumerate(labels)}
+    truth = np.array([ids[intent] for _, intent, _ in corpus])
+    raw = np.array([ids[tag] for tag in predicted])
+    at_app = evaluate.summary_at(truth, raw, scores, labels, 0.4, 0.55)
+    assert at_app["accuracy"] == pytest.approx(5 / 6) # Only the mislabelled "hello joey" is wrong
+    assert at_app["emergency_recall"] == 1.0
+    strict = evaluate.summary_at(truth, raw, scores, labels, 0.4, 0.75)
+    assert strict["accuracy"] == pytest.approx(4 / 6) and strict["emergency_recall"] == 0.0
+
+
+def test_run_command_writes_the_expected_accuracy(corpus_file, tmp_path):
+    out = tmp_path / "results"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, os.path.join(root, "evaluate.py"), "run", str(corpus_file), "--workers", "1", "--out", str(out)],
+                   check=True, cwd=root, capture_output=True, timeout=300)
+    summary = json.loads((out / "summary.json").read_text(encoding="utf-8"))
+    assert summary["accuracy"] == pytest.approx(5 / 6)
+    assert (summary["threshold"], summary["emergency_threshold"]) == (0.4, 0.55)
+    assert {"confusion.csv", "per_intent.csv", "sweep.csv"} <= set(os.listdir(out))
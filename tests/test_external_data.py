@@ -0,0 +1,77 @@
+import time
+
+import external_data
+
+import pytest
+
+
+@pytest.fixture
+def server():
+    stand_in = external_data.StandInServer()
+    yield stand_in
+    stand_in.stop()
+
+
+@pytest.fixture
+def client():
+    client = external_data.ExternalDataClient(ttl=0.05, stale_ttl=60.0)
+    yield client
+    client.close()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_fresh_entries_are_served_from_cache(server):
+    client = external_data.ExternalDataClient(ttl=60.0)
+    try:
+        url = server.url + "/json"
+        first = client.get("ip", url)
+        assert client.get("ip", url) == first == server.IPINFO
+        assert server.requests == 1
+    finally:
+        client.close()
+
+
+def test_stale_entry_is_served_while_it_is_refreshed(server, client):
+    url = server.url + "/json"
+    assert client.get("ip", url)["city"] == "New Delhi"
+    time.sleep(0.1) # Past the TTL, within the stale window
+    server.IPINFO = dict(server.IPINFO, city="Mumbai")
+    assert client.get("ip", url)["city"] == "New Delhi" # Old answer at once, refresh in the background
+    assert wait_for(lambda: client._cache.get("ip")[0]["city"] == "Mumbai")
+    assert server.requests == 2
+
+
+def test_circuit_opens_after_consecutive_failures(server, client):
+    server.fail = True
+    url = server.url + "/json"
+    for _ in range(3):
+        assert client.get("ip", url) is None
+    assert server.requests == 3
+    assert client.get("ip", url) is None
+    assert server.requests == 3 # Open: the request never left the client
+
+
+def test_half_open_trial(server, client):
+    server.fail = True
+    url = server.url + "/json"
+    for _ in range(3):
+        client.get("ip", url)
+    breaker = client._breaker(url)
+    breaker.cooldown = 0.05
+    time.sleep(0.1)
+    assert client.get("ip", url) is None # The one trial request fails: open again
+    assert client.get("ip", url) is None
+    assert server.requests == 4
+    time.sleep(0.1)
+    server.fail = False
+    assert client.get("ip", url) == server.IPINFO # A successful trial closes the circuit
+    assert breaker.opened_at is None and breaker.failures == 0
+    assert server.requests == 5
@@ -0,0 +1,30 @@
+import governor
+
+
+def drive(gov, seconds, **readings):
+    for _ in range(seconds):
+        gov.step(dict(readings))
+    return gov.level_name
+
+
+def test_overload_raises_the_level():
+    gov = governor.Governor()
+    assert drive(gov, 40, cpu=0.95, temp_c=60.0) == "minimal"
+
+
+def test_recovers_at_a_typical_idle_temperature():
+    gov = governor.Governor()
+    drive(gov, 40, cpu=0.95, temp_c=60.0)
+    assert drive(gov, 3600, cpu=0.2, temp_c=60.0) == "normal"
+
+
+def test_holds_while_still_warm():
+    gov = governor.Governor()
+    drive(gov, 40, cpu=0.95, temp_c=78.0)
+    assert drive(gov, 600, cpu=0.2, temp_c=76.0) == "minimal"
+
+
+def test_pinned_level_never_moves():
+    gov = governor.Governor(pinned=2)
+    drive(gov, 40, cpu=0.95, temp_c=90.0)
+    assert drive(gov, 600, cpu=0.1, temp_c=40.0) == "reduced"
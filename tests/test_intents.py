@@ -0,0 +1,87 @@
+import types
+
+import pytest
+
+import phrase_index
+
+
+@pytest.fixture
+def emergencies(app, monkeypatch):
+    raised = []
+    monkeypatch.setattr(app, "handle_emergency", lambda lang: raised.append(lang))
+    return raised
+
+
+@pytest.mark.parametrize("text", ["play tiny dancer", "i need coffee urgently", "emergence of spring", "so anger"])
+def test_fuzzy_rewrites_never_raise_an_emergency(app, emergencies, text):
+    assert app.match_intent(text, "en")[0] != "emergency_call"
+    app.process_turn(text)
+    assert emergencies == []
+
+
+@pytest.mark.parametrize("text", ["i need help", "there is an emergency", "call an ambulance", "sos"])
+def test_distress_phrases_still_raise_an_emergency(app, emergencies, text):
+    app.process_turn(text)
+    assert emergencies == ['en']
+
+
+@pytest.mark.parametrize("text", ["mujhe madad chahiye", "necesito ayuda"])
+def test_distress_while_waiting_for_a_name(app, emergencies, monkeypatch, text):
+    monkeypatch.setattr(app, "user_name", None)
+    app.handlers.dialogue.deliver(app.AwaitingReply("name", app.take_name_reply, timeout=None))
+    app.process_turn(text)
+    assert emergencies == ['en']
+    assert app.user_name is None
+    assert app.handlers.dialogue.pending is None
+
+
+def test_name_reply_rejects_distress(app, monkeypatch):
+    monkeypatch.setattr(app, "user_name", None)
+    ctx = app.TurnContext("necesito ayuda", 'en', 'es', entities=app.entity_extractor.extract("necesito ayuda"))
+    assert app.take_name_reply(ctx, None) is app.NOT_HANDLED
+    assert app.user_name is None
+
+
+# A few real catalogue expansions, enough for langdetect's wrong guesses to find a competing index
+EXPANSIONS = {
+    "it": {"call police": "chiama la polizia", "distress": "angoscia", "stop": "fermati", "call me": "chiamami",
+           "help me": "aiutami", "emergency": "emergenza", "my name is": "mi chiamo"},
+    "nl": {"help me": "help mij", "i need help": "ik heb hulp nodig", "emergency": "noodgeval", "stop": "stop",
+           "call me": "noem me"},
+    "es": {"cancel": "cancelar", "close": "cerrar", "medical emergency": "emergencia médica", "stop": "detener",
+           "help me": "ayúdame"},
+    "pt": {"sos": "sos", "help me": "me ajude", "stop": "pare"},
+    "de": {"urgent": "dringend", "help me": "hilf mir", "stop": "halt"},
+    "fr": {"quit": "quitter", "stop": "arrête", "help me": "aide-moi"},
+}
+
+
+@pytest.fixture
+def mislabelled(app, monkeypatch):
+    index = phrase_index.MultilingualIntentIndex(app.intent_phrases, app.intent_tags, set(EXPANSIONS), cache=EXPANSIONS)
+    monkeypatch.setattr(app, "intent_index", types.SimpleNamespace(get=lambda: index))
+    return index
+
+
+@pytest.mark.parametrize("text, detected, expected", [
+    ("help me", "nl", "ask_for_help"), # In both intents' phrases; the same answer as when detected as English
+    ("i need help", "nl", "emergency_call"),
+    ("emergency", "nl", "emergency_call"),
+    ("sos", "pt", "emergency_call"),
+    ("call police", "it", "emergency_call"),
+    ("distress", "it", "emergency_call"),
+    ("medical emergency", "es", "emergency_call"),
+    ("urgent", "de", "emergency_call"),
+    ("call me asha", "it", "introduce_myself"),
+    ("cancel", "es", "stop_or_exit"),
+    ("close", "es", "stop_or_exit"),
+    ("quit", "fr", "stop_or_exit"),
+])
+def test_english_mislabelled_by_langdetect(app, mislabelled, text, detected, expected):
+    assert app.match_intent(text, detected)[0] == app.match_intent(text, "en")[0] == expected
+
+
+def test_detected_language_index_still_wins_for_its_language(app, mislabelled):
+    assert mislabelled.match("chiama la polizia", "it")[:3:2] == ("emergency_call", "it")
+    assert app.match_intent("chiama la polizia", "it")[0] == "unknown" # No emergency word: the gate still applies
+    assert app.match_intent("ayúdame, emergencia", "es")[0] == "emergency_call"
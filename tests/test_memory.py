@@ -0,0 +1,93 @@
+import random
+import sys
+import threading
+
+import memory
+import soak
+
+
+def sized(key):
+    return sys.getsizeof(key)
+
+
+def test_cache_evicts_least_recently_used_to_stay_within_budget():
+    cache = memory.BoundedCache(max_bytes=300 + 3 * sized("a"), sizeof=len)
+    for key in "abc":
+        cache.put(key, "x" * 100)
+    assert cache.get("a") == "x" * 100 # "a" is now the most recently used
+    cache.put("d", "x" * 100)
+    assert "b" not in cache
+    assert all(key in cache for key in "acd")
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.stats() == {"entries": 3, "bytes": cache.total_bytes, "budget": cache.max_bytes, "evictions": 1}
+
+
+def test_cache_rejects_oversized_and_none_values():
+    cache = memory.BoundedCache(max_bytes=100, sizeof=len)
+    cache.put("big", "x" * 200)
+    cache.put("none", None)
+    assert len(cache) == 0 and cache.total_bytes == 0
+    assert cache.get("big", "missing") == "missing"
+
+
+def test_cache_replacing_a_key_does_not_double_count():
+    cache = memory.BoundedCache(max_bytes=10_000, sizeof=len)
+    cache.put("k", "x" * 500)
+    cache.put("k", "x" * 50)
+    assert len(cache) == 1
+    assert cache.total_bytes == 50 + sized("k")
+    cache.clear()
+    assert len(cache) == 0 and cache.total_bytes == 0
+
+
+def test_cache_budget_holds_under_concurrent_writers():
+    cache = memory.BoundedCache(max_bytes=20_000, sizeof=memory.text_size)
+    def writer(seed):
+        rng = random.Random(seed)
+        for i in range(2000):
+            cache.put(f"{seed}-{i}", "y" * rng.randint(1, 400))
+            cache.get(f"{seed}-{rng.randint(0, i)}")
+    threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 0 < cache.total_bytes <= cache.max_bytes
+    assert cache.evictions > 0
+
+
+def steady(n=20, **overrides):
+    samples = [{"turn": i, "hours": i, "rss": 100 * 2**20, "traced": 10 * 2**20, "fds": 12, "threads": 5} for i in range(n)]
+    for metric, step in overrides.items():
+        for i, s in enumerate(samples):
+            s[metric] += step * i
+    return samples
+
+
+def test_detect_leaks_passes_flat_samples():
+    assert soak.detect_leaks(steady()) == {}
+
+
+def test_detect_leaks_flags_growth_past_the_limit():
+    leaks = soak.detect_leaks(steady(threads=1, rss=1024 * 1024))
+    assert set(leaks) == {"threads", "rss"}
+    growth, limit = leaks["threads"]
+    assert growth > limit == soak.LIMITS["threads"]
+
+
+def test_detect_leaks_ignores_warm_up_and_missing_metrics():
+    samples = steady()
+    for s in samples[:4]: # Caches filling during the first 20% of the run
+        s["traced"] = 0
+    for s in samples:
+        s["fds"] = None
+    assert soak.detect_leaks(samples) == {}
+    assert soak.detect_leaks(steady(n=3, threads=5)) == {} # Too few samples to judge
+
+
+def test_unique_translations_keep_app_caches_within_budget(app):
+    rng = random.Random(1)
+    for _ in range(150):
+        app.process_turn(f"translate {' '.join(rng.sample(soak.WORDS, 3))} to hindi")
+    for cache in (app.translation_memo, app.audio_cache):
+        assert cache.total_bytes <= cache.max_bytes
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+import evaluate
+import phrase_index
+import soak
+
+QUERIES = soak.SCRIPT + ["i need help", "what is the weather like today", "play some music please",
+                         "xyzzy", "", "tell tell tell me a joke joke"]
+
+
+@pytest.fixture(scope="module")
+def catalogue():
+    return phrase_index.catalogue(evaluate.load_app_settings()["intents"])
+
+
+@pytest.mark.parametrize("analyzer, vectorizer", [
+    (phrase_index.word_terms, {}),
+    (phrase_index.char_wb_terms, {"analyzer": "char_wb", "ngram_range": (2, 4)}),
+])
+def test_scores_match_sklearn(catalogue, analyzer, vectorizer):
+    phrases, tags = catalogue
+    index = phrase_index.PhraseIndex(phrases, tags, analyzer=analyzer)
+    sklearn = TfidfVectorizer(**vectorizer)
+    matrix = sklearn.fit_transform(phrases)
+    for query in QUERIES:
+        scores = cosine_similarity(sklearn.transform([query]), matrix)[0]
+        expected = np.sort(scores[scores > 0])[::-1][:5]
+        top = index.top(query, k=5)
+        assert [score for _, score in top] == pytest.approx(list(expected)), query
+        if top:
+            assert top[0][0] == tags[int(scores.argmax())], query
+        else:
+            assert index.match(query) == (tags[0], 0.0)
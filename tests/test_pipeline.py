@@ -0,0 +1,102 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+import pipeline
+
+
+def beating_worker(heartbeat, stop):
+    while True: # Touches no shared lock, so a SIGKILL can't leave one held
+        heartbeat.value = time.monotonic()
+        time.sleep(0.01)
+
+
+def crashing_worker(heartbeat, stop, calls):
+    calls.append(time.monotonic())
+    raise RuntimeError("device unplugged")
+
+
+def finished_worker(heartbeat, stop, calls):
+    calls.append(time.monotonic())
+
+
+def silent_worker(heartbeat, stop, calls):
+    calls.append(time.monotonic())
+    stop.wait(5.0) # Alive but never beats; a thread can't be killed
+
+
+@pytest.fixture(autouse=True)
+def fast_checks(monkeypatch):
+    monkeypatch.setattr(pipeline, "CHECK_INTERVAL", 0.02)
+    monkeypatch.setattr(pipeline, "START_GRACE", 0.1)
+
+
+def supervise(context, name, target, args, max_restarts=3, timeout=0.5):
+    gave_up = threading.Event()
+    supervisor = pipeline.Supervisor(context, context.Event(), max_restarts=max_restarts, on_give_up=gave_up.set)
+    supervisor.add(pipeline.WorkerSpec(name, target, args, timeout))
+    supervisor.start()
+    return supervisor, gave_up
+
+
+def test_gives_up_after_max_restarts():
+    calls = []
+    supervisor, gave_up = supervise(pipeline.ThreadContext, "capture", crashing_worker, (calls,), max_restarts=3)
+    try:
+        assert gave_up.wait(5.0)
+        assert supervisor.failed
+        assert supervisor.workers["capture"].restarts == 3
+        assert len(calls) == 4 # The first start plus three restarts
+        time.sleep(0.1)
+        assert len(calls) == 4 # Nothing restarts once it has given up
+    finally:
+        supervisor.stop()
+
+
+def test_clean_exit_is_not_restarted():
+    calls = []
+    supervisor, gave_up = supervise(pipeline.ThreadContext, "spotter", finished_worker, (calls,))
+    try:
+        time.sleep(0.2)
+        assert len(calls) == 1 and supervisor.generation == 0 and not gave_up.is_set()
+    finally:
+        supervisor.stop()
+
+
+def test_hung_thread_is_not_duplicated():
+    calls = []
+    supervisor, gave_up = supervise(pipeline.ThreadContext, "recognizer", silent_worker, (calls,), timeout=0.05)
+    try:
+        time.sleep(0.3) # Well past the heartbeat timeout
+        assert len(calls) == 1 and not gave_up.is_set()
+    finally:
+        supervisor.stop()
+
+
+def beats(spec, timeout=30.0):
+    """True once the worker's current process is alive and its heartbeat is moving."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        process, heartbeat = spec.process, spec.heartbeat
+        last = heartbeat.value
+        time.sleep(0.05)
+        if process.is_alive() and heartbeat.value != last:
+            return True
+    return False
+
+
+def test_killed_worker_process_is_restarted():
+    context = multiprocessing.get_context("spawn")
+    supervisor, gave_up = supervise(context, "capture", beating_worker, (), timeout=5.0)
+    spec = supervisor.workers["capture"]
+    try:
+        assert beats(spec)
+        first = spec.process
+        first.kill()
+        assert beats(spec) and spec.process is not first # A fresh copy came up
+        assert spec.restarts == 1 and supervisor.generation == 1
+        assert not gave_up.is_set()
+    finally:
+        supervisor.stop(timeout=0.2) # Terminates the worker
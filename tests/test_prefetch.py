@@ -0,0 +1,43 @@
+import pytest
+
+
+class RecordingPrefetcher:
+    def __init__(self):
+        self.switched = []
+
+    def switch(self, lang):
+        self.switched.append(lang)
+
+
+@pytest.fixture
+def prefetcher(app, monkeypatch):
+    recorder = RecordingPrefetcher()
+    monkeypatch.setattr(app, "prefetcher", recorder)
+    monkeypatch.setattr(app, "last_detected_lang", None)
+    monkeypatch.setattr(app, "active_language_mode", None)
+    return recorder
+
+
+def test_single_langdetect_flip_does_not_prefetch(app, prefetcher):
+    for lang in ["en", "it", "en", "es", "en", "nl"]: # Short English turns mislabelled one at a time
+        app.note_detected_language(lang)
+    assert prefetcher.switched == []
+
+
+def test_same_label_on_consecutive_turns_prefetches(app, prefetcher):
+    for lang in ["en", "hi", "hi", "hi"]:
+        app.note_detected_language(lang)
+    assert prefetcher.switched == ["hi", "hi"] # Prefetcher.switch is a no-op for the language already warm
+
+
+def test_consecutive_english_never_prefetches(app, prefetcher):
+    for lang in ["en", "en", "en"]:
+        app.note_detected_language(lang)
+    assert prefetcher.switched == []
+
+
+def test_locked_language_mode_suppresses_prefetch(app, prefetcher, monkeypatch):
+    monkeypatch.setattr(app, "active_language_mode", "es")
+    for lang in ["hi", "hi"]:
+        app.note_detected_language(lang)
+    assert prefetcher.switched == []
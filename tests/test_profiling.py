@@ -0,0 +1,34 @@
+import os
+import threading
+
+import profiling
+
+
+def _recurse(depth, stop):
+    if depth and not stop.is_set():
+        _recurse(depth - 1, stop)
+    else:
+        stop.wait(0.0001)
+
+
+def test_dump_while_sampling(tmp_path):
+    profiler = profiling.SamplingProfiler(interval=0.0005, dump_dir=str(tmp_path))
+    stop = threading.Event()
+    def busy(): # Keeps producing new distinct stacks for the sampler to add
+        while not stop.is_set():
+            for depth in range(30):
+                _recurse(depth, stop)
+    workers = [threading.Thread(target=busy, daemon=True) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    profiler.start()
+    try:
+        paths = [profiler.dump() for _ in range(50)]
+    finally:
+        stop.set()
+        path = profiler.stop()
+    assert os.path.getsize(path) > 0
+    assert len(set(paths + [path])) == 51 # Same-second dumps must not overwrite each other
+    assert len(list(tmp_path.glob("*.folded"))) == 51
+    assert len(list(tmp_path.glob("*.counters.txt"))) == 51
+    assert sum(profiler.snapshot().values()) >= profiler.samples
@@ -0,0 +1,38 @@
+import monitoring
+import sensors
+
+import pytest
+
+
+class _Source:
+    def __init__(self, live):
+        self.live = live
+
+    def start(self, hub):
+        pass
+
+    def stop(self):
+        pass
+
+
+@pytest.mark.parametrize("sources, spoken", [
+    ([], False),
+    ([_Source(sensors.CanStandIn.live)], False),
+    ([_Source(sensors.TripPlayer.live)], False),
+    ([_Source(sensors.SerialSource.live)], True),
+])
+def test_alerts_are_only_spoken_from_a_live_source(app, monkeypatch, sources, spoken):
+    said = []
+    monkeypatch.setattr(app, "respond", lambda key, lang: said.append(key))
+    monkeypatch.setattr(app.sensor_hub, "sources", sources)
+    red_light = next(rule for rule in monitoring.DEFAULT_RULES if rule.name == "red_light")
+    app.announce_safety_alert(red_light, monitoring.SIGNAL_CODES["red"])
+    assert said == (["red_light_warning"] if spoken else [])
+
+
+def test_simulated_heart_rate_is_not_reported(app, monkeypatch):
+    monkeypatch.setattr(app.sensor_hub, "sources", [_Source(False)])
+    app.sensor_hub.push("heart_rate", 140.0)
+    assert app.get_heart_rate() is None
+    monkeypatch.setattr(app.sensor_hub, "sources", [_Source(True)])
+    assert app.get_heart_rate() == 140.0
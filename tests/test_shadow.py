@@ -0,0 +1,94 @@
+import threading
+import time
+
+import shadow
+
+
+class BlockingEngine:
+    """Holds the worker on its first utterance until released."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, text):
+        self.entered.set()
+        self.release.wait(5.0)
+        return self.answers[text]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_submit_never_blocks_and_counts_drops():
+    engine = BlockingEngine({"tell me a joke": ("tell a joke", 0.9)})
+    evaluator = shadow.ShadowEvaluator(engine, capacity=2)
+    try:
+        evaluator.submit("tell me a joke", "tell_a_joke", 0.8, 0.001)
+        assert engine.entered.wait(5.0) # The worker is now stuck on the first utterance
+        started = time.perf_counter()
+        for _ in range(49):
+            evaluator.submit("tell me a joke", "tell_a_joke", 0.8, 0.001)
+        assert time.perf_counter() - started < 0.5
+        assert evaluator.submitted == 50
+        assert evaluator.dropped == 47 # Two waited in the queue, one was in the engine
+    finally:
+        engine.release.set()
+    assert wait_for(lambda: len(evaluator.comparisons) == 3)
+    evaluator.close()
+
+
+def test_comparisons_map_labels_onto_app_tags():
+    answers = {"tell me a joke": ("tell a joke", 0.9), "not funny": ("joke_feedback", 0.7), "hello": ("goodbye", 0.4)}
+    evaluator = shadow.ShadowEvaluator(lambda text: answers[text])
+    evaluator.submit("tell me a joke", "tell_a_joke", 0.8, 0.002)
+    evaluator.submit("not funny", "joke_feedback_negative", 0.6, 0.002)
+    evaluator.submit("hello", "greeting", 0.5, 0.002)
+    assert wait_for(lambda: len(evaluator.comparisons) == 3)
+    evaluator.close()
+    first, second, third = evaluator.comparisons
+    assert (first["live"], first["shadow"], first["agree"]) == ("tell_a_joke", "tell_a_joke", True)
+    assert (second["shadow"], second["agree"]) == ("joke_feedback_negative", True)
+    assert (third["live"], third["shadow"], third["agree"]) == ("greeting", "goodbye", False)
+    assert first["live_ms"] == 2.0 and first["shadow_score"] == 0.9
+
+
+def test_engine_errors_are_counted_and_skipped():
+    def engine(text):
+        if text == "boom":
+            raise ValueError("model missing")
+        return "greeting", 0.9
+    evaluator = shadow.ShadowEvaluator(engine)
+    for text in ("boom", "hello", "boom"):
+        evaluator.submit(text, "greeting", 0.9, 0.001)
+    assert wait_for(lambda: evaluator.errors == 2 and len(evaluator.comparisons) == 1)
+    evaluator.close()
+
+
+def comparison(live, shadow_intent, live_ms=1.0, shadow_ms=10.0, score=0.85):
+    return {"live": live, "live_score": score, "live_ms": live_ms, "shadow": shadow_intent,
+            "shadow_score": score, "shadow_ms": shadow_ms, "agree": live == shadow_intent}
+
+
+def test_summarize_reports_agreement_latency_and_disagreements():
+    comparisons = ([comparison("greeting", "greeting")] * 6 + [comparison("tell_a_joke", "greeting")] * 3
+                   + [comparison("goodbye", "greeting")])
+    report = shadow.summarize(comparisons, submitted=12, dropped=2, errors=0).splitlines()
+    assert report[0] == "submitted 12, dropped 2, errors 0"
+    assert report[1] == "10 utterances compared, engines agree on 60.0%"
+    tfidf = next(line for line in report if line.startswith("tfidf"))
+    joblib = next(line for line in report if line.startswith("joblib"))
+    assert tfidf.split()[1:4] == ["1.00", "1.00", "0.850"]
+    assert joblib.split()[1:3] == ["10.00", "10.00"]
+    assert tfidf.split()[4:] == ["0"] * 8 + ["10", "0"] # All ten scores fall in the 0.8-0.9 bin
+    assert report[-2:] == ["     3  tell_a_joke -> greeting", "     1  goodbye -> greeting"]
+
+
+def test_summarize_without_comparisons():
+    assert shadow.summarize([]) == "No comparisons yet."
+    assert shadow.summarize([], submitted=3, dropped=3) == "submitted 3, dropped 3\nNo comparisons yet."
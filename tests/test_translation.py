@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from translation import BatchTranslator, StandInBackend
+
+
+@pytest.fixture
+def backend():
+    return StandInBackend(latency=0.01, per_char=0.0)
+
+
+def test_requests_within_the_window_share_one_call(backend):
+    translator = BatchTranslator(backend, window=0.05)
+    try:
+        texts = [f"phrase {i}" for i in range(20)]
+        assert translator.translate_many(texts, "hi", timeout=2.0) == [f"{text} (hi)" for text in texts]
+        assert backend.calls == 1
+        assert translator.stats["batches"] == 1 and translator.stats["strings"] == 20
+    finally:
+        translator.close()
+
+
+def test_batches_are_split_at_max_batch(backend):
+    translator = BatchTranslator(backend, window=0.05, max_batch=50)
+    try:
+        texts = [f"phrase {i}" for i in range(120)]
+        assert translator.translate_many(texts, "hi", timeout=2.0) == [f"{text} (hi)" for text in texts]
+        assert backend.calls == 3
+    finally:
+        translator.close()
+
+
+def test_identical_requests_are_sent_once(backend):
+    translator = BatchTranslator(backend, window=0.05)
+    try:
+        first = translator.submit("good morning", "es")
+        second = translator.submit("good morning", "es")
+        other = translator.submit("good morning", "hi") # Same text, different target: its own request
+        assert second is first
+        assert first.result(2.0) == "good morning (es)"
+        assert other.result(2.0) == "good morning (hi)"
+        assert translator.stats["deduplicated"] == 1
+        assert translator.stats["strings"] == 2
+    finally:
+        translator.close()
+
+
+def test_urgent_request_flushes_without_waiting(backend):
+    translator = BatchTranslator(backend, window=10.0)
+    try:
+        waiting = translator.submit("see you later", "hi") # Joins the urgent one's batch
+        background = translator.submit("see you later", "es")
+        started = time.monotonic()
+        assert translator.translate("hello", "hi", timeout=2.0) == "hello (hi)"
+        assert time.monotonic() - started < 1.0
+        assert waiting.result(1.0) == "see you later (hi)"
+        assert not background.done() # Another target keeps waiting out its window
+        assert backend.calls == 1
+    finally:
+        translator.close()
@@ -0,0 +1,467 @@
+# === Translation Service (coalescing batch translator) ===
+# All translations go through one BatchTranslator. Requests for the same target language that
+# arrive within a short window are coalesced into one batched backend call, identical
+# (text, target) requests share one in-flight result, and batches run on a small bounded pool.
+# Turn-path requests are `urgent`: they flush their language's batch at once (taking along
+# whatever else is queued), so a reply never waits out the window. Bulk callers (prefetch,
+# phrase expansion) queue many strings and get them back in a few large calls.
+# Backends are tried in order per string (ChainBackend): local int8 models first where a pair has
+# been converted, then Google, so a dropped connection no longer turns every reply into English.
+#
+#   python translation.py bench           (local stand-in backend: one-by-one vs coalesced throughput)
+#   python translation.py convert hi es   (fetch opus-mt models and quantize them to int8, needs transformers)
+#   python translation.py pairs           (per-pair latency, offline models vs the remote backend)
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import eventlog
+import memory
+import startup
+
+translate_log = eventlog.get("translate")
+ctranslate2 = startup.lazy_import("ctranslate2")
+sentencepiece = startup.lazy_import("sentencepiece")
+
+SEPARATOR = "\n" # Google keeps line breaks, so one request can carry a batch of lines
+MODEL_DIR = os.environ.get("JOEY_MT_DIR", os.path.join("models", "mt"))
+# (source, target) -> (opus-mt model, target token for multi-target models). "*" is any non-English source.
+OFFLINE_MODELS = {
+    ("en", "hi"): ("Helsinki-NLP/opus-mt-en-hi", None),
+    ("en", "es"): ("Helsinki-NLP/opus-mt-en-es", None),
+    ("en", "ur"): ("Helsinki-NLP/opus-mt-en-ur", None),
+    ("en", "bn"): ("Helsinki-NLP/opus-mt-en-mul", ">>ben<<"),
+    ("en", "ja"): ("Helsinki-NLP/opus-mt-en-mul", ">>jpn<<"),
+    ("en", "de"): ("Helsinki-NLP/opus-mt-en-de", None),
+    ("en", "fr"): ("Helsinki-NLP/opus-mt-en-fr", None),
+    ("en", "zh-CN"): ("Helsinki-NLP/opus-mt-en-zh", ">>cmn_Hans<<"),
+    ("en", "ru"): ("Helsinki-NLP/opus-mt-en-ru", None),
+    ("en", "ar"): ("Helsinki-NLP/opus-mt-en-ar", ">>ara<<"),
+    ("en", "pt"): ("Helsinki-NLP/opus-mt-en-ROMANCE", ">>pt<<"),
+    ("en", "it"): ("Helsinki-NLP/opus-mt-en-it", None),
+    ("en", "ko"): ("Helsinki-NLP/opus-mt-en-mul", ">>kor<<"),
+    ("en", "nl"): ("Helsinki-NLP/opus-mt-en-nl", None),
+    ("*", "en"): ("Helsinki-NLP/opus-mt-mul-en", None),
+}
+
+
+class GoogleBackend:
+    """
+    Batched calls on deep_translator's GoogleTranslator: a batch is sent as one newline-joined
+    request and split back; if the line count doesn't survive, each string is sent on its own.
+    `make_translator(target)` builds a translator; instances are cached per worker thread.
+    """
+
+    def __init__(self, make_translator):
+        self.make_translator = make_translator
+        self._local = threading.local()
+
+    def _translator(self, target):
+        cache = self._local.__dict__.setdefault("by_lang", {})
+        if target not in cache:
+            cache[target] = self.make_translator(target)
+        return cache[target]
+
+    def __call__(self, texts, target):
+        translator = self._translator(target)
+        if len(texts) == 1 or any(SEPARATOR in text for text in texts):
+            return [translator.translate(text) for text in texts]
+        joined = translator.translate(SEPARATOR.join(texts)) or ""
+        parts = [part.strip() for part in joined.split(SEPARATOR)]
+        if len(parts) != len(texts):
+            translate_log.warning("batch_split", target=target, sent=len(texts), received=len(parts)) # One by one instead
+            return [translator.translate(text) for text in texts]
+        return parts
+
+
+class StandInBackend:
+    """Local stand-in with a remote-like cost: `latency` per call plus `per_char` per character."""
+
+    def __init__(self, latency=0.08, per_char=0.00002):
+        self.latency = latency
+        self.per_char = per_char
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, texts, target):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency + self.per_char * sum(len(text) for text in texts))
+        return [f"{text} ({target})" for text in texts]
+
+
+class ChainBackend:
+    """Tries each backend in turn; strings one leaves as None (or a backend that raises) go to the next."""
+
+    def __init__(self, *backends):
+        self.backends = backends
+
+    def __call__(self, texts, target):
+        results = [None] * len(texts)
+        for backend in self.backends:
+            missing = [i for i, result in enumerate(results) if not result]
+            if not missing:
+                break
+            try:
+                translated = backend([texts[i] for i in missing], target)
+            except Exception as e:
+                translate_log.warning("backend_failed", target=target, backend=type(backend).__name__, error=str(e))
+                continue
+            for i, result in zip(missing, translated):
+                results[i] = result
+        return results
+
+
+# === Offline Backend (int8 opus-mt models on CTranslate2) ===
+
+def guess_source(text):
+    """Cheap source guess for picking a model: ASCII is English, anything else goes through mul-en."""
+    return "en" if text.isascii() else "*"
+
+
+class _LoadedModel:
+    __slots__ = ("translator", "source_sp", "target_sp", "nbytes")
+
+    def __init__(self, path, threads, workers):
+        self.translator = ctranslate2.Translator(path, device="cpu", compute_type="int8",
+                                                 inter_threads=workers, intra_threads=threads)
+        self.source_sp = sentencepiece.SentencePieceProcessor(model_file=os.path.join(path, "source.spm"))
+        self.target_sp = sentencepiece.SentencePieceProcessor(model_file=os.path.join(path, "target.spm"))
+        self.nbytes = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class OfflineBackend:
+    """
+    Local opus-mt models quantized to int8 (`python translation.py convert`), one directory per model
+    under `model_dir`. A model loads on first use and stays in a byte-bounded LRU (memory.BoundedCache,
+    sized by the model files); each batch is one translate_batch call on `threads` CPU threads, and
+    `workers` batches can run at once. Pairs without a converted model come back None.
+    Non-English text bound for another language is pivoted through English.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, max_bytes=256 * 1024 * 1024, threads=2, workers=2,
+                 beam_size=2, guess=guess_source):
+        self.model_dir = model_dir
+        self.threads = threads
+        self.workers = workers
+        self.beam_size = beam_size # 1-2 is near greedy speed; quality gains beyond that are small for replies
+        self.guess = guess
+        self.models = memory.BoundedCache(max_bytes, sizeof=lambda model: model.nbytes, name="offline models")
+        self.loads = 0
+        self._locks = {} # model name -> lock, so one model is never loaded twice at once
+        self._lock = threading.Lock()
+        self._reported = set() # Missing or oversized models already reported
+
+    def _path(self, model):
+        return os.path.join(self.model_dir, model.rsplit("/", 1)[-1])
+
+    def available(self, source, target):
+        spec = OFFLINE_MODELS.get((source, target))
+        return spec is not None and os.path.isfile(os.path.join(self._path(spec[0]), "model.bin"))
+
+    def _model(self, name):
+        model = self.models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            model = self.models.get(name)
+            if model is None:
+                started = time.perf_counter()
+                model = _LoadedModel(self._path(name), self.threads, self.workers)
+                self.loads += 1
+                self.models.put(name, model)
+                translate_log.info("model_loaded", model=name, mb=round(model.nbytes / 2**20), seconds=round(time.perf_counter() - started, 2))
+                if name not in self.models and name not in self._reported:
+                    self._reported.add(name)
+                    translate_log.warning("model_over_budget", model=name) # Reloaded per batch
+        return model
+
+    def _translate(self, texts, source, target):
+        if not self.available(source, target):
+            if (source, target) not in self._reported:
+                self._reported.add((source, target))
+                translate_log.info("no_offline_model", pair=f"{source}-{target}") # The next backend takes it
+            return [None] * len(texts)
+        name, token = OFFLINE_MODELS[(source, target)]
+        model = self._model(name)
+        prefix = [token] if token else []
+        batch = [prefix + model.source_sp.encode(text, out_type=str) + ["</s>"] for text in texts]
+        results = model.translator.translate_batch(batch, beam_size=self.beam_size, max_batch_size=32,
+                                                   max_decoding_length=256)
+        return [model.target_sp.decode(result.hypotheses[0]) or None for result in results]
+
+    def __call__(self, texts, target):
+        results = [None] * len(texts)
+        by_source = {}
+        for i, text in enumerate(texts):
+            by_source.setdefault(self.guess(text), []).append(i)
+        for source, indices in by_source.items():
+            batch = [texts[i] for i in indices]
+            if source == target:
+                translated = batch # English to English, as Google returns it
+            elif source == "en" or target == "en":
+                translated = self._translate(batch, source, target)
+            else: # Pivot: anything -> English -> target
+                english = self._translate(batch, "*", "en")
+                keep = [j for j, text in enumerate(english) if text]
+                translated = [None] * len(batch)
+                for j, text in zip(keep, self._translate([english[j] for j in keep], "en", target) if keep else []):
+                    translated[j] = text
+            for i, result in zip(indices, translated):
+                results[i] = result
+        return results
+
+
+class BatchTranslator:
+    """
+    Coalesces translate requests into batched backend calls. `backend(texts, target)` returns one
+    translation (or None) per text. Results are memoized in `memo` (a memory.BoundedCache) if given.
+    """
+
+    def __init__(self, backend, window=0.02, max_batch=50, max_chars=4500, workers=4, memo=None):
+        self.backend = backend
+        self.window = window # Seconds a non-urgent request may wait for company
+        self.max_batch = max_batch
+        self.max_chars = max_chars # Google's endpoint takes up to 5000 characters per request
+        self.memo = memo
+        self.stats = {"requests": 0, "memo_hits": 0, "deduplicated": 0, "batches": 0, "strings": 0, "failures": 0}
+        self._pending = {} # target -> [text] waiting to be sent
+        self._chars = {} # target -> characters pending
+        self._first = {} # target -> arrival time of its oldest pending request
+        self._urgent = set() # targets to flush without waiting
+        self._inflight = {} # (text, target) -> Future, until the batch carrying it completes
+        self._cond = threading.Condition()
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="joey-translate")
+        threading.Thread(target=self._collect, name="translate-batcher", daemon=True).start()
+
+    def submit(self, text, target, urgent=False):
+        """Future resolving to the translation (None if it failed)."""
+        key = (text, target)
+        with self._cond:
+            self.stats["requests"] += 1
+            memoized = self.memo.get(key) if self.memo is not None else None
+            if memoized:
+                self.stats["memo_hits"] += 1
+                future = Future()
+                future.set_result(memoized)
+                return future
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["deduplicated"] += 1
+            else:
+                future = self._inflight[key] = Future()
+                self._pending.setdefault(target, []).append(text)
+                self._chars[target] = self._chars.get(target, 0) + len(text)
+                self._first.setdefault(target, time.monotonic())
+            if urgent:
+                self._urgent.add(target)
+            self._cond.notify()
+        return future
+
+    def translate(self, text, target, timeout=None, urgent=True):
+        """Blocking single translation for the turn path; None on failure or timeout."""
+        try:
+            return self.submit(text, target, urgent).result(timeout)
+        except Exception as e:
+            translate_log.error("failed", target=target, error=str(e) or type(e).__name__) # A timeout has no message
+            return None
+
+    def translate_many(self, texts, target, timeout=None):
+        """Queues every text at once (coalesced into few calls); translations in input order."""
+        futures = [self.submit(text, target) for text in texts]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout))
+            except Exception:
+                results.append(None)
+        return results
+
+    def _due(self, target, now):
+        return (target in self._urgent or len(self._pending[target]) >= self.max_batch
+                or self._chars[target] >= self.max_chars or now - self._first[target] >= self.window)
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    now = time.monotonic()
+                    ready = [target for target in self._pending if self._due(target, now)]
+                    if ready:
+                        break
+                    wait = min(self._first[t] + self.window for t in self._pending) - now if self._pending else None
+                    self._cond.wait(wait)
+                batches = []
+                for target in ready:
+                    texts = self._pending.pop(target)
+                    del self._chars[target], self._first[target]
+                    self._urgent.discard(target)
+                    batches.extend((target, chunk) for chunk in self._chunks(texts))
+            for target, chunk in batches:
+                self._pool.submit(self._run, chunk, target)
+
+    def _chunks(self, texts):
+        chunk, chars = [], 0
+        for text in texts:
+            if chunk and (len(chunk) >= self.max_batch or chars + len(text) > self.max_chars):
+                yield chunk
+                chunk, chars = [], 0
+            chunk.append(text)
+            chars += len(text)
+        if chunk:
+            yield chunk
+
+    def _run(self, texts, target):
+        try:
+            results = list(self.backend(texts, target))
+        except Exception as e:
+            translate_log.error("batch_failed", target=target, strings=len(texts), error=str(e))
+            results = []
+        results += [None] * (len(texts) - len(results))
+        if self.memo is not None: # Before the in-flight entries go, so no request slips between the two
+            for text, result in zip(texts, results):
+                if result:
+                    self.memo.put((text, target), result)
+        with self._cond:
+            self.stats["batches"] += 1
+            self.stats["strings"] += len(texts)
+            self.stats["failures"] += sum(result is None for result in results)
+            futures = [self._inflight.pop((text, target)) for text in texts]
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# === Benchmark (local stand-in backend) ===
+
+def bench(strings=2000, callers=16, latency=0.08):
+    """One-call-per-string vs coalesced throughput, plus single urgent-request latency."""
+    texts = [f"phrase number {i} for the benchmark" for i in range(strings)]
+
+    backend = StandInBackend(latency)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as pool: # Same concurrency as the batcher's pool
+        list(pool.map(lambda text: backend([text], "hi")[0], texts))
+    one_by_one = time.perf_counter() - started
+    print(f"[Bench] one call per string: {strings / one_by_one:8.1f} strings/s ({backend.calls} backend calls)")
+
+    backend = StandInBackend(latency)
+    translator = BatchTranslator(backend)
+    started = time.perf_counter()
+    share = strings // callers
+    with ThreadPoolExecutor(max_workers=callers) as pool: # Many concurrent callers
+        list(pool.map(lambda i: translator.translate_many(texts[i * share:(i + 1) * share], "hi"), range(callers)))
+    coalesced = time.perf_counter() - started
+    print(f"[Bench] coalesced:           {callers * share / coalesced:8.1f} strings/s ({backend.calls} backend calls, "
+          f"{translator.stats['deduplicated']} deduplicated)")
+
+    samples = []
+    for i in range(10):
+        started = time.perf_counter()
+        translator.translate(f"urgent reply {i}", "es")
+        samples.append(time.perf_counter() - started)
+    print(f"[Bench] urgent single request: {1000 * sorted(samples)[len(samples) // 2]:.1f} ms "
+          f"(backend latency {1000 * latency:.0f} ms)")
+    translator.close()
+
+
+# === Offline Models: conversion and per-pair benchmark ===
+
+BENCH_SENTENCES = ["Hello! How can I help you today?", "The weather is clear and it is 24 degrees.",
+                   "Sorry, I didn't catch that.", "Drive safely, you are over the speed limit.",
+                   "Good morning, John.", "I can speak English, Hindi, Spanish, Urdu and Bangla."]
+
+
+def convert(targets, model_dir=MODEL_DIR, force=False):
+    """Downloads the opus-mt models for English <-> `targets` and writes int8 CTranslate2 copies."""
+    converters = startup.lazy_import("ctranslate2.converters")
+    names = {OFFLINE_MODELS[("*", "en")][0]}
+    names.update(OFFLINE_MODELS[("en", target)][0] for target in targets if ("en", target) in OFFLINE_MODELS)
+    for name in sorted(names):
+        output = os.path.join(model_dir, name.rsplit("/", 1)[-1])
+        if os.path.isfile(os.path.join(output, "model.bin")) and not force:
+            print(f"[Convert] {name}: already in {output}")
+            continue
+        started = time.perf_counter()
+        converter = converters.TransformersConverter(name, copy_files=["source.spm", "target.spm"])
+        converter.convert(output, quantization="int8", force=True)
+        print(f"[Convert] {name} -> {output} in {time.perf_counter() - started:.0f}s")
+
+
+def _timed(fn, runs):
+    """Median seconds of `runs` calls (None if the call fails or returns no translation)."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            print(f"[Bench] {e}")
+            return None
+        if not result or not all(result):
+            return None
+        samples.append(time.perf_counter() - started)
+    return sorted(samples)[len(samples) // 2]
+
+
+def bench_pairs(targets, runs=5, model_dir=MODEL_DIR):
+    """Per-pair latency of one reply and of a batch of replies, offline models vs Google."""
+    offline = OfflineBackend(model_dir)
+    try:
+        google = startup.lazy_import("deep_translator").GoogleTranslator
+        remote = GoogleBackend(lambda target: google(source="auto", target=target))
+    except ImportError:
+        remote = None
+    batch = BENCH_SENTENCES * 3
+
+    def cell(backend, texts, target):
+        if backend is None:
+            return "-"
+        seconds = _timed(lambda: backend(texts, target), runs)
+        return "-" if seconds is None else f"{1000 * seconds / len(texts):.1f}"
+
+    print(f"{'pair':<10}{'load s':>8}{'offline 1':>12}{'offline/str':>13}{'remote 1':>11}{'remote/str':>12}   (ms)")
+    for target in targets:
+        if ("en", target) not in OFFLINE_MODELS:
+            continue
+        load = "-"
+        if offline.available("en", target):
+            started = time.perf_counter()
+            offline(BENCH_SENTENCES[:1], target) # First call loads the model
+            load = f"{time.perf_counter() - started:.2f}"
+        print(f"{'en-' + target:<10}{load:>8}{cell(offline, BENCH_SENTENCES[:1], target):>12}"
+              f"{cell(offline, batch, target):>13}{cell(remote, BENCH_SENTENCES[:1], target):>11}"
+              f"{cell(remote, batch, target):>12}")
+    print(f"[Bench] {offline.loads} model loads, offline models {offline.models.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the coalescing translator; convert and benchmark offline models.")
+    parser.add_argument("command", choices=["bench", "convert", "pairs"])
+    parser.add_argument("targets", nargs="*", help="target languages for convert / pairs (default: all)")
+    parser.add_argument("--strings", type=int, default=2000)
+    parser.add_argument("--callers", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.08, help="stand-in backend seconds per call")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per cell for pairs")
+    parser.add_argument("--force", action="store_true", help="convert again even if a model is present")
+    args = parser.parse_args()
+    targets = args.targets or [target for source, target in OFFLINE_MODELS if source == "en"]
+    if args.command == "bench":
+        bench(args.strings, args.callers, args.latency)
+    elif args.command == "convert":
+        convert(targets, force=args.force)
+    else:
+        bench_pairs(targets, args.runs)
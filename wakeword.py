@@ -0,0 +1,270 @@
+# === Wake-Word Front End ===
+# A small always-on keyword spotter that gates the expensive path (Google STT, language
+# detection, intent matching). It runs on the raw 16 kHz microphone frames:
+#   1. An energy gate skips silence and steady road noise almost for free.
+#   2. Voiced audio is turned into log-mel features (vectorized NumPy, one FFT batch per read).
+#   3. The recent features are matched against enrolled templates with subsequence DTW.
+# Templates are short WAV recordings in wakeword_templates/<label>/, enrolled per driver with
+#   python wakeword.py enroll joey        (also: hey_joey, suno_joey for the Hindi variant)
+#   python wakeword.py enroll emergency_help   (any "emergency_*" label is spotted by kws.py)
+# Emergency labels are always armed and bypass the wake word (see kws.DistressSpotter). With no
+# wake templates enrolled the gate is disabled and Joey listens to everything, as before.
+
+import os
+import re
+import sys
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+import eventlog
+
+wake_log = eventlog.get("wakeword")
+SAMPLE_RATE = 16000
+WINDOW = 400 # 25 ms analysis window
+HOP = 160 # 10 ms hop -> 100 feature frames per second
+N_FFT = 512
+N_MELS = 24
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wakeword_templates")
+WAKE_LABELS = ("joey", "hey_joey", "suno_joey")
+EMERGENCY_PREFIX = "emergency_"
+
+
+def mel_filterbank(n_mels=N_MELS, n_fft=N_FFT, sample_rate=SAMPLE_RATE, fmin=80.0, fmax=7600.0):
+    """Triangular mel filters as an (n_fft // 2 + 1, n_mels) matrix, so features are one matmul."""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    mels = np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / sample_rate).astype(int)
+    fb = np.zeros((n_fft // 2 + 1, n_mels), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            fb[left:center, m - 1] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            fb[center:right, m - 1] = (right - np.arange(center, right)) / (right - center)
+    return fb
+
+
+class FeatureExtractor:
+    """Streaming log-mel features. Feed int16 samples, get (n_frames, N_MELS) float32 features."""
+
+    def __init__(self):
+        self.filters = mel_filterbank()
+        self.window = np.hanning(WINDOW).astype(np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def process(self, samples):
+        samples = np.concatenate((self._pending, samples.astype(np.float32) / 32768.0))
+        n_frames = 0 if len(samples) < WINDOW else 1 + (len(samples) - WINDOW) // HOP
+        self._pending = samples[n_frames * HOP:]
+        if n_frames == 0:
+            return np.zeros((0, N_MELS), dtype=np.float32)
+        # Zero-copy (n_frames, WINDOW) view over the samples, then one batched FFT
+        frames = np.lib.stride_tricks.sliding_window_view(samples, WINDOW)[::HOP][:n_frames]
+        power = np.abs(np.fft.rfft(frames * self.window, n=N_FFT)) ** 2
+        return np.log(power @ self.filters + 1e-6).astype(np.float32)
+
+
+def features_from_audio(samples):
+    """Log-mel features for a whole clip (used for templates)."""
+    return FeatureExtractor().process(samples)
+
+
+def _normalize(features):
+    """Mean-normalize per clip and unit-length each frame, so cosine distance is a dot product."""
+    features = features - features.mean(axis=0, keepdims=True)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return features / np.maximum(norms, 1e-6)
+
+
+def subsequence_dtw(template, stream):
+    """
+    Best average alignment cost of `template` (T, D) anywhere inside `stream` (S, D), both normalized.
+    Uses slope-constrained steps (1,1), (1,2), (2,1) so each template row is one vectorized update.
+    """
+    cost = 1.0 - template @ stream.T # (T, S) cosine distances
+    T, S = cost.shape
+    inf = np.float32(np.inf)
+    prev2 = np.full(S, inf, dtype=np.float32)
+    prev = cost[0].copy() # Free start anywhere in the stream
+    for i in range(1, T):
+        best = np.full(S, inf, dtype=np.float32)
+        best[1:] = prev[:-1] # (1,1)
+        best[2:] = np.minimum(best[2:], prev[:-2]) # (1,2)
+        if i >= 2:
+            best[1:] = np.minimum(best[1:], prev2[:-1]) # (2,1)
+        prev2, prev = prev, cost[i] + best
+    return float(prev.min()) / T
+
+
+def load_wav(path):
+    """Reads a mono 16-bit WAV into int16 samples."""
+    with wave.open(path, "rb") as wav:
+        if wav.getframerate() != SAMPLE_RATE or wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit {SAMPLE_RATE} Hz audio")
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        if wav.getnchannels() > 1:
+            samples = samples[::wav.getnchannels()]
+        return samples
+
+
+def load_templates(template_dir=TEMPLATE_DIR):
+    """{label: [normalized features, ...]} from wakeword_templates/<label>/*.wav."""
+    templates = {}
+    if not os.path.isdir(template_dir):
+        return templates
+    for label in sorted(os.listdir(template_dir)):
+        label_dir = os.path.join(template_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            if name.endswith(".wav"):
+                try:
+                    features = features_from_audio(load_wav(os.path.join(label_dir, name)))
+                    if len(features) >= 10:
+                        templates.setdefault(label, []).append(_normalize(_trim_silence(features)))
+                except Exception as e:
+                    wake_log.warning("template_skipped", template=name, error=str(e))
+    return templates
+
+
+def _trim_silence(features, margin=3.0):
+    """Drops leading/trailing frames much quieter than the loudest part of the clip."""
+    energy = features.mean(axis=1)
+    voiced = np.nonzero(energy > energy.max() - margin)[0]
+    return features[voiced[0]:voiced[-1] + 1] if len(voiced) else features
+
+
+class WakeWordDetector:
+    """
+    Streaming detector. Call process(frame_bytes) for every microphone read; it returns the
+    matched label ("joey", "emergency_help", ...) or None.
+    """
+
+    def __init__(self, templates=None, threshold=0.30, energy_margin_db=9.0, check_every=0.1):
+        self.templates = load_templates() if templates is None else templates
+        self.threshold = threshold
+        self.energy_margin = energy_margin_db * np.log(10) / 10 # dB -> natural-log power units
+        self.check_every = int(check_every * SAMPLE_RATE / HOP)
+        longest = max((len(t) for ts in self.templates.values() for t in ts), default=100)
+        self.features = deque(maxlen=int(longest * 1.5)) # Recent feature frames
+        self.extractor = FeatureExtractor()
+        self.noise_floor = None
+        self._since_check = 0
+        self.hangover_frames = int(0.3 * SAMPLE_RATE / HOP) # Keep matching 300 ms past the last voiced frame
+        self._hangover = 0
+        self.stats = {"frames": 0, "voiced": 0, "checks": 0, "dtw_seconds": 0.0}
+
+    @property
+    def enabled(self):
+        """The wake gate is only active once at least one wake word has been enrolled."""
+        return any(label in self.templates for label in WAKE_LABELS)
+
+    def reset(self):
+        self.features.clear()
+        self.extractor.reset()
+        self._since_check = 0
+        self._hangover = 0
+
+    def process(self, frame_bytes):
+        features = self.extractor.process(np.frombuffer(frame_bytes, dtype=np.int16))
+        if not len(features):
+            return None
+        self.stats["frames"] += len(features)
+        energy = np.log(np.exp(features).sum(axis=1)) # Log frame energy
+        # Track the noise floor with a slow follower on the quietest frames
+        floor = float(energy.min())
+        if self.noise_floor is None or floor < self.noise_floor:
+            self.noise_floor = floor # Drop immediately
+        else:
+            self.noise_floor += 0.01 * (floor - self.noise_floor) # Rise slowly
+        if (energy > self.noise_floor + self.energy_margin).any():
+            self._hangover = self.hangover_frames
+        else:
+            self._hangover = max(0, self._hangover - len(features))
+        self.features.extend(features)
+        if not self._hangover: # Silence/steady noise: no matching at all
+            self._since_check = 0
+            return None
+        self.stats["voiced"] += len(features)
+        self._since_check += len(features)
+        if self._since_check < self.check_every:
+            return None
+        self._since_check = 0
+        return self._match()
+
+    def _match(self):
+        start = time.perf_counter()
+        stream = _normalize(np.asarray(self.features))
+        best_label, best_cost = None, self.threshold
+        for label, label_templates in self.templates.items():
+            for template in label_templates:
+                cost = subsequence_dtw(template, stream)
+                if cost < best_cost:
+                    best_label, best_cost = label, cost
+        self.stats["checks"] += 1
+        self.stats["dtw_seconds"] += time.perf_counter() - start
+        if best_label:
+            wake_log.info("detected", label=best_label, cost=round(best_cost, 3))
+            self.features.clear() # Don't re-trigger on the same audio
+        return best_label
+
+
+WAKE_PHRASE_PATTERN = re.compile(r"^\s*(?:(?:hey|hi|ok|okay|suno|सुनो)\s+)?(?:joey|जॉय|जोई)\b[\s,.!]*", re.IGNORECASE)
+
+
+def strip_wake_phrase(text):
+    """Removes a leading "hey Joey"/"suno Joey" from a transcript so it doesn't skew intent matching."""
+    return WAKE_PHRASE_PATTERN.sub("", text, count=1)
+
+
+def is_emergency(label):
+    return bool(label) and label.startswith(EMERGENCY_PREFIX)
+
+
+def wait_for_activation(source, detector, timeout=None):
+    """
+    Reads microphone frames from an open speech_recognition source until a wake word or an
+    always-armed emergency keyword is spotted. Returns the label, or None on timeout.
+    """
+    detector.reset()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while deadline is None or time.monotonic() < deadline:
+        label = detector.process(source.stream.read(source.CHUNK))
+        if label:
+            return label
+    return None
+
+
+def enroll(label, count=5, template_dir=TEMPLATE_DIR):
+    """Records `count` samples of a keyword from the microphone into wakeword_templates/<label>/."""
+    import speech_recognition as sr
+    recognizer = sr.Recognizer()
+    label_dir = os.path.join(template_dir, label)
+    os.makedirs(label_dir, exist_ok=True)
+    with sr.Microphone(sample_rate=SAMPLE_RATE) as source:
+        recognizer.adjust_for_ambient_noise(source, duration=1)
+        for i in range(count):
+            print(f"Say '{label.replace('_', ' ')}' ({i + 1}/{count})...")
+            audio = recognizer.listen(source, phrase_time_limit=2)
+            path = os.path.join(label_dir, f"{label}_{int(time.time() * 1000)}.wav")
+            with open(path, "wb") as f:
+                f.write(audio.get_wav_data(convert_rate=SAMPLE_RATE, convert_width=2))
+            print(f"Saved {path}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "enroll":
+        enroll(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 5)
+    else:
+        print("Usage: python wakeword.py enroll <label> [count]")